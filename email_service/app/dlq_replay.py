@@ -0,0 +1,338 @@
+import argparse
+import asyncio
+import re
+import sys
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Iterable, List, Optional
+
+import orjson
+from aio_pika import IncomingMessage, Message, RobustChannel
+from aio_pika.abc import AbstractExchange, AbstractQueue
+from structlog import get_logger
+
+from app.infrastructure.rabbitmq import (
+    close_connection,
+    ensure_core_exchanges,
+    ensure_dead_letter_queue,
+    get_channel,
+)
+from app.infrastructure.redis import get_redis
+from app.infrastructure.status_repository import StatusRepository
+from app.logging import configure_logging, stop_logging
+from app.services.rate_limiter import TokenBucket
+from app.settings import get_settings
+
+log = get_logger()
+settings = get_settings()
+
+# Added by the retry path and the broker on the way to the DLQ; dropped on replay
+# so the message starts again from its first attempt.
+RESET_HEADERS = frozenset(
+    {
+        "x-retry-attempt",
+        "x-error",
+        "x-death",
+        "x-first-death-exchange",
+        "x-first-death-queue",
+        "x-first-death-reason",
+        "x-last-death-exchange",
+        "x-last-death-queue",
+        "x-last-death-reason",
+    }
+)
+
+
+def _epoch(value: object) -> Optional[float]:
+    if not isinstance(value, datetime):
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+class DeadLetter:
+    def __init__(self, message: IncomingMessage, now: float) -> None:
+        self.message = message
+        self.headers = dict(message.headers or {})
+        try:
+            body = orjson.loads(message.body)
+        except orjson.JSONDecodeError:
+            body = None
+        if not isinstance(body, dict):
+            body = {}
+        self.request_id: Optional[str] = body.get("request_id") or self.headers.get("x-request-id")
+        self.template_code: Optional[str] = body.get("template_code")
+        # Retried messages carry the last exception; ones rejected outright only the broker's reason.
+        self.error = str(self.headers.get("x-error") or self.headers.get("x-first-death-reason") or "")
+
+        # x-death[0] is the most recent dead-lettering.
+        deaths = self.headers.get("x-death")
+        dead_at = _epoch(deaths[0].get("time")) if isinstance(deaths, list) and deaths else None
+        if dead_at is None:
+            dead_at = _epoch(message.timestamp)
+        self.age = now - dead_at if dead_at is not None else None
+
+    def replay_message(self) -> Message:
+        headers = {key: value for key, value in self.headers.items() if key not in RESET_HEADERS}
+        headers["x-replay-count"] = int(self.headers.get("x-replay-count", 0)) + 1
+        return Message(
+            body=self.message.body,
+            headers=headers,
+            content_type=self.message.content_type or "application/json",
+            delivery_mode=self.message.delivery_mode,
+            priority=self.message.priority,
+            correlation_id=self.message.correlation_id,
+            message_id=self.message.message_id,
+        )
+
+    def parked_message(self) -> Message:
+        return Message(
+            body=self.message.body,
+            headers=self.headers,
+            content_type=self.message.content_type,
+            delivery_mode=self.message.delivery_mode,
+            priority=self.message.priority,
+            correlation_id=self.message.correlation_id,
+            message_id=self.message.message_id,
+            timestamp=self.message.timestamp,
+        )
+
+
+class ReplayFilter:
+    def __init__(
+        self,
+        error: Optional[str] = None,
+        template_codes: Iterable[str] = (),
+        older_than: Optional[float] = None,
+        newer_than: Optional[float] = None,
+    ) -> None:
+        self.error = re.compile(error, re.IGNORECASE) if error else None
+        self.template_codes = frozenset(template_codes)
+        self.older_than = older_than
+        self.newer_than = newer_than
+
+    def matches(self, letter: DeadLetter) -> bool:
+        if self.error is not None and not self.error.search(letter.error):
+            return False
+        if self.template_codes and letter.template_code not in self.template_codes:
+            return False
+        if self.older_than is not None or self.newer_than is not None:
+            # An age filter never matches a message whose age is unknown.
+            if letter.age is None:
+                return False
+            if self.older_than is not None and letter.age < self.older_than:
+                return False
+            if self.newer_than is not None and letter.age > self.newer_than:
+                return False
+        return True
+
+
+# Streams the DLQ in batches of at most `batch_size` unacked deliveries. Matching
+# messages get their idempotency claims cleared (one pipeline per batch) and are
+# re-published to the email routing key; the rest are parked at the tail of the
+# DLQ. Originals are acked only once the broker confirms the new copy. The run
+# covers the messages present when it started (or `limit` of them), so parked and
+# newly dead-lettered messages are not scanned twice.
+#
+# In dry-run mode nothing is acked or published: every delivery stays unacked
+# until the channel closes, which puts them all back in their original order.
+# Held deliveries cannot be released without acking or requeueing them, so a dry
+# run covers at most one batch: the first `batch_size` (or `limit`) messages.
+class DeadLetterReplayer:
+    def __init__(
+        self,
+        channel: RobustChannel,
+        queue: AbstractQueue,
+        exchange: AbstractExchange,
+        status_repo: StatusRepository,
+        replay_filter: ReplayFilter,
+        batch_size: int,
+        rate: float,
+        idle_timeout: float,
+        limit: int = 0,
+        dry_run: bool = False,
+        show: int = 20,
+    ) -> None:
+        self.channel = channel
+        self.queue = queue
+        self.exchange = exchange
+        self.status_repo = status_repo
+        self.filter = replay_filter
+        self.batch_size = batch_size
+        self.limiter = TokenBucket(rate=rate, capacity=max(1, int(rate))) if rate > 0 else None
+        self.idle_timeout = idle_timeout
+        self.limit = limit
+        self.dry_run = dry_run
+        self.show = show
+        self.stats: Counter = Counter()
+        self.templates: Counter = Counter()
+        # Never holds more than the prefetch window the broker lets through.
+        self._incoming: asyncio.Queue[IncomingMessage] = asyncio.Queue(maxsize=batch_size)
+        self._started = 0.0
+
+    async def run(self) -> Counter:
+        depth = self.queue.declaration_result.message_count or 0
+        target = min(depth, self.limit) if self.limit else depth
+        if self.dry_run and target > self.batch_size:
+            log.warning("email.dlq_replay.dry_run_truncated", target=target, batch_size=self.batch_size)
+            target = self.batch_size
+        log.info("email.dlq_replay.started", queue=self.queue.name, depth=depth, target=target, dry_run=self.dry_run)
+        if not target:
+            return self.stats
+
+        await self.channel.set_qos(prefetch_count=min(self.batch_size, target))
+        consumer_tag = await self.queue.consume(self._incoming.put, no_ack=False)
+        self._started = time.monotonic()
+        try:
+            while self.stats["scanned"] < target:
+                batch = await self._next_batch(min(self.batch_size, target - self.stats["scanned"]))
+                if not batch:
+                    log.warning("email.dlq_replay.idle", scanned=self.stats["scanned"], target=target)
+                    break
+                if not await self._process(batch):
+                    break
+                self._report("email.dlq_replay.progress", target=target)
+        finally:
+            await self.queue.cancel(consumer_tag)
+        self._report("email.dlq_replay.finished", target=target, templates=dict(self.templates.most_common(10)))
+        return self.stats
+
+    async def _next_batch(self, size: int) -> List[IncomingMessage]:
+        try:
+            first = await asyncio.wait_for(self._incoming.get(), self.idle_timeout)
+        except asyncio.TimeoutError:
+            return []
+        batch = [first]
+        while len(batch) < size and not self._incoming.empty():
+            batch.append(self._incoming.get_nowait())
+        return batch
+
+    async def _process(self, batch: List[IncomingMessage]) -> bool:
+        now = time.time()
+        letters = [DeadLetter(message, now) for message in batch]
+        matched: List[DeadLetter] = []
+        skipped: List[DeadLetter] = []
+        for letter in letters:
+            (matched if self.filter.matches(letter) else skipped).append(letter)
+        self.stats["scanned"] += len(letters)
+        self.stats["matched"] += len(matched)
+        self.stats["skipped"] += len(skipped)
+        self.templates.update(letter.template_code or "-" for letter in matched)
+
+        if self.dry_run:
+            for letter in matched:
+                if self.stats["shown"] >= self.show:
+                    break
+                self.stats["shown"] += 1
+                log.info(
+                    "email.dlq_replay.would_replay",
+                    request_id=letter.request_id,
+                    template_code=letter.template_code,
+                    error=letter.error,
+                    age=round(letter.age) if letter.age is not None else None,
+                )
+            return True
+
+        # Claims go first, or the consumer could see a replayed message as a duplicate.
+        self.stats["claims_cleared"] += await self.status_repo.release_claims(
+            [letter.request_id for letter in matched if letter.request_id]
+        )
+        results = await asyncio.gather(
+            *(self._replay(letter) for letter in matched),
+            *(self._park(letter) for letter in skipped),
+            return_exceptions=True,
+        )
+        errors: List[BaseException] = []
+        for letter, result in zip(matched + skipped, results):
+            if isinstance(result, BaseException):
+                errors.append(result)
+                await letter.message.nack(requeue=True)
+                continue
+            await letter.message.ack()
+        if errors:
+            # Unconfirmed messages go back to the DLQ; stop rather than spin on a broken route.
+            self.stats["failed"] += len(errors)
+            log.error("email.dlq_replay.publish_failed", failed=len(errors), error=str(errors[0]))
+            return False
+        self.stats["replayed"] += len(matched)
+        return True
+
+    async def _replay(self, letter: DeadLetter) -> None:
+        if self.limiter is not None:
+            await self.limiter.acquire()
+        # Returns once the broker confirms the message.
+        await self.exchange.publish(letter.replay_message(), routing_key="email")
+
+    async def _park(self, letter: DeadLetter) -> None:
+        await self.channel.default_exchange.publish(letter.parked_message(), routing_key=self.queue.name)
+
+    def _report(self, event: str, **fields: object) -> None:
+        elapsed = max(time.monotonic() - self._started, 1e-9) if self._started else 0.0
+        counts = {key: value for key, value in self.stats.items() if key != "shown"}
+        log.info(
+            event,
+            elapsed=round(elapsed, 2),
+            per_second=round(self.stats["scanned"] / elapsed, 1) if elapsed else 0.0,
+            **counts,
+            **fields,
+        )
+
+
+async def replay(args: argparse.Namespace) -> Counter:
+    redis = await get_redis()
+    status_repo = StatusRepository(redis, ttl_seconds=settings.redis_request_ttl)
+    channel = await get_channel()
+    try:
+        await ensure_core_exchanges(channel)
+        queue = await ensure_dead_letter_queue(channel)
+        exchange = await channel.get_exchange(settings.notifications_exchange)
+        replayer = DeadLetterReplayer(
+            channel,
+            queue,
+            exchange,
+            status_repo,
+            ReplayFilter(
+                error=args.error,
+                template_codes=args.template_code,
+                older_than=args.older_than,
+                newer_than=args.newer_than,
+            ),
+            batch_size=args.batch_size,
+            rate=args.rate,
+            idle_timeout=args.idle_timeout,
+            limit=args.limit,
+            dry_run=args.dry_run,
+            show=args.show,
+        )
+        return await replayer.run()
+    finally:
+        await close_connection()
+        await redis.close()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Replay dead-lettered email notifications.")
+    parser.add_argument("--error", help="only replay messages whose last error matches this regex")
+    parser.add_argument("--template-code", action="append", default=[], help="only replay this template (repeatable)")
+    parser.add_argument("--older-than", type=float, help="minimum seconds since the message was dead-lettered")
+    parser.add_argument("--newer-than", type=float, help="maximum seconds since the message was dead-lettered")
+    parser.add_argument("--limit", type=int, default=0, help="scan at most this many messages (default: whole queue)")
+    parser.add_argument("--batch-size", type=int, default=settings.dlq_replay_batch_size)
+    parser.add_argument("--rate", type=float, default=settings.dlq_replay_rate, help="messages/second, 0 = unlimited")
+    parser.add_argument("--idle-timeout", type=float, default=settings.dlq_replay_idle_timeout)
+    parser.add_argument("--dry-run", action="store_true", help="report what would be replayed, change nothing")
+    parser.add_argument("--show", type=int, default=20, help="matching messages to list in a dry run")
+    args = parser.parse_args(argv)
+
+    configure_logging(settings.log_level)
+    try:
+        stats = asyncio.run(replay(args))
+    finally:
+        stop_logging()
+    return 1 if stats["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,104 @@
+from functools import lru_cache
+from typing import Any, Dict
+from uuid import UUID
+
+import orjson
+from pydantic import ValidationError
+from pydantic.networks import validate_email
+from pydantic_core import PydanticCustomError
+
+from app.domain.schemas import (
+    NotificationMetadata,
+    NotificationPayload,
+    NotificationType,
+    NotificationVariables,
+)
+from app.settings import get_settings
+
+_settings = get_settings()
+
+
+class PayloadDecodeError(ValueError):
+    pass
+
+
+@lru_cache(maxsize=_settings.email_validation_cache_size)
+def _validate_recipient(value: str) -> str:
+    return validate_email(value)[1]
+
+
+def validate_recipient(value: Any) -> str:
+    if not isinstance(value, str):
+        raise PayloadDecodeError("metadata.recipient_email must be a string")
+    try:
+        return _validate_recipient(value)
+    except PydanticCustomError as exc:
+        raise PayloadDecodeError(f"metadata.recipient_email: {exc}") from exc
+
+
+def _require_str(data: Dict[str, Any], field: str, section: str = "") -> str:
+    value = data.get(field)
+    if not isinstance(value, str):
+        raise PayloadDecodeError(f"{section}{field} must be a string")
+    return value
+
+
+def decode_fast(body: bytes) -> NotificationPayload:
+    # Checks the fields the pipeline depends on and builds the models without
+    # running full validation. variables.link is only checked for an http(s)
+    # scheme and forwarded unnormalized.
+    try:
+        data = orjson.loads(body)
+    except orjson.JSONDecodeError as exc:
+        raise PayloadDecodeError(f"invalid JSON: {exc}") from exc
+    if not isinstance(data, dict):
+        raise PayloadDecodeError("payload must be a JSON object")
+
+    variables = data.get("variables")
+    metadata = data.get("metadata")
+    if not isinstance(variables, dict) or not isinstance(metadata, dict):
+        raise PayloadDecodeError("variables and metadata must be objects")
+
+    link = _require_str(variables, "link", "variables.")
+    if not link.startswith(("http://", "https://")):
+        raise PayloadDecodeError("variables.link must be an http(s) URL")
+    name = _require_str(variables, "name", "variables.")
+    variables.setdefault("meta", None)
+
+    metadata["recipient_email"] = validate_recipient(metadata.get("recipient_email"))
+    metadata.setdefault("locale", "en")
+    metadata.setdefault("correlation_id", None)
+    metadata.setdefault("extra", None)
+
+    try:
+        notification_type = NotificationType(data.get("notification_type"))
+        user_id = UUID(str(data.get("user_id")))
+        priority = int(data.get("priority", 5))
+    except (ValueError, TypeError) as exc:
+        raise PayloadDecodeError(str(exc)) from exc
+
+    payload = NotificationPayload.model_construct(
+        notification_type=notification_type,
+        user_id=user_id,
+        template_code=_require_str(data, "template_code"),
+        variables=NotificationVariables.model_construct(name=name, link=link, meta=variables["meta"]),
+        request_id=_require_str(data, "request_id"),
+        priority=priority,
+        metadata=NotificationMetadata.model_construct(**metadata),
+    )
+    payload._raw_variables = variables
+    payload._raw_metadata = metadata
+    return payload
+
+
+def decode_strict(body: bytes) -> NotificationPayload:
+    try:
+        return NotificationPayload.model_validate_json(body)
+    except ValidationError as exc:
+        raise PayloadDecodeError(str(exc)) from exc
+
+
+def decode_payload(body: bytes) -> NotificationPayload:
+    if _settings.payload_decode_mode == "fast":
+        return decode_fast(body)
+    return decode_strict(body)
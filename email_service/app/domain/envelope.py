@@ -0,0 +1,89 @@
+import gzip
+import zlib
+from typing import List, Optional
+
+from app.domain.decoding import PayloadDecodeError
+from app.settings import get_settings
+
+try:
+    import zstandard
+except ImportError:
+    # Optional: without it zstd-encoded messages are rejected as undecodable.
+    zstandard = None
+
+_settings = get_settings()
+
+# Envelopes are newline-delimited JSON: each line is a NotificationPayload exactly
+# as it would be sent on its own, so a record can be split out, retried or
+# dead-lettered without re-serializing it.
+ENVELOPE_CONTENT_TYPE = "application/x-ndjson"
+ENCODINGS = ("identity", "gzip", "zstd")
+
+
+def is_packed(content_type: Optional[str], content_encoding: Optional[str]) -> bool:
+    # Envelopes, and single payloads sent compressed, are unpacked into records.
+    return content_type == ENVELOPE_CONTENT_TYPE or (content_encoding or "identity") != "identity"
+
+
+def _gunzip(body: bytes, max_bytes: int) -> bytes:
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    try:
+        data = decompressor.decompress(body, max_bytes)
+    except zlib.error as exc:
+        raise PayloadDecodeError(f"invalid gzip body: {exc}") from exc
+    if decompressor.unconsumed_tail:
+        raise PayloadDecodeError(f"envelope exceeds {max_bytes} bytes")
+    return data
+
+
+def _unzstd(body: bytes, max_bytes: int) -> bytes:
+    if zstandard is None:
+        raise PayloadDecodeError("zstd content-encoding requires the zstandard package")
+    try:
+        reader = zstandard.ZstdDecompressor().stream_reader(body)
+        data = reader.read(max_bytes + 1)
+    except zstandard.ZstdError as exc:
+        raise PayloadDecodeError(f"invalid zstd body: {exc}") from exc
+    if len(data) > max_bytes:
+        raise PayloadDecodeError(f"envelope exceeds {max_bytes} bytes")
+    return data
+
+
+def decompress(body: bytes, content_encoding: Optional[str]) -> bytes:
+    # Output is capped at ENVELOPE_MAX_BYTES so a small compressed body cannot
+    # expand into an unbounded allocation.
+    encoding = content_encoding or "identity"
+    max_bytes = _settings.envelope_max_bytes
+    if encoding == "identity":
+        return body
+    if encoding == "gzip":
+        return _gunzip(body, max_bytes)
+    if encoding == "zstd":
+        return _unzstd(body, max_bytes)
+    raise PayloadDecodeError(f"unsupported content-encoding: {encoding}")
+
+
+def compress(body: bytes, content_encoding: str) -> bytes:
+    if content_encoding == "gzip":
+        return gzip.compress(body, compresslevel=6)
+    if content_encoding == "zstd":
+        if zstandard is None:
+            raise RuntimeError("zstd content-encoding requires the zstandard package")
+        return zstandard.ZstdCompressor(level=3).compress(body)
+    return body
+
+
+def unpack_records(body: bytes, content_type: Optional[str], content_encoding: Optional[str]) -> List[bytes]:
+    data = decompress(body, content_encoding)
+    if content_type != ENVELOPE_CONTENT_TYPE:
+        return [data]
+    records = [line for line in data.split(b"\n") if line.strip()]
+    if not records:
+        raise PayloadDecodeError("envelope has no records")
+    if len(records) > _settings.envelope_max_records:
+        raise PayloadDecodeError(f"envelope has more than {_settings.envelope_max_records} records")
+    return records
+
+
+def pack_records(bodies: List[bytes], content_encoding: str = "identity") -> bytes:
+    return compress(b"\n".join(bodies), content_encoding)
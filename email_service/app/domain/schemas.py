@@ -1,9 +1,9 @@
 from datetime import datetime
 from enum import Enum
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 from uuid import UUID
 
-from pydantic import BaseModel, EmailStr, HttpUrl
+from pydantic import BaseModel, EmailStr, HttpUrl, PrivateAttr
 
 
 class NotificationType(str, Enum):
@@ -39,6 +39,21 @@ class NotificationPayload(BaseModel):
     priority: int = 5
     metadata: NotificationMetadata
 
+    # JSON-ready copies of the incoming sections, set by the fast decoder so they
+    # can be forwarded without another model_dump.
+    _raw_variables: Optional[Dict[str, Any]] = PrivateAttr(default=None)
+    _raw_metadata: Optional[Dict[str, Any]] = PrivateAttr(default=None)
+
+    def variables_json(self) -> Dict[str, Any]:
+        if self._raw_variables is not None:
+            return self._raw_variables
+        return self.variables.model_dump(mode="json")
+
+    def metadata_json(self) -> Dict[str, Any]:
+        if self._raw_metadata is not None:
+            return self._raw_metadata
+        return self.metadata.model_dump(mode="json")
+
 
 class NotificationStatusUpdate(BaseModel):
     notification_id: str
@@ -47,6 +62,10 @@ class NotificationStatusUpdate(BaseModel):
     error: Optional[str] = None
 
 
+class BulkStatusRequest(BaseModel):
+    request_ids: List[str]
+
+
 class PaginationMeta(BaseModel):
     total: int = 0
     limit: int = 0
@@ -54,6 +73,7 @@ class PaginationMeta(BaseModel):
     total_pages: int = 0
     has_next: bool = False
     has_previous: bool = False
+    next_cursor: Optional[str] = None
 
 
 class ApiResponse(BaseModel):
@@ -0,0 +1,49 @@
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+import aiohttp
+
+from app.settings import get_settings
+
+_settings = get_settings()
+_session: aiohttp.ClientSession | None = None
+
+
+def _create_session() -> aiohttp.ClientSession:
+    connector = aiohttp.TCPConnector(
+        limit=_settings.template_http_pool_limit,
+        limit_per_host=_settings.template_http_pool_limit_per_host,
+        keepalive_timeout=_settings.template_http_keepalive_timeout,
+        ttl_dns_cache=_settings.template_http_dns_cache_ttl,
+        use_dns_cache=True,
+    )
+    # `total` bounds the whole request, including a server that trickles its response.
+    timeout = aiohttp.ClientTimeout(
+        total=_settings.template_http_total_timeout,
+        sock_connect=_settings.template_http_connect_timeout,
+        sock_read=_settings.template_http_read_timeout,
+    )
+    return aiohttp.ClientSession(connector=connector, timeout=timeout)
+
+
+async def get_http_session() -> aiohttp.ClientSession:
+    global _session
+    if _session is None or _session.closed:
+        _session = _create_session()
+    return _session
+
+
+async def close_http_session() -> None:
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
+
+
+@asynccontextmanager
+async def http_session_lifespan() -> AsyncIterator[aiohttp.ClientSession]:
+    session = await get_http_session()
+    try:
+        yield session
+    finally:
+        await close_http_session()
@@ -2,7 +2,9 @@ from contextlib import asynccontextmanager
 from typing import AsyncIterator
 
 from aio_pika import ExchangeType, RobustChannel, RobustConnection, connect_robust
+from aio_pika.abc import AbstractQueue
 
+from app.services.retry import retry_tiers
 from app.settings import get_settings
 
 _settings = get_settings()
@@ -16,10 +18,17 @@ async def get_connection() -> RobustConnection:
     return _connection
 
 
-async def get_channel(prefetch: int = 10) -> RobustChannel:
+async def close_connection() -> None:
+    global _connection
+    if _connection is not None and not _connection.is_closed:
+        await _connection.close()
+    _connection = None
+
+
+async def get_channel(prefetch: int | None = None) -> RobustChannel:
     connection = await get_connection()
     channel = await connection.channel()
-    await channel.set_qos(prefetch_count=prefetch)
+    await channel.set_qos(prefetch_count=prefetch or _settings.consumer_prefetch)
     return channel
 
 
@@ -29,6 +38,32 @@ async def ensure_core_exchanges(channel: RobustChannel) -> None:
     await channel.declare_exchange(_settings.rabbitmq_dead_letter_exchange, ExchangeType.DIRECT, durable=True)
 
 
+async def ensure_retry_queues(channel: RobustChannel) -> None:
+    # Each backoff tier is a consumer-less queue whose TTL dead-letters messages
+    # back onto the email routing key, so waiting retries never hold a worker.
+    retry_exchange = await channel.get_exchange(_settings.rabbitmq_retry_exchange)
+    for tier in retry_tiers():
+        queue = await channel.declare_queue(
+            tier.queue_name,
+            durable=True,
+            arguments={
+                "x-message-ttl": tier.delay_ms,
+                "x-dead-letter-exchange": _settings.notifications_exchange,
+                "x-dead-letter-routing-key": "email",
+            },
+        )
+        await queue.bind(retry_exchange, routing_key=tier.routing_key)
+
+
+async def ensure_dead_letter_queue(channel: RobustChannel) -> AbstractQueue:
+    # Messages rejected after their last retry land here until replayed with
+    # `python -m app.dlq_replay`.
+    queue = await channel.declare_queue(_settings.rabbitmq_dead_letter_queue, durable=True)
+    dead_letter_exchange = await channel.get_exchange(_settings.rabbitmq_dead_letter_exchange)
+    await queue.bind(dead_letter_exchange, routing_key="email.dead")
+    return queue
+
+
 @asynccontextmanager
 async def rabbitmq_lifespan() -> AsyncIterator[RobustConnection]:
     connection = await get_connection()
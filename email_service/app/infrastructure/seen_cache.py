@@ -0,0 +1,57 @@
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable
+
+from app.metrics import record_dedup_lookup
+
+
+# Bounded LRU of request_ids this process has marked delivered. Only delivered
+# ids are kept: a claim alone can be released again (failure, DLQ replay) by any
+# process, which this cache would never hear about. A hit means the id is
+# certainly a duplicate; a miss says nothing, so the caller falls through to
+# Redis, which stays the source of truth.
+class SeenRequestCache:
+    def __init__(self, max_size: int, ttl_seconds: float) -> None:
+        self.max_size = max_size
+        self.ttl = ttl_seconds
+        self._entries: "OrderedDict[str, float]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0
+
+    def __contains__(self, request_id: str) -> bool:
+        seen_at = self._entries.get(request_id)
+        if seen_at is not None and time.monotonic() - seen_at < self.ttl:
+            self._entries.move_to_end(request_id)
+            self.hits += 1
+            record_dedup_lookup(hit=True)
+            return True
+        if seen_at is not None:
+            del self._entries[request_id]
+        self.misses += 1
+        record_dedup_lookup(hit=False)
+        return False
+
+    def add(self, request_id: str) -> None:
+        if not self.enabled:
+            return
+        # Entries keep their original timestamp so they never outlive the Redis key.
+        if request_id in self._entries:
+            self._entries.move_to_end(request_id)
+            return
+        self._entries[request_id] = time.monotonic()
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def discard(self, request_ids: Iterable[str]) -> None:
+        for request_id in request_ids:
+            self._entries.pop(request_id, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, int]:
+        return {"dedup_cache_size": len(self._entries), "dedup_hits": self.hits, "dedup_misses": self.misses}
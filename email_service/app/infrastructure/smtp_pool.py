@@ -0,0 +1,134 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, List
+
+import aiosmtplib
+from structlog import get_logger
+
+from app.settings import get_settings
+
+log = get_logger()
+_settings = get_settings()
+
+# The server refused one transaction but the session itself is still usable.
+# SMTPRecipientsRefused (every recipient rejected) is not an SMTPResponseException.
+TRANSACTION_ERRORS = (aiosmtplib.SMTPResponseException, aiosmtplib.SMTPRecipientsRefused)
+
+
+class PooledSMTPConnection:
+    def __init__(self, client: aiosmtplib.SMTP) -> None:
+        self.client = client
+        self.created_at = time.monotonic()
+        self.last_used_at = self.created_at
+        self.messages_sent = 0
+
+    def is_expired(self, max_messages: int, max_age: float) -> bool:
+        if self.messages_sent >= max_messages:
+            return True
+        return time.monotonic() - self.created_at >= max_age
+
+    def mark_used(self, messages: int = 1) -> None:
+        self.messages_sent += messages
+        self.last_used_at = time.monotonic()
+
+
+class SMTPConnectionPool:
+    def __init__(
+        self,
+        size: int | None = None,
+        max_messages: int | None = None,
+        max_age: float | None = None,
+        idle_check: float | None = None,
+    ) -> None:
+        self.size = size or _settings.smtp_pool_size
+        self.max_messages = max_messages or _settings.smtp_pool_max_messages
+        self.max_age = max_age or _settings.smtp_pool_max_age
+        self.idle_check = idle_check if idle_check is not None else _settings.smtp_pool_idle_check
+        self._idle: List[PooledSMTPConnection] = []
+        self._slots = asyncio.Semaphore(self.size)
+        self._closed = False
+
+    def _create_client(self) -> aiosmtplib.SMTP:
+        return aiosmtplib.SMTP(
+            hostname=_settings.smtp_host,
+            port=_settings.smtp_port,
+            username=_settings.smtp_username,
+            password=_settings.smtp_password,
+            start_tls=_settings.smtp_use_tls,
+            timeout=_settings.smtp_timeout,
+        )
+
+    async def _open(self) -> PooledSMTPConnection:
+        client = self._create_client()
+        # connect() performs EHLO, STARTTLS and AUTH when credentials are configured.
+        await client.connect()
+        log.debug("smtp.pool.connected", host=_settings.smtp_host)
+        return PooledSMTPConnection(client)
+
+    async def _discard(self, connection: PooledSMTPConnection) -> None:
+        if not connection.client.is_connected:
+            return
+        try:
+            await connection.client.quit()
+        except aiosmtplib.SMTPException:
+            connection.client.close()
+
+    async def _reset_or_discard(self, connection: PooledSMTPConnection) -> None:
+        try:
+            await connection.client.rset()
+        except aiosmtplib.SMTPException:
+            await self._discard(connection)
+        else:
+            self._checkin(connection)
+
+    async def _is_healthy(self, connection: PooledSMTPConnection) -> bool:
+        if not connection.client.is_connected:
+            return False
+        if connection.is_expired(self.max_messages, self.max_age):
+            return False
+        if time.monotonic() - connection.last_used_at < self.idle_check:
+            return True
+        try:
+            await connection.client.noop()
+        except aiosmtplib.SMTPException:
+            return False
+        return True
+
+    async def _checkout(self) -> PooledSMTPConnection:
+        while self._idle:
+            connection = self._idle.pop()
+            if await self._is_healthy(connection):
+                return connection
+            await self._discard(connection)
+        return await self._open()
+
+    def _checkin(self, connection: PooledSMTPConnection) -> None:
+        if self._closed:
+            connection.client.close()
+            return
+        self._idle.append(connection)
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[PooledSMTPConnection]:
+        if self._closed:
+            raise RuntimeError("SMTP connection pool is closed")
+        async with self._slots:
+            connection = await self._checkout()
+            try:
+                yield connection
+            except TRANSACTION_ERRORS:
+                await self._reset_or_discard(connection)
+                raise
+            except BaseException:
+                connection.client.close()
+                raise
+            if connection.is_expired(self.max_messages, self.max_age):
+                await self._discard(connection)
+            else:
+                self._checkin(connection)
+
+    async def close(self) -> None:
+        self._closed = True
+        idle, self._idle = self._idle, []
+        await asyncio.gather(*(self._discard(connection) for connection in idle), return_exceptions=True)
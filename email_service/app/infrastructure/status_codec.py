@@ -0,0 +1,51 @@
+from typing import Dict, Optional, Union
+
+from app.domain.schemas import NotificationStatus
+from app.settings import get_settings
+
+_settings = get_settings()
+
+# Per-request records are small hashes with one-letter fields, so Redis keeps them
+# listpack-encoded (every value must stay under hash-max-listpack-value, 64 bytes
+# by default, which is why error text is truncated):
+#   s  status code          e  error message, truncated
+#   i  idempotency claim
+# The update time is not stored here; it is the record's score in the listing index.
+STATUS = "s"
+ERROR = "e"
+CLAIM = "i"
+
+STATUS_CODES: Dict[NotificationStatus, str] = {
+    NotificationStatus.pending: "0",
+    NotificationStatus.delivered: "1",
+    NotificationStatus.failed: "2",
+}
+_STATUS_BY_CODE = {code: status for status, code in STATUS_CODES.items()}
+
+
+def _truncate(text: str, max_bytes: int) -> str:
+    encoded = text.encode()
+    if len(encoded) <= max_bytes:
+        return text
+    return encoded[:max_bytes].decode(errors="ignore")
+
+
+def encode_status(status: NotificationStatus, error: Optional[Union[str, BaseException]] = None) -> Dict[str, str]:
+    fields = {STATUS: STATUS_CODES[status]}
+    # Stored as str(error), like the status API has always reported it.
+    message = str(error) if error is not None else ""
+    if message:
+        fields[ERROR] = _truncate(message, _settings.status_error_max_bytes)
+    return fields
+
+
+def decode_status(fields: Dict[str, str]) -> Optional[Dict[str, str]]:
+    # Returns the public shape: {"status"[, "error"]}. A hash that only holds an
+    # idempotency claim has no status yet.
+    code = fields.get(STATUS)
+    if code is None:
+        return None
+    decoded = {"status": _STATUS_BY_CODE[code].value}
+    if ERROR in fields:
+        decoded["error"] = fields[ERROR]
+    return decoded
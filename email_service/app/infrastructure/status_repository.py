@@ -1,37 +1,197 @@
-from typing import Dict, Optional
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
 
 from redis.asyncio import Redis
 
 from app.domain.schemas import NotificationStatus
+from app.infrastructure.seen_cache import SeenRequestCache
+from app.infrastructure.status_codec import CLAIM, ERROR, decode_status, encode_status
+
+# Index members are ordered by last update time in milliseconds; a cursor is the
+# "<score>:<request_id>" of the last item returned, so ties on the same
+# millisecond are paged through without skipping or repeating entries.
+StatusPage = Tuple[List[Dict[str, str]], Optional[str]]
+StatusError = Union[str, BaseException]
+
+
+def encode_cursor(score: float, request_id: str) -> str:
+    return f"{int(score)}:{request_id}"
+
+
+def decode_cursor(cursor: str) -> Tuple[int, str]:
+    score, separator, request_id = cursor.partition(":")
+    if not separator or not score.isdigit():
+        raise ValueError("Invalid cursor")
+    return int(score), request_id
 
 
 class StatusRepository:
-    def __init__(self, redis: Redis, ttl_seconds: int):
+    def __init__(self, redis: Redis, ttl_seconds: int, local_cache_size: int = 0):
         self.redis = redis
         self.ttl = ttl_seconds
+        self.seen = SeenRequestCache(local_cache_size, ttl_seconds)
 
-    def _status_key(self, request_id: str) -> str:
-        return f"notification_status:{request_id}"
+    def _key(self, request_id: str) -> str:
+        # One compact hash per request holds its status and idempotency claim.
+        return f"n:{request_id}"
 
-    def _idempotency_key(self, request_id: str) -> str:
-        return f"idempotency:{request_id}"
+    def _index_key(self, status: Optional[NotificationStatus] = None) -> str:
+        return f"notification_index:{status.value}" if status else "notification_index"
+
+    def _queue_status(
+        self,
+        pipe: Any,
+        request_id: str,
+        status: NotificationStatus,
+        error: Optional[StatusError],
+        now_ms: int,
+    ) -> None:
+        key = self._key(request_id)
+        fields = encode_status(status, error)
+        pipe.hset(key, mapping=fields)
+        if ERROR not in fields:
+            pipe.hdel(key, ERROR)
+        pipe.expire(key, self.ttl)
+        if status is NotificationStatus.failed:
+            # Release the claim so the retried delivery is not skipped as a duplicate.
+            pipe.hdel(key, CLAIM)
+            self.seen.discard((request_id,))
+        pipe.zadd(self._index_key(), {request_id: now_ms})
+        for other in NotificationStatus:
+            if other is status:
+                pipe.zadd(self._index_key(other), {request_id: now_ms})
+            else:
+                pipe.zrem(self._index_key(other), request_id)
+
+    def _queue_index_trim(self, pipe: Any, now_ms: int) -> None:
+        # Index entries live as long as the status hashes they point at.
+        cutoff = now_ms - self.ttl * 1000
+        pipe.zremrangebyscore(self._index_key(), "-inf", cutoff)
+        for status in NotificationStatus:
+            pipe.zremrangebyscore(self._index_key(status), "-inf", cutoff)
 
     async def set_status(
-        self, request_id: str, status: NotificationStatus, error: Optional[str] = None
+        self, request_id: str, status: NotificationStatus, error: Optional[StatusError] = None
+    ) -> None:
+        now_ms = int(time.time() * 1000)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            self._queue_status(pipe, request_id, status, error, now_ms)
+            self._queue_index_trim(pipe, now_ms)
+            await pipe.execute()
+        if status is NotificationStatus.delivered:
+            self.seen.add(request_id)
+
+    async def set_statuses(
+        self, updates: Iterable[Tuple[str, NotificationStatus, Optional[StatusError]]]
     ) -> None:
-        payload: Dict[str, str] = {"status": status.value}
-        if error:
-            payload["error"] = error
-        await self.redis.hset(self._status_key(request_id), mapping=payload)
-        await self.redis.expire(self._status_key(request_id), self.ttl)
+        now_ms = int(time.time() * 1000)
+        updates = list(updates)
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for request_id, status, error in updates:
+                self._queue_status(pipe, request_id, status, error, now_ms)
+            self._queue_index_trim(pipe, now_ms)
+            await pipe.execute()
+        for request_id, status, _ in updates:
+            if status is NotificationStatus.delivered:
+                self.seen.add(request_id)
 
     async def get_status(self, request_id: str) -> Optional[Dict[str, str]]:
-        data = await self.redis.hgetall(self._status_key(request_id))
-        return data if data else None
+        return decode_status(await self.redis.hgetall(self._key(request_id)))
+
+    async def get_statuses(self, request_ids: List[str]) -> Dict[str, Optional[Dict[str, str]]]:
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for request_id in request_ids:
+                pipe.hgetall(self._key(request_id))
+            results = await pipe.execute()
+        return {request_id: decode_status(data) for request_id, data in zip(request_ids, results)}
+
+    async def count_statuses(self, status: Optional[NotificationStatus] = None) -> int:
+        return await self.redis.zcard(self._index_key(status))
+
+    async def list_statuses(
+        self,
+        limit: int,
+        cursor: Optional[str] = None,
+        status: Optional[NotificationStatus] = None,
+    ) -> StatusPage:
+        # Newest first. Walks the index from the cursor's score, skipping the
+        # members on that score that were already returned.
+        index_key = self._index_key(status)
+        max_score: Any = "+inf"
+        after: Optional[Tuple[int, str]] = None
+        if cursor:
+            after = decode_cursor(cursor)
+            max_score = after[0]
+
+        entries: List[Tuple[str, float]] = []
+        offset = 0
+        exhausted = False
+        while len(entries) <= limit and not exhausted:
+            window = limit + 1 - len(entries)
+            batch = await self.redis.zrevrangebyscore(
+                index_key, max_score, "-inf", start=offset, num=window, withscores=True
+            )
+            offset += len(batch)
+            exhausted = len(batch) < window
+            for member, score in batch:
+                request_id = member.decode() if isinstance(member, bytes) else member
+                if after and int(score) == after[0] and request_id >= after[1]:
+                    continue
+                entries.append((request_id, score))
+
+        page = entries[:limit]
+        statuses = await self.get_statuses([request_id for request_id, _ in page])
+        items: List[Dict[str, str]] = []
+        expired: List[str] = []
+        for request_id, _ in page:
+            data = statuses[request_id]
+            if data is None:
+                expired.append(request_id)
+                continue
+            items.append({"request_id": request_id, **data})
+        if expired:
+            await self.redis.zrem(index_key, *expired)
+
+        next_cursor = encode_cursor(page[-1][1], page[-1][0]) if len(entries) > limit else None
+        return items, next_cursor
+
+    def _queue_claim(self, pipe: Any, request_id: str) -> None:
+        key = self._key(request_id)
+        pipe.hsetnx(key, CLAIM, "1")
+        pipe.expire(key, self.ttl)
 
     async def ensure_idempotent(self, request_id: str) -> bool:
-        key = self._idempotency_key(request_id)
-        result = await self.redis.setnx(key, "1")
-        if result:
-            await self.redis.expire(key, self.ttl)
-        return not result
\ No newline at end of file
+        if self.seen.enabled and request_id in self.seen:
+            return True
+        # HSETNX and EXPIRE run as one MULTI, so a new claim never lives without a TTL.
+        async with self.redis.pipeline(transaction=True) as pipe:
+            self._queue_claim(pipe, request_id)
+            result = (await pipe.execute())[0]
+        # Not cached here: a claim can still be released by a failure or a DLQ
+        # replay in another process. set_status caches the id once delivered.
+        return not result
+
+    async def ensure_idempotent_many(self, request_ids: List[str]) -> List[bool]:
+        duplicates = [self.seen.enabled and request_id in self.seen for request_id in request_ids]
+        unknown = [request_id for request_id, duplicate in zip(request_ids, duplicates) if not duplicate]
+        if not unknown:
+            return duplicates
+        async with self.redis.pipeline(transaction=True) as pipe:
+            for request_id in unknown:
+                self._queue_claim(pipe, request_id)
+            results = iter((await pipe.execute())[::2])
+        for index, duplicate in enumerate(duplicates):
+            if not duplicate:
+                duplicates[index] = not next(results)
+        return duplicates
+
+    async def release_claims(self, request_ids: List[str]) -> int:
+        # Drops idempotency claims so replayed messages are processed again; the
+        # status fields are left for the replay to overwrite.
+        if not request_ids:
+            return 0
+        self.seen.discard(request_ids)
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for request_id in request_ids:
+                pipe.hdel(self._key(request_id), CLAIM)
+            return sum(await pipe.execute())
@@ -1,38 +1,155 @@
+import asyncio
+import time
 from typing import Any, Dict, Optional
 
 import aiohttp
+import orjson
+from jinja2 import TemplateError
+from structlog import get_logger
 
 from app.domain.schemas import NotificationPayload
+from app.infrastructure.http import get_http_session
+from app.infrastructure.template_engine import TemplateCache, TemplateSource
+from app.metrics import TEMPLATE_TIMEOUT_SECONDS, record_template_timeout
+from app.services.hedging import HedgeBudget, LatencyTracker, hedged
 from app.settings import get_settings
 
+log = get_logger()
 _settings = get_settings()
 
 
 class TemplateClient:
-    def __init__(self, session: Optional[aiohttp.ClientSession] = None) -> None:
+    def __init__(self, session: Optional[aiohttp.ClientSession] = None, mode: Optional[str] = None) -> None:
         self.base_url = str(_settings.template_service_url).rstrip("/")
         self.session = session
+        self.mode = mode or _settings.template_render_mode
+        self.cache = TemplateCache(
+            fetcher=self.fetch_source,
+            max_size=_settings.template_cache_size,
+            ttl_seconds=_settings.template_cache_ttl,
+        )
+        self.latency = LatencyTracker(
+            window=_settings.template_latency_window,
+            min_samples=_settings.template_latency_min_samples,
+        )
+        self.hedging = _settings.template_hedging_enabled
+        self.hedge_budget = HedgeBudget(_settings.template_hedge_budget)
 
-    async def render(self, payload: NotificationPayload, correlation_id: Optional[str] = None) -> Dict[str, Any]:
-        body = {
-            "template_code": payload.template_code,
-            "variables": payload.variables.model_dump(mode="json"),
-            "metadata": payload.metadata.model_dump(mode="json"),
-            "locale": payload.metadata.locale,
-        }
+    def _headers(self, correlation_id: Optional[str] = None) -> Dict[str, str]:
         headers = {
             "Authorization": f"Bearer {_settings.template_service_token}",
             "Content-Type": "application/json",
         }
         if correlation_id:
             headers["X-Correlation-Id"] = correlation_id
+        return headers
+
+    async def _session(self) -> aiohttp.ClientSession:
+        return self.session if self.session is not None else await get_http_session()
+
+    async def render(self, payload: NotificationPayload, correlation_id: Optional[str] = None) -> Dict[str, Any]:
+        if self.mode == "local":
+            try:
+                return await self.render_local(payload)
+            except (aiohttp.ClientError, asyncio.TimeoutError, LookupError, TemplateError) as exc:
+                log.warning(
+                    "template.local_render_fallback",
+                    template_code=payload.template_code,
+                    error=str(exc),
+                )
+        return await self.render_remote(payload, correlation_id=correlation_id)
+
+    def request_timeout(self) -> float:
+        # Until enough latencies are observed, or while over 1% of recent calls
+        # time out, fall back to the configured read timeout.
+        p99 = self.latency.percentile(0.99)
+        if p99 is None:
+            return _settings.template_http_read_timeout
+        timeout = p99 * _settings.template_timeout_multiplier
+        return min(max(timeout, _settings.template_timeout_min), _settings.template_http_read_timeout)
+
+    async def render_remote(
+        self, payload: NotificationPayload, correlation_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        body = {
+            "template_code": payload.template_code,
+            "variables": payload.variables_json(),
+            "metadata": payload.metadata_json(),
+            "locale": payload.metadata.locale,
+        }
+        data = orjson.dumps(body)
+        headers = self._headers(correlation_id)
+
+        if not self.hedging:
+            return await self._post_render(data, headers)
+        delay = self.latency.percentile(_settings.template_hedge_percentile)
+        return await hedged(lambda: self._post_render(data, headers), delay, self.hedge_budget)
 
-        async with aiohttp.ClientSession() as session:
+    async def _post_render(self, data: bytes, headers: Dict[str, str]) -> Dict[str, Any]:
+        timeout = self.request_timeout()
+        TEMPLATE_TIMEOUT_SECONDS.set(timeout)
+        session = await self._session()
+        started = time.perf_counter()
+        try:
             async with session.post(
                 f"{self.base_url}/api/v1/templates/render",
-                json=body,
+                data=data,
                 headers=headers,
-                timeout=10,
+                # A per-request timeout replaces the session's rather than merging with it.
+                timeout=aiohttp.ClientTimeout(
+                    total=timeout,
+                    sock_connect=_settings.template_http_connect_timeout,
+                    sock_read=_settings.template_http_read_timeout,
+                ),
             ) as response:
                 response.raise_for_status()
-                return await response.json()
\ No newline at end of file
+                result = await response.json()
+        except asyncio.TimeoutError:
+            # Counted apart from latencies; too many and request_timeout falls back
+            # to the read timeout until real latencies are known again.
+            self.latency.observe_timeout()
+            record_template_timeout()
+            raise
+        self.latency.observe(time.perf_counter() - started)
+        return result
+
+    async def render_local(self, payload: NotificationPayload) -> Dict[str, Any]:
+        locale = payload.metadata.locale or "en"
+        template = await self.cache.get(payload.template_code, locale)
+        variables = payload.variables_json()
+        context = {
+            **variables,
+            "variables": variables,
+            "metadata": payload.metadata_json(),
+            "locale": locale,
+        }
+        return template.render(context)
+
+    async def fetch_source(
+        self, template_code: str, locale: str, etag: Optional[str] = None
+    ) -> Optional[TemplateSource]:
+        headers = self._headers()
+        if etag:
+            headers["If-None-Match"] = etag
+
+        session = await self._session()
+        async with session.get(
+            f"{self.base_url}/api/v1/templates/{template_code}",
+            params={"locale": locale},
+            headers=headers,
+        ) as response:
+            if response.status == 304:
+                return None
+            response.raise_for_status()
+            document = await response.json()
+
+        data = document.get("data", document) if isinstance(document, dict) else None
+        if not isinstance(data, dict) or "body" not in data:
+            raise LookupError(f"Template {template_code}/{locale} has no raw source")
+        version = data.get("version")
+        return TemplateSource(
+            subject=data.get("subject") or "",
+            body=data["body"],
+            version=str(version) if version is not None else None,
+            etag=response.headers.get("ETag"),
+        )
@@ -0,0 +1,131 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from jinja2 import StrictUndefined, Template
+from jinja2.sandbox import ImmutableSandboxedEnvironment
+
+TemplateKey = Tuple[str, str]
+
+
+class TemplateSource:
+    def __init__(self, subject: str, body: str, version: Optional[str], etag: Optional[str]) -> None:
+        self.subject = subject
+        self.body = body
+        self.version = version
+        self.etag = etag
+
+
+class CompiledTemplate:
+    def __init__(
+        self,
+        template_code: str,
+        locale: str,
+        version: Optional[str],
+        etag: Optional[str],
+        subject: Template,
+        body: Template,
+    ) -> None:
+        self.template_code = template_code
+        self.locale = locale
+        self.version = version
+        self.etag = etag
+        self.subject = subject
+        self.body = body
+        self.checked_at = time.monotonic()
+
+    def render(self, context: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "subject": self.subject.render(context),
+            "body": self.body.render(context),
+            "template_version": self.version,
+        }
+
+
+# Fetches the raw source for (template_code, locale); receives the cached ETag and
+# returns None when the service answers "not modified".
+SourceFetcher = Callable[[str, str, Optional[str]], Awaitable[Optional[TemplateSource]]]
+
+
+class TemplateCache:
+    def __init__(self, fetcher: SourceFetcher, max_size: int, ttl_seconds: float) -> None:
+        self.fetcher = fetcher
+        self.max_size = max_size
+        self.ttl = ttl_seconds
+        self.environment = ImmutableSandboxedEnvironment(undefined=StrictUndefined, autoescape=False)
+        self._entries: "OrderedDict[TemplateKey, CompiledTemplate]" = OrderedDict()
+        self._inflight: Dict[TemplateKey, asyncio.Future[CompiledTemplate]] = {}
+
+    def _compile(self, template_code: str, locale: str, source: TemplateSource) -> CompiledTemplate:
+        return CompiledTemplate(
+            template_code=template_code,
+            locale=locale,
+            version=source.version,
+            etag=source.etag,
+            subject=self.environment.from_string(source.subject),
+            body=self.environment.from_string(source.body),
+        )
+
+    def _store(self, key: TemplateKey, template: CompiledTemplate) -> None:
+        self._entries[key] = template
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, template_code: str, locale: Optional[str] = None) -> None:
+        for key in list(self._entries):
+            if key[0] == template_code and (locale is None or key[1] == locale):
+                del self._entries[key]
+
+    async def _load(self, key: TemplateKey, cached: Optional[CompiledTemplate]) -> CompiledTemplate:
+        template_code, locale = key
+        source = await self.fetcher(template_code, locale, cached.etag if cached else None)
+        if source is None and cached is not None:
+            # ETag still matches: keep the compiled template and restart its TTL.
+            cached.checked_at = time.monotonic()
+            self._store(key, cached)
+            return cached
+        if source is None:
+            raise LookupError(f"Template {template_code}/{locale} returned no source")
+        if cached is not None and source.version is not None and source.version == cached.version:
+            cached.checked_at = time.monotonic()
+            cached.etag = source.etag or cached.etag
+            self._store(key, cached)
+            return cached
+        compiled = self._compile(template_code, locale, source)
+        self._store(key, compiled)
+        return compiled
+
+    async def get(self, template_code: str, locale: str) -> CompiledTemplate:
+        key = (template_code, locale)
+        cached = self._entries.get(key)
+        if cached is not None and time.monotonic() - cached.checked_at < self.ttl:
+            self._entries.move_to_end(key)
+            return cached
+
+        # Concurrent misses for the same template share a single fetch.
+        pending = self._inflight.get(key)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        future: asyncio.Future[CompiledTemplate] = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            compiled = await self._load(key, cached)
+        except asyncio.CancelledError:
+            # Cancelling the shared future would cancel every other waiter too; fail them
+            # with an error they handle instead.
+            future.set_exception(LookupError(f"Template {template_code}/{locale} fetch was cancelled"))
+            future.exception()
+            raise
+        except Exception as exc:
+            future.set_exception(exc)
+            # Mark the exception as retrieved so a failure nobody else awaited doesn't warn.
+            future.exception()
+            raise
+        else:
+            future.set_result(compiled)
+            return compiled
+        finally:
+            self._inflight.pop(key, None)
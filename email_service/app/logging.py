@@ -1,16 +1,119 @@
+import atexit
 import logging
+import queue
+import random
 import sys
-from typing import Any, Dict
+import time
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Mapping, Optional, Tuple
 
 import structlog
 
+from app.metrics import record_log_dropped
 
-def configure_logging(level: str = "INFO") -> None:
-    processors = [
-        structlog.contextvars.merge_contextvars,
+_listener: Optional[QueueListener] = None
+_atexit_registered = False
+
+
+# Hands records to a background thread through a bounded queue. When the queue
+# is full the record is dropped and counted rather than blocking the event loop.
+class DroppingQueueHandler(QueueHandler):
+    def __init__(self, log_queue: "queue.Queue[logging.LogRecord]") -> None:
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # structlog has already rendered the JSON line; skip QueueHandler's copy and
+        # reformat. Plain stdlib records (uvicorn, aio-pika) may still carry a
+        # traceback, which is folded into the message before exc_info is dropped.
+        if record.exc_info or record.exc_text or record.stack_info:
+            record.msg = self.format(record)
+        else:
+            record.msg = record.getMessage()
+        record.args = None
+        record.stack_info = None
+        record.exc_info = None
+        record.exc_text = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            record_log_dropped()
+
+
+# Keeps roughly `rate` of each listed event (0 < rate <= 1); other events pass through.
+class EventSampler:
+    def __init__(self, rates: Mapping[str, float]) -> None:
+        self.rates = dict(rates)
+
+    def __call__(self, logger: Any, method_name: str, event_dict: Dict[str, Any]) -> Dict[str, Any]:
+        rate = self.rates.get(event_dict.get("event"))  # type: ignore[arg-type]
+        if rate is not None and random.random() >= rate:
+            raise structlog.DropEvent
+        return event_dict
+
+
+# Renders the traceback of a given exception (same event, type and raising line)
+# once per window; repeats within the window are logged without it.
+class ExceptionDeduplicator:
+    max_tracked = 1024
+
+    def __init__(self, window_seconds: float) -> None:
+        self.window = window_seconds
+        self._last_seen: Dict[Tuple[Any, ...], float] = {}
+
+    def __call__(self, logger: Any, method_name: str, event_dict: Dict[str, Any]) -> Dict[str, Any]:
+        exc_info = event_dict.get("exc_info")
+        if not exc_info:
+            return event_dict
+        if isinstance(exc_info, BaseException):
+            error: Optional[BaseException] = exc_info
+        elif isinstance(exc_info, tuple):
+            error = exc_info[1]
+        else:
+            error = sys.exc_info()[1]
+        if error is None:
+            return event_dict
+
+        traceback = error.__traceback__
+        while traceback is not None and traceback.tb_next is not None:
+            traceback = traceback.tb_next
+        location = (traceback.tb_frame.f_code.co_filename, traceback.tb_lineno) if traceback else None
+        key = (event_dict.get("event"), type(error), location)
+
+        now = time.monotonic()
+        last_seen = self._last_seen.get(key)
+        if last_seen is not None and now - last_seen < self.window:
+            del event_dict["exc_info"]
+            event_dict["exc_type"] = type(error).__name__
+            event_dict["traceback_suppressed"] = True
+            return event_dict
+        if len(self._last_seen) >= self.max_tracked:
+            self._last_seen.clear()
+        self._last_seen[key] = now
+        return event_dict
+
+
+def configure_logging(
+    level: str = "INFO",
+    queue_size: int = 0,
+    sample_rates: Optional[Mapping[str, float]] = None,
+    exception_dedup_window: float = 0,
+) -> None:
+    processors: list = [structlog.contextvars.merge_contextvars]
+    if sample_rates:
+        processors.append(EventSampler(sample_rates))
+    processors += [
         structlog.processors.add_log_level,
         structlog.processors.TimeStamper(fmt="iso"),
         structlog.processors.StackInfoRenderer(),
+    ]
+    if exception_dedup_window > 0:
+        processors.append(ExceptionDeduplicator(exception_dedup_window))
+    processors += [
         structlog.processors.format_exc_info,
         structlog.processors.JSONRenderer(),
     ]
@@ -22,7 +125,31 @@ def configure_logging(level: str = "INFO") -> None:
         cache_logger_on_first_use=True,
     )
 
-    logging.basicConfig(stream=sys.stdout, level=level, format="%(message)s")
+    if queue_size <= 0:
+        logging.basicConfig(stream=sys.stdout, level=level, format="%(message)s")
+        return
+
+    global _listener, _atexit_registered
+    stop_logging()
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(logging.Formatter("%(message)s"))
+    log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(maxsize=queue_size)
+    queue_handler = DroppingQueueHandler(log_queue)
+    queue_handler.setFormatter(logging.Formatter("%(message)s"))
+    logging.basicConfig(level=level, handlers=[queue_handler], force=True)
+    _listener = QueueListener(log_queue, stream_handler, respect_handler_level=False)
+    _listener.start()
+    if not _atexit_registered:
+        atexit.register(stop_logging)
+        _atexit_registered = True
+
+
+def stop_logging() -> None:
+    # Flushes queued records and joins the writer thread.
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
 
 
 def bind_context(**kwargs: Any) -> Dict[str, Any]:
@@ -3,16 +3,21 @@ import asyncio
 from fastapi import FastAPI
 from prometheus_fastapi_instrumentator import Instrumentator
 
+from app.infrastructure.http import close_http_session
 from app.infrastructure.redis import get_redis
-from app.infrastructure.status_repository import StatusRepository
-from app.infrastructure.template_client import TemplateClient
-from app.logging import configure_logging
+from app.logging import configure_logging, stop_logging
+from app.metrics import monitor_event_loop_lag
 from app.routes import health, notifications
-from app.services.email_consumer import EmailQueueConsumer
 from app.settings import get_settings
+from app.worker import close_consumer, create_consumer
 
 settings = get_settings()
-configure_logging(settings.log_level)
+configure_logging(
+    settings.log_level,
+    queue_size=settings.log_queue_size,
+    sample_rates=settings.log_sample_rates,
+    exception_dedup_window=settings.log_exception_dedup_window,
+)
 
 app = FastAPI(
     title="Email Service",
@@ -30,14 +35,25 @@ if settings.prometheus_enabled:
 
 @app.on_event("startup")
 async def startup_event() -> None:
-    redis = await get_redis()
-    status_repo = StatusRepository(redis, ttl_seconds=settings.redis_request_ttl)
-    template_client = TemplateClient()
-    consumer = EmailQueueConsumer(status_repo=status_repo, template_client=template_client)
+    app.state.loop_lag_monitor = asyncio.create_task(monitor_event_loop_lag(settings.event_loop_lag_interval))
+    if not settings.consumer_enabled:
+        # API only: consumers run in `python -m app.worker`.
+        return
+    consumer = await create_consumer()
+    app.state.consumer = consumer
+    app.state.email_sender = consumer.sender
     asyncio.create_task(consumer.start())
 
 
 @app.on_event("shutdown")
 async def shutdown_event() -> None:
-    redis = await get_redis()
-    await redis.close()
+    app.state.loop_lag_monitor.cancel()
+    consumer = getattr(app.state, "consumer", None)
+    if consumer is not None:
+        await consumer.drain(settings.worker_shutdown_timeout)
+        await close_consumer(consumer)
+    else:
+        await close_http_session()
+        redis = await get_redis()
+        await redis.close()
+    stop_logging()
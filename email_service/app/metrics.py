@@ -0,0 +1,189 @@
+import asyncio
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Iterator, Optional
+
+from aiobreaker import CircuitBreaker, CircuitBreakerListener
+from aiobreaker.state import CircuitBreakerState
+from prometheus_client import Counter, Gauge, Histogram
+
+STAGES = ("decode", "idempotency", "render", "send", "status_write", "retry_publish")
+OUTCOMES = ("delivered", "duplicate", "failed", "request_id_mismatch", "invalid", "dead_lettered")
+
+STAGE_SECONDS = Histogram(
+    "email_consumer_stage_seconds",
+    "Time spent in each stage of the message pipeline.",
+    ["stage"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+MESSAGES = Counter(
+    "email_consumer_messages_total",
+    "Messages handled by the consumer, by outcome.",
+    ["outcome"],
+)
+IN_FLIGHT = Gauge(
+    "email_consumer_in_flight",
+    "Messages currently being processed.",
+)
+MESSAGE_AGE = Histogram(
+    "email_consumer_message_age_seconds",
+    "Time from publish (AMQP timestamp) until the consumer picked the message up.",
+    buckets=(0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 15.0, 60.0, 300.0, 900.0, 3600.0),
+)
+DEDUP_LOOKUPS = Counter(
+    "email_idempotency_local_cache_total",
+    "Lookups in the in-process duplicate filter, by result.",
+    ["result"],
+)
+CONCURRENCY_LIMIT = Gauge(
+    "email_consumer_concurrency_limit",
+    "Current in-flight limit set by the adaptive concurrency controller.",
+)
+CONCURRENCY_DECISIONS = Counter(
+    "email_consumer_concurrency_decisions_total",
+    "Adaptive concurrency decisions, one per controller tick.",
+    ["decision"],
+)
+CONSUMER_PREFETCH = Gauge(
+    "email_consumer_prefetch",
+    "Per-channel prefetch currently applied to the email queue.",
+)
+ENVELOPE_RECORDS = Histogram(
+    "email_consumer_envelope_records",
+    "Records per envelope (or compressed) message, by content-encoding.",
+    ["encoding"],
+    buckets=(1, 10, 50, 100, 250, 500, 1000),
+)
+CONSUMER_PAUSED = Gauge(
+    "email_consumer_paused",
+    "1 while consumption is paused because a circuit breaker is open.",
+)
+CONSUMER_PAUSED_SECONDS = Counter(
+    "email_consumer_paused_seconds_total",
+    "Time consumption spent paused on an open circuit breaker.",
+)
+CONSUMER_PAUSES = Counter(
+    "email_consumer_pauses_total",
+    "Times consumption was paused, by the breaker that opened.",
+    ["breaker"],
+)
+TEMPLATE_HEDGES = Counter(
+    "email_template_hedges_total",
+    "Hedged template renders: sent, won by the hedge, or skipped for lack of budget.",
+    ["result"],
+)
+TEMPLATE_TIMEOUTS = Counter(
+    "email_template_timeouts_total",
+    "Template render attempts that hit the adaptive timeout.",
+)
+TEMPLATE_TIMEOUT_SECONDS = Gauge(
+    "email_template_timeout_seconds",
+    "Adaptive per-request timeout currently applied to template renders.",
+)
+LOG_RECORDS_DROPPED = Counter(
+    "email_log_records_dropped_total",
+    "Log records dropped because the async log queue was full.",
+)
+EVENT_LOOP_LAG = Histogram(
+    "email_event_loop_lag_seconds",
+    "How late the event loop woke a periodic probe; time other callbacks held the loop.",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+BREAKER_STATE = Gauge(
+    "email_circuit_breaker_state",
+    "Circuit breaker state: 0 closed, 1 half-open, 2 open.",
+    ["breaker"],
+)
+
+_BREAKER_STATE_VALUES = {
+    CircuitBreakerState.CLOSED: 0,
+    CircuitBreakerState.HALF_OPEN: 1,
+    CircuitBreakerState.OPEN: 2,
+}
+
+# Label children are resolved once; .labels() on every observation is the
+# most expensive part of a prometheus_client update.
+_stage_children = {stage: STAGE_SECONDS.labels(stage) for stage in STAGES}
+_outcome_children = {outcome: MESSAGES.labels(outcome) for outcome in OUTCOMES}
+_envelope_children = {encoding: ENVELOPE_RECORDS.labels(encoding) for encoding in ("identity", "gzip", "zstd")}
+_dedup_hit = DEDUP_LOOKUPS.labels("hit")
+_dedup_miss = DEDUP_LOOKUPS.labels("miss")
+_decision_children = {
+    decision: CONCURRENCY_DECISIONS.labels(decision) for decision in ("increase", "decrease", "hold")
+}
+_hedge_children = {result: TEMPLATE_HEDGES.labels(result) for result in ("sent", "won", "budget_exhausted")}
+
+
+@contextmanager
+def observe_stage(stage: str) -> Iterator[None]:
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        _stage_children[stage].observe(time.perf_counter() - started)
+
+
+def record_outcome(outcome: str, count: int = 1) -> None:
+    _outcome_children[outcome].inc(count)
+
+
+def record_dedup_lookup(hit: bool) -> None:
+    (_dedup_hit if hit else _dedup_miss).inc()
+
+
+def record_concurrency_decision(decision: str, limit: int) -> None:
+    _decision_children[decision].inc()
+    CONCURRENCY_LIMIT.set(limit)
+
+
+def record_envelope(encoding: Optional[str], records: int) -> None:
+    _envelope_children[encoding or "identity"].observe(records)
+
+
+def record_consumer_pause(breaker: Optional[str]) -> None:
+    CONSUMER_PAUSES.labels(breaker or "").inc()
+    CONSUMER_PAUSED.set(1)
+
+
+def record_consumer_resume(paused_seconds: float) -> None:
+    CONSUMER_PAUSED_SECONDS.inc(paused_seconds)
+    CONSUMER_PAUSED.set(0)
+
+
+def record_hedge(result: str) -> None:
+    _hedge_children[result].inc()
+
+
+def record_template_timeout() -> None:
+    TEMPLATE_TIMEOUTS.inc()
+
+
+def record_log_dropped() -> None:
+    LOG_RECORDS_DROPPED.inc()
+
+
+async def monitor_event_loop_lag(interval: float) -> None:
+    loop = asyncio.get_running_loop()
+    while True:
+        expected = loop.time() + interval
+        await asyncio.sleep(interval)
+        EVENT_LOOP_LAG.observe(max(0.0, loop.time() - expected))
+
+
+def record_message_age(timestamp: Optional[datetime]) -> None:
+    if timestamp is None:
+        return
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    MESSAGE_AGE.observe(max(0.0, (datetime.now(timezone.utc) - timestamp).total_seconds()))
+
+
+class BreakerStateListener(CircuitBreakerListener):
+    def __init__(self, name: str) -> None:
+        self.gauge = BREAKER_STATE.labels(name)
+        self.gauge.set(0)
+
+    def state_change(self, breaker: CircuitBreaker, old: Any, new: Any) -> None:
+        state = getattr(new, "state", new)
+        self.gauge.set(_BREAKER_STATE_VALUES.get(state, 0))
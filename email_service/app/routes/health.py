@@ -1,4 +1,4 @@
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, Request, status
 
 from app.domain.schemas import ApiResponse
 from app.infrastructure.rabbitmq import get_connection
@@ -8,7 +8,7 @@ router = APIRouter(prefix="/health", tags=["health"])
 
 
 @router.get("", response_model=ApiResponse, status_code=status.HTTP_200_OK)
-async def health_check() -> ApiResponse:
+async def health_check(request: Request) -> ApiResponse:
     redis = await get_redis()
     try:
         await redis.ping()
@@ -19,4 +19,6 @@ async def health_check() -> ApiResponse:
     if connection.is_closed:
         raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="RabbitMQ connection closed")
 
-    return ApiResponse(success=True, message="Service healthy")
\ No newline at end of file
+    consumer = getattr(request.app.state, "consumer", None)
+    data = {"consumer": consumer.stats()} if consumer is not None else None
+    return ApiResponse(success=True, message="Service healthy", data=data)
\ No newline at end of file
@@ -1,6 +1,8 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Optional
 
-from app.domain.schemas import ApiResponse
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+
+from app.domain.schemas import ApiResponse, BulkStatusRequest, NotificationStatus, PaginationMeta
 from app.infrastructure.redis import get_redis
 from app.infrastructure.status_repository import StatusRepository
 from app.settings import get_settings
@@ -14,6 +16,44 @@ async def get_status_repo() -> StatusRepository:
     return StatusRepository(redis, ttl_seconds=settings.redis_request_ttl)
 
 
+@router.get("", response_model=ApiResponse, status_code=status.HTTP_200_OK)
+async def list_notifications(
+    limit: int = Query(settings.status_list_default_limit, ge=1),
+    cursor: Optional[str] = None,
+    status_filter: Optional[NotificationStatus] = Query(None, alias="status"),
+    repo: StatusRepository = Depends(get_status_repo),
+) -> ApiResponse:
+    limit = min(limit, settings.status_list_max_limit)
+    try:
+        items, next_cursor = await repo.list_statuses(limit, cursor=cursor, status=status_filter)
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+    total = await repo.count_statuses(status_filter)
+    meta = PaginationMeta(
+        total=total,
+        limit=limit,
+        total_pages=-(-total // limit),
+        has_next=next_cursor is not None,
+        has_previous=cursor is not None,
+        next_cursor=next_cursor,
+    )
+    return ApiResponse(success=True, message="Notifications retrieved", data=items, meta=meta)
+
+
+@router.post("/statuses", response_model=ApiResponse, status_code=status.HTTP_200_OK)
+async def get_notification_statuses(
+    request: BulkStatusRequest, repo: StatusRepository = Depends(get_status_repo)
+) -> ApiResponse:
+    request_ids = list(dict.fromkeys(request.request_ids))
+    if len(request_ids) > settings.status_bulk_max_ids:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"At most {settings.status_bulk_max_ids} request ids per call",
+        )
+    statuses = await repo.get_statuses(request_ids)
+    return ApiResponse(success=True, message="Notification statuses retrieved", data=statuses)
+
+
 @router.get("/{request_id}", response_model=ApiResponse, status_code=status.HTTP_200_OK)
 async def get_notification_status(request_id: str, repo: StatusRepository = Depends(get_status_repo)) -> ApiResponse:
     status_payload = await repo.get_status(request_id)
@@ -0,0 +1,86 @@
+import asyncio
+from typing import Awaitable, Callable, Generic, List, Optional, TypeVar
+
+from structlog import get_logger
+
+log = get_logger()
+
+T = TypeVar("T")
+
+
+# Collects items until max_size are buffered or max_wait seconds pass, then hands
+# them to handler. Batches are handled one at a time, in arrival order.
+class MicroBatcher(Generic[T]):
+    def __init__(
+        self,
+        handler: Callable[[List[T]], Awaitable[None]],
+        max_size: int,
+        max_wait: float,
+        max_pending: int = 0,
+    ) -> None:
+        self.handler = handler
+        self.max_size = max_size
+        self.max_wait = max_wait
+        self._queue: asyncio.Queue[T] = asyncio.Queue(maxsize=max_pending)
+        self._task: Optional[asyncio.Task[None]] = None
+        self.dropped = 0
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def add(self, item: T) -> None:
+        await self._queue.put(item)
+
+    def offer(self, item: T) -> bool:
+        # Non-blocking enqueue for bounded batchers; counts the item as dropped when full.
+        try:
+            self._queue.put_nowait(item)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            return False
+        return True
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    async def _collect(self) -> List[T]:
+        batch = [await self._queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.max_wait
+        while len(batch) < self.max_size:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self) -> None:
+        while True:
+            batch = await self._collect()
+            try:
+                await self.handler(batch)
+            except Exception:
+                log.exception("batcher.handler_failed", size=len(batch))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        # Hand over whatever was still buffered rather than dropping it.
+        remaining: List[T] = []
+        while not self._queue.empty():
+            remaining.append(self._queue.get_nowait())
+        if remaining:
+            await self.handler(remaining)
@@ -0,0 +1,116 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Coroutine, Dict, Optional, Set
+
+from aiobreaker import CircuitBreaker, CircuitBreakerListener
+from aiobreaker.state import CircuitBreakerState
+from structlog import get_logger
+
+from app.metrics import record_consumer_pause, record_consumer_resume
+from app.services.circuit_breaker import AsyncCircuitBreaker
+
+log = get_logger()
+
+RUNNING = "running"
+PAUSED = "paused"
+PROBING = "probing"
+
+
+# Stops taking deliveries while a watched breaker is open, so messages wait in the
+# broker instead of each failing fast, writing a status and being re-published as
+# a retry. After the breaker's reset timeout a few deliveries are let through as
+# probes; the first call moves the breaker to half-open. Consumption resumes in
+# full once every watched breaker has closed, or pauses again if a probe fails.
+#
+# An idle queue stays in the probing state until a message arrives to test with.
+class BreakerPause(CircuitBreakerListener):
+    def __init__(
+        self,
+        pause: Callable[[], Awaitable[None]],
+        probe: Callable[[], Awaitable[None]],
+        resume: Callable[[], Awaitable[None]],
+    ) -> None:
+        self.pause = pause
+        self.probe = probe
+        self.resume = resume
+        self.state = RUNNING
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = asyncio.Lock()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: Set[asyncio.Task[None]] = set()
+        self._paused_at = 0.0
+
+    def watch(self, breaker: AsyncCircuitBreaker) -> None:
+        breaker.breaker.add_listener(self)
+        self._breakers[breaker.name or ""] = breaker.breaker
+
+    @property
+    def paused(self) -> bool:
+        return self.state == PAUSED
+
+    def state_change(self, breaker: CircuitBreaker, old: Any, new: Any) -> None:
+        # Listeners run synchronously inside the breaker call; the transitions
+        # await broker round trips, so they run as tasks.
+        state = getattr(new, "state", new)
+        if state == CircuitBreakerState.OPEN:
+            self._spawn(self._on_open(breaker))
+        elif state == CircuitBreakerState.CLOSED:
+            self._spawn(self._on_closed())
+
+    def _spawn(self, transition: Coroutine[Any, Any, None]) -> None:
+        task = asyncio.create_task(self._run(transition))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, transition: Coroutine[Any, Any, None]) -> None:
+        try:
+            async with self._lock:
+                await transition
+        except Exception:
+            log.exception("email.consumer.pause_transition_failed", state=self.state)
+
+    async def _on_open(self, breaker: CircuitBreaker) -> None:
+        if self.state != PAUSED:
+            self.state = PAUSED
+            self._paused_at = time.monotonic()
+            record_consumer_pause(breaker.name)
+            log.warning("email.consumer.paused", breaker=breaker.name)
+            await self.pause()
+        # Another breaker opening while paused pushes the probe back to its timeout.
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = asyncio.get_running_loop().call_later(
+            breaker.timeout_duration.total_seconds(), self._spawn_probe
+        )
+
+    def _spawn_probe(self) -> None:
+        self._timer = None
+        self._spawn(self._on_timeout())
+
+    async def _on_timeout(self) -> None:
+        if self.state != PAUSED:
+            return
+        self.state = PROBING
+        paused_for = time.monotonic() - self._paused_at
+        record_consumer_resume(paused_for)
+        log.info("email.consumer.probing", paused_seconds=round(paused_for, 1))
+        await self.probe()
+
+    async def _on_closed(self) -> None:
+        if self.state != PROBING:
+            return
+        if any(breaker.current_state != CircuitBreakerState.CLOSED for breaker in self._breakers.values()):
+            return
+        self.state = RUNNING
+        log.info("email.consumer.resumed")
+        await self.resume()
+
+    async def stop(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self.state == PAUSED:
+            record_consumer_resume(time.monotonic() - self._paused_at)
+        self.state = RUNNING
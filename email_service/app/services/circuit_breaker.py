@@ -1,7 +1,12 @@
-from typing import Any, Awaitable, Callable, TypeVar
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Type, TypeVar
 
-from aiobreaker import CircuitBreaker
+from aiobreaker import CircuitBreaker, CircuitBreakerError
+from aiobreaker.state import CircuitBreakerState
 
+from app.metrics import BreakerStateListener
+from app.services.rate_limiter import TokenBucket
 from app.settings import get_settings
 
 T = TypeVar("T")
@@ -10,23 +15,137 @@ _settings = get_settings()
 
 
 class AsyncCircuitBreaker:
-    def __init__(self, fail_max: int | None = None, reset_timeout: int | None = None) -> None:
+    def __init__(
+        self,
+        fail_max: int | None = None,
+        reset_timeout: int | None = None,
+        name: str | None = None,
+        exclude: Iterable[Type[Exception]] | None = None,
+        report_state: bool = True,
+    ) -> None:
+        self.name = name
+        # Only named, long-lived breakers export their state; per-domain ones would
+        # give the gauge unbounded label cardinality.
+        listeners = [BreakerStateListener(name)] if name and report_state else []
         self.breaker = CircuitBreaker(
             fail_max or _settings.circuit_breaker_fail_max,
-            reset_timeout or _settings.circuit_breaker_reset_timeout,
+            timedelta(seconds=reset_timeout or _settings.circuit_breaker_reset_timeout),
+            exclude=list(exclude or []),
+            listeners=listeners,
+            name=name,
         )
 
     async def call(self, func: Callable[..., Awaitable[T]], *args: Any, **kwargs: Any) -> T:
         return await self.breaker.call_async(func, *args, **kwargs)
 
+    async def record(self, error: Optional[BaseException]) -> None:
+        # Feeds an outcome observed outside call(), e.g. one message of a batch, into the breaker.
+        async def outcome() -> None:
+            if error is not None:
+                raise error
+
+        try:
+            await self.call(outcome)
+        except Exception:
+            pass
+
+    def open_error(self) -> CircuitBreakerError:
+        message = f"Circuit breaker {self.name} is open" if self.name else "Circuit breaker is open"
+        return CircuitBreakerError(message, self.breaker.opens_at)
+
+    @property
+    def rejects_calls(self) -> bool:
+        # aiobreaker only half-opens inside call(), so is_open stays True past the reset
+        # timeout until something calls through; check the timeout the way it does.
+        if not self.is_open:
+            return False
+        opened_at = self.breaker._state_storage.opened_at
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        return opened_at is None or now < opened_at + self.breaker.timeout_duration
+
     @property
     def is_open(self) -> bool:
-        return self.breaker.current_state == "open"
+        return self.breaker.current_state == CircuitBreakerState.OPEN
 
     @property
     def is_half_open(self) -> bool:
-        return self.breaker.current_state == "half-open"
+        return self.breaker.current_state == CircuitBreakerState.HALF_OPEN
 
     @property
     def is_closed(self) -> bool:
-        return self.breaker.current_state == "closed"
\ No newline at end of file
+        return self.breaker.current_state == CircuitBreakerState.CLOSED
+
+
+class DomainGuard:
+    def __init__(self, domain: str, breaker: AsyncCircuitBreaker, limiter: Optional[TokenBucket]) -> None:
+        self.domain = domain
+        self.breaker = breaker
+        self.limiter = limiter
+        self.last_used = time.monotonic()
+
+    async def acquire(self) -> None:
+        self.last_used = time.monotonic()
+        if self.limiter is not None:
+            await self.limiter.acquire()
+
+    async def call(self, func: Callable[..., Awaitable[T]], *args: Any, **kwargs: Any) -> T:
+        await self.acquire()
+        return await self.breaker.call(func, *args, **kwargs)
+
+
+# Lazily creates a breaker and rate limiter per recipient domain and evicts idle ones.
+class DomainGuardRegistry:
+    def __init__(
+        self,
+        rate_limits: Dict[str, float] | None = None,
+        default_rate: float | None = None,
+        burst: int | None = None,
+        idle_timeout: float | None = None,
+        max_domains: int | None = None,
+        exclude: Iterable[Type[Exception]] | None = None,
+    ) -> None:
+        self.rate_limits = {
+            domain.lower(): rate
+            for domain, rate in (rate_limits if rate_limits is not None else _settings.smtp_domain_rate_limits).items()
+        }
+        self.default_rate = default_rate if default_rate is not None else _settings.smtp_domain_default_rate
+        self.burst = burst or _settings.smtp_domain_rate_burst
+        self.idle_timeout = idle_timeout or _settings.smtp_domain_idle_timeout
+        self.max_domains = max_domains or _settings.smtp_domain_max_tracked
+        self.exclude = list(exclude or [])
+        self._guards: Dict[str, DomainGuard] = {}
+        self._last_sweep = time.monotonic()
+
+    def _create(self, domain: str) -> DomainGuard:
+        rate = self.rate_limits.get(domain, self.default_rate)
+        limiter = TokenBucket(rate=rate, capacity=self.burst) if rate > 0 else None
+        breaker = AsyncCircuitBreaker(name=f"smtp:{domain}", exclude=self.exclude, report_state=False)
+        return DomainGuard(domain, breaker, limiter)
+
+    def _evict(self, now: float, limit: int) -> None:
+        # Drop domains idle past the timeout, then the least recently used ones
+        # until at most `limit` remain.
+        cutoff = now - self.idle_timeout
+        for domain in [domain for domain, guard in self._guards.items() if guard.last_used < cutoff]:
+            del self._guards[domain]
+        if len(self._guards) > limit:
+            by_age = sorted(self._guards.values(), key=lambda guard: guard.last_used)
+            for guard in by_age[: len(self._guards) - limit]:
+                del self._guards[guard.domain]
+        self._last_sweep = now
+
+    def get(self, recipient: str) -> DomainGuard:
+        domain = recipient.rpartition("@")[2].lower()
+        guard = self._guards.get(domain)
+        now = time.monotonic()
+        if guard is None and len(self._guards) >= self.max_domains:
+            self._evict(now, self.max_domains - 1)
+        elif now - self._last_sweep >= self.idle_timeout:
+            self._evict(now, self.max_domains)
+            guard = self._guards.get(domain)
+        if guard is None:
+            guard = self._guards[domain] = self._create(domain)
+        return guard
+
+    def __len__(self) -> int:
+        return len(self._guards)
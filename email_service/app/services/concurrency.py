@@ -0,0 +1,119 @@
+import asyncio
+import math
+from typing import Awaitable, Callable, List, Optional
+
+from structlog import get_logger
+
+from app.metrics import record_concurrency_decision
+from app.services.scheduling import PriorityLimiter
+
+log = get_logger()
+
+
+# AIMD controller for the consumer's in-flight limit. Every interval it looks at
+# the render+send latencies and downstream errors collected since the last tick:
+#   - error rate above the threshold, or p90 latency above `tolerance` times the
+#     baseline: multiply the limit by `decrease_factor`;
+#   - otherwise, if the limit was actually in use, add sqrt(limit) to it, so the
+#     climb from a low limit takes seconds rather than minutes.
+# The baseline is the lowest p50 seen, drifting up slowly so a relay that got
+# permanently slower does not pin the limit at the minimum.
+class AdaptiveConcurrency:
+    def __init__(
+        self,
+        limiter: PriorityLimiter,
+        min_limit: int,
+        max_limit: int,
+        interval: float = 1.0,
+        decrease_factor: float = 0.7,
+        latency_tolerance: float = 2.0,
+        error_threshold: float = 0.1,
+        min_samples: int = 10,
+        baseline_drift: float = 0.01,
+        on_change: Optional[Callable[[int], Awaitable[None]]] = None,
+    ) -> None:
+        self.limiter = limiter
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.interval = interval
+        self.decrease_factor = decrease_factor
+        self.latency_tolerance = latency_tolerance
+        self.error_threshold = error_threshold
+        self.min_samples = min_samples
+        self.baseline_drift = baseline_drift
+        self.on_change = on_change
+        self.baseline: Optional[float] = None
+        self.last_decision = "hold"
+        self._latencies: List[float] = []
+        self._errors = 0
+        self._peak_active = 0
+        self._task: Optional[asyncio.Task[None]] = None
+
+    @property
+    def limit(self) -> int:
+        return self.limiter.limit
+
+    def record(self, latency: float, error: bool = False) -> None:
+        self._latencies.append(latency)
+        if error:
+            self._errors += 1
+        self._peak_active = max(self._peak_active, self.limiter.active)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.tick()
+            except Exception:
+                log.exception("email.concurrency.tick_failed")
+
+    def decide(self) -> int:
+        # Returns the new limit for the samples gathered since the last call.
+        latencies, self._latencies = sorted(self._latencies), []
+        errors, self._errors = self._errors, 0
+        peak_active, self._peak_active = self._peak_active, self.limiter.active
+        limit = self.limit
+        if len(latencies) < self.min_samples:
+            self.last_decision = "hold"
+            return limit
+
+        p50 = latencies[len(latencies) // 2]
+        p90 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.9))]
+        if self.baseline is None or p50 < self.baseline:
+            self.baseline = p50
+        else:
+            self.baseline *= 1 + self.baseline_drift
+
+        if errors / len(latencies) > self.error_threshold or p90 > self.baseline * self.latency_tolerance:
+            self.last_decision = "decrease"
+            limit = max(self.min_limit, math.floor(limit * self.decrease_factor))
+        elif peak_active >= limit:
+            self.last_decision = "increase"
+            limit = min(self.max_limit, limit + max(1, round(math.sqrt(limit))))
+        else:
+            self.last_decision = "hold"
+        return limit
+
+    async def tick(self) -> None:
+        previous = self.limit
+        limit = self.decide()
+        record_concurrency_decision(self.last_decision, limit)
+        if limit == previous:
+            return
+        self.limiter.set_limit(limit)
+        log.info("email.concurrency.limit_changed", previous=previous, limit=limit, decision=self.last_decision)
+        if self.on_change is not None:
+            await self.on_change(limit)
@@ -0,0 +1,117 @@
+import asyncio
+from contextlib import suppress
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from aio_pika import IncomingMessage
+from structlog import get_logger
+
+from app.domain.schemas import NotificationPayload, NotificationType
+
+log = get_logger()
+
+DigestEntry = Tuple[IncomingMessage, NotificationPayload]
+
+
+class PendingDigest:
+    def __init__(self, recipient: str) -> None:
+        self.recipient = recipient
+        self.entries: List[DigestEntry] = []
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+
+# Holds coalescable notifications per recipient for a short window, then hands
+# each recipient's group to `flush` in one call. Messages stay unacked while
+# held and count against channel prefetch, so once `max_held` are held every
+# group is flushed early; otherwise a full channel would stop delivering until
+# the window closed.
+class DigestCoalescer:
+    def __init__(
+        self,
+        flush: Callable[[str, List[DigestEntry]], Awaitable[None]],
+        template_codes: Iterable[str],
+        window: float,
+        max_items: int,
+        max_held: int,
+    ) -> None:
+        self.flush = flush
+        self.template_codes = frozenset(template_codes)
+        self.window = window
+        self.max_items = max_items
+        self.max_held = max_held
+        self.held = 0
+        self._pending: Dict[str, PendingDigest] = {}
+        self._tasks: Set[asyncio.Task[None]] = set()
+
+    def accepts(self, payload: NotificationPayload) -> bool:
+        return payload.template_code in self.template_codes
+
+    def add(self, message: IncomingMessage, payload: NotificationPayload) -> None:
+        recipient = payload.metadata.recipient_email.lower()
+        group = self._pending.get(recipient)
+        if group is None:
+            group = self._pending[recipient] = PendingDigest(recipient)
+            group.timer = asyncio.get_running_loop().call_later(self.window, self._release, recipient)
+        group.entries.append((message, payload))
+        self.held += 1
+        if self.held >= self.max_held:
+            self.release_all()
+        elif len(group.entries) >= self.max_items:
+            self._release(recipient)
+
+    def release_all(self) -> None:
+        for recipient in list(self._pending):
+            self._release(recipient)
+
+    def _release(self, recipient: str) -> None:
+        group = self._pending.pop(recipient, None)
+        if group is None:
+            return
+        if group.timer is not None:
+            group.timer.cancel()
+        self.held -= len(group.entries)
+        task = asyncio.create_task(self._flush(group))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _flush(self, group: PendingDigest) -> None:
+        try:
+            await self.flush(group.recipient, group.entries)
+        except Exception:
+            log.exception("email.digest.flush_failed", size=len(group.entries))
+            # An entry left unsettled would hold its prefetch slot for the life of the
+            # channel; dead-letter it like the per-message path. If the channel is gone,
+            # the broker requeues it anyway.
+            for message, _ in group.entries:
+                if not message.processed:
+                    with suppress(Exception):
+                        await message.reject(requeue=False)
+
+    async def stop(self) -> None:
+        self.release_all()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+
+def build_digest_payload(template_code: str, entries: List[DigestEntry]) -> NotificationPayload:
+    # The digest is addressed like its first notification; each item carries the
+    # variables its own template would have been rendered with.
+    first = entries[0][1]
+    items: List[Dict[str, Any]] = [
+        {
+            "request_id": payload.request_id,
+            "template_code": payload.template_code,
+            "variables": payload.variables_json(),
+        }
+        for _, payload in entries
+    ]
+    digest = NotificationPayload.model_construct(
+        notification_type=NotificationType.email,
+        user_id=first.user_id,
+        template_code=template_code,
+        variables=first.variables,
+        request_id=f"digest:{first.request_id}",
+        priority=max(payload.priority for _, payload in entries),
+        metadata=first.metadata,
+    )
+    digest._raw_variables = {"name": first.variables.name, "items": items, "count": len(items)}
+    return digest
@@ -1,36 +1,220 @@
-import json
-from typing import Any, Dict, Optional
+import asyncio
+import math
+import time
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
 
-from aio_pika import ExchangeType, IncomingMessage, Message, RobustChannel
+import aiosmtplib
+import orjson
+from aio_pika import IncomingMessage, Message, RobustChannel
+from aio_pika.abc import AbstractQueue
+from aiobreaker import CircuitBreakerError
 from structlog import get_logger
 
+from app.domain.decoding import PayloadDecodeError, decode_payload
+from app.domain.envelope import is_packed, unpack_records
 from app.domain.schemas import NotificationPayload, NotificationStatus
-from app.infrastructure.rabbitmq import ensure_core_exchanges, get_channel
+from app.infrastructure.rabbitmq import (
+    ensure_core_exchanges,
+    ensure_dead_letter_queue,
+    ensure_retry_queues,
+    get_channel,
+)
 from app.infrastructure.status_repository import StatusRepository
 from app.infrastructure.template_client import TemplateClient
 from app.logging import bind_context
-from app.services.circuit_breaker import AsyncCircuitBreaker
-from app.services.email_sender import EmailSender
-from app.services.retry import RetryContext, retry_operation
+from app.metrics import (
+    CONSUMER_PREFETCH,
+    IN_FLIGHT,
+    observe_stage,
+    record_envelope,
+    record_message_age,
+    record_outcome,
+)
+from app.services.batching import MicroBatcher
+from app.services.breaker_pause import BreakerPause
+from app.services.circuit_breaker import AsyncCircuitBreaker, DomainGuardRegistry
+from app.services.concurrency import AdaptiveConcurrency
+from app.services.digest import DigestCoalescer, DigestEntry, build_digest_payload
+from app.services.envelope import Envelope, EnvelopeRecord
+from app.services.email_transport import (
+    EmailRejectedError,
+    EmailTransport,
+    EmailTransportError,
+    create_transport,
+)
+from app.services.retry import retry_attempt, should_retry, tier_for_attempt
+from app.services.scheduling import PriorityLimiter
+from app.services.status_publisher import StatusEventPublisher
 from app.settings import get_settings
 
 log = get_logger()
 settings = get_settings()
 
+# Failures that say something about one recipient domain rather than the relay itself.
+RECIPIENT_ERRORS = (
+    aiosmtplib.SMTPRecipientsRefused,
+    aiosmtplib.SMTPRecipientRefused,
+    aiosmtplib.SMTPDataError,
+    EmailRejectedError,
+    CircuitBreakerError,
+)
+# Failures that say something about the relay connection rather than one domain.
+TRANSPORT_ERRORS = (
+    aiosmtplib.SMTPServerDisconnected,
+    aiosmtplib.SMTPConnectError,
+    aiosmtplib.SMTPTimeoutError,
+    EmailTransportError,
+)
+
+
+def amqp_priority(priority: int) -> int:
+    return max(0, min(priority, settings.rabbitmq_max_priority))
+
+
+def delivery_priority(message: IncomingMessage) -> int:
+    # Producers that set the AMQP priority save us a parse; otherwise read the
+    # payload's own priority without running full validation.
+    if message.priority is not None:
+        return message.priority
+    try:
+        priority = orjson.loads(message.body).get("priority", NotificationPayload.model_fields["priority"].default)
+        return amqp_priority(int(priority))
+    except (orjson.JSONDecodeError, ValueError, TypeError, AttributeError):
+        return 0
+
 
 class EmailQueueConsumer:
-    def __init__(self, status_repo: StatusRepository, template_client: TemplateClient) -> None:
+    def __init__(
+        self,
+        status_repo: StatusRepository,
+        template_client: TemplateClient,
+        sender: Optional[EmailTransport] = None,
+        status_publisher: Optional[StatusEventPublisher] = None,
+    ) -> None:
         self.status_repo = status_repo
         self.template_client = template_client
-        self.sender = EmailSender()
-        self.breaker = AsyncCircuitBreaker()
+        self.sender = sender or create_transport()
+        self.status_publisher = status_publisher or StatusEventPublisher()
+        self.template_breaker = AsyncCircuitBreaker(name="template")
+        self.smtp_breaker = AsyncCircuitBreaker(name="smtp", exclude=RECIPIENT_ERRORS)
+        self.domain_guards = DomainGuardRegistry(exclude=TRANSPORT_ERRORS)
         self.channel: RobustChannel | None = None
+        self.channels: List[RobustChannel] = []
+        self.subscriptions: List[Tuple[AbstractQueue, str]] = []
+        self._queue_handlers: List[Tuple[AbstractQueue, Callable[[IncomingMessage], Awaitable[None]]]] = []
+        self.draining = False
         self.retry_exchange = None
+        self.dead_letter_exchange = None
+        self.in_flight = 0
+        self._in_flight_limit = PriorityLimiter(settings.consumer_max_in_flight)
+        self.prefetch = settings.consumer_prefetch
+        # Deliveries prefetched beyond the in-flight limit wait in the priority
+        # limiter, which starts the most urgent first. Without them every delivery
+        # gets a slot straight away and ordering is left to the broker.
+        self.priority_buffer = 0
+        if settings.rabbitmq_max_priority > 0 and not self.batching_enabled:
+            self.priority_buffer = settings.consumer_priority_buffer
+        if self.priority_buffer:
+            self.prefetch = self._prefetch_for(settings.consumer_max_in_flight)
+        self.concurrency: Optional[AdaptiveConcurrency] = None
+        if settings.consumer_adaptive_concurrency and not self.batching_enabled:
+            self.concurrency = AdaptiveConcurrency(
+                self._in_flight_limit,
+                min_limit=settings.consumer_adaptive_min_limit,
+                max_limit=settings.consumer_adaptive_max_limit,
+                interval=settings.consumer_adaptive_interval,
+                decrease_factor=settings.consumer_adaptive_decrease_factor,
+                latency_tolerance=settings.consumer_adaptive_latency_tolerance,
+                error_threshold=settings.consumer_adaptive_error_threshold,
+                on_change=self._apply_limit,
+            )
+            self.prefetch = self._prefetch_for(settings.consumer_max_in_flight)
+        self.batchers: List[MicroBatcher[IncomingMessage]] = []
+        self.digests: Optional[DigestCoalescer] = None
+        if settings.digest_enabled and not self.batching_enabled:
+            # Batch mode acks with multiple=True, which would also ack held messages.
+            self.digests = DigestCoalescer(
+                self._deliver_digest,
+                template_codes=settings.digest_template_codes,
+                window=settings.digest_window_ms / 1000,
+                max_items=settings.digest_max_items,
+                max_held=self.prefetch,
+            )
+        self.breaker_pause: Optional[BreakerPause] = None
+        self._paused_limits: Optional[Tuple[int, int]] = None
+        if settings.consumer_pause_on_open_breaker:
+            self.breaker_pause = BreakerPause(
+                self._pause_consumption, self._probe_consumption, self._resume_consumption
+            )
+            self.breaker_pause.watch(self.template_breaker)
+            self.breaker_pause.watch(self.smtp_breaker)
+
+    @property
+    def batching_enabled(self) -> bool:
+        return settings.consumer_batch_size > 1
 
     async def start(self) -> None:
-        channel = await get_channel()
-        self.channel = channel
+        await self.status_publisher.start()
+        for _ in range(settings.consumer_channels):
+            await self._start_channel()
+        CONSUMER_PREFETCH.set(self.prefetch)
+        if self.concurrency is not None:
+            self.concurrency.start()
+        log.info(
+            "email.consumer.started",
+            channels=settings.consumer_channels,
+            prefetch=self.prefetch,
+            max_in_flight=self._in_flight_limit.limit,
+            adaptive=self.concurrency is not None,
+        )
+
+    async def drain(self, timeout: float) -> bool:
+        # Stops taking deliveries and waits for the ones being processed. Prefetched
+        # deliveries that never reached a handler are requeued when the channel closes.
+        self.draining = True
+        await self._unsubscribe()
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while self.in_flight or any(batcher.pending for batcher in self.batchers):
+            if loop.time() >= deadline:
+                log.warning("email.consumer.drain_timeout", in_flight=self.in_flight)
+                return False
+            await asyncio.sleep(0.05)
+        return True
+
+    async def stop(self) -> None:
+        if self.breaker_pause is not None:
+            await self.breaker_pause.stop()
+        if self.concurrency is not None:
+            await self.concurrency.stop()
+        for batcher in self.batchers:
+            await batcher.stop()
+        if self.digests is not None:
+            await self.digests.stop()
+        await self.status_publisher.stop()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "channels": len(self.channels),
+            "prefetch": self.prefetch,
+            "max_in_flight": self._in_flight_limit.limit,
+            "in_flight": self.in_flight,
+            "waiting": self._in_flight_limit.waiting,
+            "digest_held": self.digests.held if self.digests is not None else 0,
+            "paused": int(self._paused()),
+            **self.status_repo.seen.stats(),
+        }
+
+    async def _start_channel(self) -> None:
+        channel = await get_channel(self.prefetch)
+        self.channels.append(channel)
+        if self.channel is None:
+            self.channel = channel
         await ensure_core_exchanges(channel)
+        await ensure_retry_queues(channel)
+        await ensure_dead_letter_queue(channel)
 
         queue = await channel.declare_queue(
             settings.rabbitmq_email_queue,
@@ -38,81 +222,529 @@ class EmailQueueConsumer:
             arguments={
                 "x-dead-letter-exchange": settings.rabbitmq_dead_letter_exchange,
                 "x-dead-letter-routing-key": "email.dead",
+                "x-max-priority": settings.rabbitmq_max_priority,
             },
         )
 
         notifications_exchange = await channel.get_exchange(settings.notifications_exchange)
         await queue.bind(notifications_exchange, routing_key="email")
 
-        self.retry_exchange = await channel.get_exchange(settings.rabbitmq_retry_exchange)
+        if self.retry_exchange is None:
+            self.retry_exchange = await channel.get_exchange(settings.rabbitmq_retry_exchange)
+
+        if self.batching_enabled:
+            # One batcher per channel: batches are settled in order, which keeps
+            # ack(multiple=True) from touching deliveries outside the batch.
+            batcher: MicroBatcher[IncomingMessage] = MicroBatcher(
+                self._handle_batch,
+                max_size=settings.consumer_batch_size,
+                max_wait=settings.consumer_batch_max_wait_ms / 1000,
+            )
+            batcher.start()
+            self.batchers.append(batcher)
+            self._queue_handlers.append((queue, batcher.add))
+        else:
+            self._queue_handlers.append((queue, self._handle_delivery))
+        await self._subscribe(queue, self._queue_handlers[-1][1])
+
+    async def _subscribe(self, queue: AbstractQueue, handler: Callable[[IncomingMessage], Awaitable[None]]) -> None:
+        consumer_tag = await queue.consume(handler, no_ack=False)
+        self.subscriptions.append((queue, consumer_tag))
 
-        await queue.consume(self._process_message, no_ack=False)
+    async def _unsubscribe(self) -> None:
+        for queue, consumer_tag in self.subscriptions:
+            try:
+                await queue.cancel(consumer_tag)
+            except Exception as exc:
+                log.warning("email.consumer.cancel_failed", queue=queue.name, error=str(exc))
+        self.subscriptions.clear()
+
+    async def _pause_consumption(self) -> None:
+        # Remembers the limits in force before the first pause; a probe that
+        # re-opens the breaker pauses again without overwriting them.
+        if self._paused_limits is None:
+            self._paused_limits = (self._in_flight_limit.limit, self.prefetch)
+        if self.concurrency is not None:
+            await self.concurrency.stop()
+        await self._unsubscribe()
+
+    async def _probe_consumption(self) -> None:
+        if self.draining or self._paused_limits is None:
+            return
+        probes = settings.consumer_probe_concurrency
+        self._in_flight_limit.set_limit(min(probes, self._paused_limits[0]))
+        await self._set_prefetch(self._prefetch_for(probes, buffered=False))
+        for queue, handler in self._queue_handlers:
+            await self._subscribe(queue, handler)
+
+    async def _resume_consumption(self) -> None:
+        if self.draining or self._paused_limits is None:
+            return
+        limit, prefetch = self._paused_limits
+        self._paused_limits = None
+        self._in_flight_limit.set_limit(limit)
+        await self._set_prefetch(prefetch)
+        if self.concurrency is not None:
+            self.concurrency.start()
+
+    def _prefetch_for(self, limit: int, buffered: bool = True) -> int:
+        # Enough unacked deliveries per channel for the whole limit to be usable,
+        # plus the priority buffer.
+        prefetch = max(1, math.ceil(limit / settings.consumer_channels))
+        return prefetch + self.priority_buffer if buffered else prefetch
+
+    async def _apply_limit(self, limit: int) -> None:
+        await self._set_prefetch(self._prefetch_for(limit))
+
+    async def _set_prefetch(self, prefetch: int) -> None:
+        if prefetch == self.prefetch:
+            return
+        for channel in self.channels:
+            if not channel.is_closed:
+                await channel.set_qos(prefetch_count=prefetch)
+        self.prefetch = prefetch
+        CONSUMER_PREFETCH.set(prefetch)
+        if self.digests is not None:
+            # Held messages count against the new prefetch straight away.
+            self.digests.max_held = prefetch
+            if self.digests.held >= prefetch:
+                self.digests.release_all()
+
+    def _observe_downstream(self, started: float, exc: Optional[BaseException] = None) -> None:
+        # Feeds render+send latency to the concurrency controller; recipient-level
+        # rejections say nothing about downstream capacity.
+        if self.concurrency is not None:
+            error = exc is not None and not isinstance(exc, RECIPIENT_ERRORS)
+            self.concurrency.record(time.perf_counter() - started, error)
+
+    def _paused(self) -> bool:
+        return self.breaker_pause is not None and self.breaker_pause.paused
+
+    async def _handle_delivery(self, message: IncomingMessage) -> None:
+        if self._paused():
+            # Prefetched before the pause: hand it back to the broker untouched.
+            await message.nack(requeue=True)
+            return
+        if is_packed(message.content_type, message.content_encoding):
+            await self._handle_envelope(message)
+            return
+        await self._handle_one(message)
+
+    async def _handle_one(self, message: IncomingMessage) -> None:
+        # Prefetch bounds each channel; the limiter bounds the process as a whole and
+        # lets buffered high-priority deliveries jump ahead of bulk ones.
+        async with self._in_flight_limit.slot(delivery_priority(message)):
+            if self._paused() and not isinstance(message, EnvelopeRecord):
+                # Waited for a slot while the breaker opened.
+                await message.nack(requeue=True)
+                return
+            self._track_in_flight(1)
+            try:
+                await self._process_message(message)
+            finally:
+                self._track_in_flight(-1)
+
+    async def _handle_envelope(self, message: IncomingMessage) -> None:
+        # Each record takes its own in-flight slot and settles on its own.
+        envelope = await self._open_envelope(message)
+        if envelope is not None:
+            await asyncio.gather(
+                *(self._handle_one(record) for record in envelope.records),
+                return_exceptions=True,
+            )
+
+    async def _open_envelope(self, message: IncomingMessage) -> Optional[Envelope]:
+        try:
+            with observe_stage("decode"):
+                bodies = unpack_records(message.body, message.content_type, message.content_encoding)
+        except PayloadDecodeError as exc:
+            log.error("email.consumer.invalid_envelope", error=str(exc))
+            record_outcome("invalid")
+            await message.reject(requeue=False)
+            return None
+        record_envelope(message.content_encoding, len(bodies))
+        return Envelope(message, bodies, self._dead_letter_record)
+
+    async def _expand_envelopes(self, messages: List[IncomingMessage]) -> List[IncomingMessage]:
+        expanded: List[IncomingMessage] = []
+        for message in messages:
+            if not is_packed(message.content_type, message.content_encoding):
+                expanded.append(message)
+                continue
+            envelope = await self._open_envelope(message)
+            if envelope is not None:
+                expanded.extend(envelope.records)
+        return expanded
+
+    async def _dead_letter_record(self, record: EnvelopeRecord) -> None:
+        # The broker cannot dead-letter part of a delivery, so a record that is out
+        # of attempts is published to the DLX the way the queue would have routed it.
+        exchange = self.dead_letter_exchange
+        if exchange is None or getattr(exchange, "is_closed", False):
+            if self.channel is None or self.channel.is_closed:
+                self.channel = await get_channel()
+            exchange = await self.channel.get_exchange(settings.rabbitmq_dead_letter_exchange)
+            self.dead_letter_exchange = exchange
+        await exchange.publish(
+            Message(
+                body=record.body,
+                headers=record.headers,
+                content_type=record.content_type,
+                delivery_mode=record.delivery_mode,
+                timestamp=datetime.now(timezone.utc),
+            ),
+            routing_key="email.dead",
+        )
+
+    async def _handle_batch(self, messages: List[IncomingMessage]) -> None:
+        if self._paused():
+            for message in messages:
+                await message.nack(requeue=True)
+            return
+        self._track_in_flight(len(messages))
+        try:
+            await self._process_batch(messages)
+        finally:
+            self._track_in_flight(-len(messages))
+
+    def _track_in_flight(self, delta: int) -> None:
+        self.in_flight += delta
+        IN_FLIGHT.inc(delta)
+
+    async def _process_batch(self, messages: List[IncomingMessage]) -> None:
+        messages = await self._expand_envelopes(messages)
+        completed: List[IncomingMessage] = []
+        settled: Set[IncomingMessage] = set()
+        try:
+            await self._run_batch(messages, completed, settled)
+        except Exception:
+            # Left unsettled, these would be acked by the next batch's ack(multiple=True)
+            # without ever being sent or given a status. As in the per-message path,
+            # whatever was not finished goes to the dead-letter queue.
+            for message in messages:
+                if message in settled:
+                    continue
+                if message in completed:
+                    await message.ack()
+                else:
+                    await message.reject(requeue=False)
+            raise
+
+    async def _run_batch(
+        self,
+        messages: List[IncomingMessage],
+        completed: List[IncomingMessage],
+        settled: Set[IncomingMessage],
+    ) -> None:
+        rejected: List[IncomingMessage] = []
+        failed: List[Tuple[IncomingMessage, NotificationPayload, Exception]] = []
+        accepted: List[Tuple[IncomingMessage, NotificationPayload]] = []
+
+        # Stage histograms observe whole-batch durations in this mode.
+        with observe_stage("decode"):
+            for message in messages:
+                record_message_age(message.timestamp)
+                headers = message.headers or {}
+                try:
+                    payload = decode_payload(message.body)
+                except PayloadDecodeError as exc:
+                    log.error("email.consumer.invalid_payload", error=str(exc))
+                    record_outcome("invalid")
+                    rejected.append(message)
+                    continue
+                request_id_header = headers.get("x-request-id")
+                if request_id_header and request_id_header != payload.request_id:
+                    log.warning("email.consumer.request_id_mismatch", request_id=payload.request_id)
+                    record_outcome("request_id_mismatch")
+                    completed.append(message)
+                    continue
+                accepted.append((message, payload))
+
+        log.info("email.consumer.batch_received", size=len(messages), accepted=len(accepted))
+
+        duplicates: List[bool] = []
+        if accepted:
+            with observe_stage("idempotency"):
+                duplicates = await self.status_repo.ensure_idempotent_many(
+                    [payload.request_id for _, payload in accepted]
+                )
+        fresh: List[Tuple[IncomingMessage, NotificationPayload]] = []
+        for (message, payload), is_duplicate in zip(accepted, duplicates):
+            if is_duplicate:
+                log.info("email.consumer.duplicate_skipped", request_id=payload.request_id)
+                record_outcome("duplicate")
+                completed.append(message)
+            else:
+                fresh.append((message, payload))
+
+        with observe_stage("render"):
+            rendered_results = await asyncio.gather(
+                *(
+                    self.template_breaker.call(
+                        self.template_client.render,
+                        payload,
+                        correlation_id=(message.headers or {}).get("x-correlation-id"),
+                    )
+                    for message, payload in fresh
+                ),
+                return_exceptions=True,
+            )
+
+        outgoing: List[Tuple[IncomingMessage, NotificationPayload]] = []
+        emails = []
+        email_metadata: List[Dict[str, Any]] = []
+        probing: Set[str] = set()
+        for (message, payload), rendered in zip(fresh, rendered_results):
+            if isinstance(rendered, Exception):
+                failed.append((message, payload, rendered))
+                continue
+            guard = self.domain_guards.get(payload.metadata.recipient_email)
+            if guard.breaker.is_open:
+                # Past the reset timeout, one message per batch goes out as the probe;
+                # recording its outcome half-opens the breaker and closes or reopens it.
+                if guard.breaker.rejects_calls or guard.domain in probing:
+                    failed.append((message, payload, guard.breaker.open_error()))
+                    continue
+                probing.add(guard.domain)
+            await guard.acquire()
+            subject = rendered.get("subject") or (payload.metadata.extra or {}).get("subject", "")
+            emails.append(self.sender.build_message(payload.metadata.recipient_email, subject, rendered.get("body")))
+            email_metadata.append(payload.metadata_json())
+            outgoing.append((message, payload))
+
+        delivered: List[Tuple[IncomingMessage, NotificationPayload]] = []
+        if emails:
+            batch_failed = False
+            try:
+                with observe_stage("send"):
+                    send_results = await self.smtp_breaker.call(self._send_batch, emails, email_metadata)
+            except Exception as exc:
+                batch_failed = True
+                send_results = [exc] * len(emails)
+            for (message, payload), error in zip(outgoing, send_results):
+                # A relay outage or an open SMTP breaker says nothing about the domains.
+                if not batch_failed:
+                    guard = self.domain_guards.get(payload.metadata.recipient_email)
+                    await guard.breaker.record(error)
+                if error is None:
+                    delivered.append((message, payload))
+                else:
+                    failed.append((message, payload, error))
+
+        status_updates = [(payload.request_id, NotificationStatus.delivered, None) for _, payload in delivered]
+        status_updates += [(payload.request_id, NotificationStatus.failed, exc) for _, payload, exc in failed]
+        if status_updates:
+            with observe_stage("status_write"):
+                await self.status_repo.set_statuses(status_updates)
+
+        # Reject individually first, so the cumulative ack below only covers settled messages.
+        for message in rejected:
+            await message.reject(requeue=False)
+            settled.add(message)
+        for message, payload, exc in failed:
+            log.error("email.consumer.failed", request_id=payload.request_id, error=str(exc))
+            record_outcome("failed")
+            if await self._schedule_retry(message, message.headers or {}, exc, payload.priority):
+                completed.append(message)
+            else:
+                record_outcome("dead_lettered")
+                await message.reject(requeue=False)
+                settled.add(message)
+
+        for message, payload in delivered:
+            log.info("email.consumer.delivered", request_id=payload.request_id)
+            record_outcome("delivered")
+            completed.append(message)
+            correlation_id = (message.headers or {}).get("x-correlation-id")
+            self._publish_status_event(payload.request_id, "delivered", correlation_id)
+
+        # Envelope records settle their envelope first, so the cumulative ack can
+        # never reach past an envelope that is still being processed.
+        deliveries: List[IncomingMessage] = []
+        for message in completed:
+            if isinstance(message, EnvelopeRecord):
+                await message.ack()
+                settled.add(message)
+            else:
+                deliveries.append(message)
+        if deliveries:
+            last = max(deliveries, key=lambda message: message.delivery_tag or 0)
+            await last.ack(multiple=True)
 
     async def _process_message(self, message: IncomingMessage) -> None:
         headers = message.headers or {}
         correlation_id = headers.get("x-correlation-id")
         request_id_header = headers.get("x-request-id")
 
-        async with message.process(ignore_processed=True, requeue=False):
-            payload = NotificationPayload.model_validate_json(message.body)
-            bind_context(
-                request_id=payload.request_id,
-                correlation_id=correlation_id or payload.metadata.correlation_id,
-                user_id=str(payload.user_id),
-            )
-            log.info("email.consumer.received")
+        record_message_age(message.timestamp)
+
+        try:
+            with observe_stage("decode"):
+                payload = decode_payload(message.body)
+        except PayloadDecodeError:
+            record_outcome("invalid")
+            await message.reject(requeue=False)
+            raise
+        bind_context(
+            request_id=payload.request_id,
+            correlation_id=correlation_id or payload.metadata.correlation_id,
+            user_id=str(payload.user_id),
+        )
+        log.info("email.consumer.received")
 
+        if (
+            self.digests is not None
+            and self.digests.accepts(payload)
+            and (not request_id_header or request_id_header == payload.request_id)
+        ):
+            # Settled by _deliver_digest when the recipient's window closes.
+            self.digests.add(message, payload)
+            return
+
+        async with message.process(ignore_processed=True, requeue=False):
             if request_id_header and request_id_header != payload.request_id:
                 log.warning("email.consumer.request_id_mismatch")
+                record_outcome("request_id_mismatch")
                 return
 
-            is_duplicate = await self.status_repo.ensure_idempotent(payload.request_id)
+            with observe_stage("idempotency"):
+                is_duplicate = await self.status_repo.ensure_idempotent(payload.request_id)
             if is_duplicate:
                 log.info("email.consumer.duplicate_skipped")
+                record_outcome("duplicate")
                 return
 
-            retry_context = RetryContext(redis=self.status_repo.redis, request_id=payload.request_id)
-
+            downstream_started = time.perf_counter()
             try:
-                async with retry_operation(retry_context):
-                    rendered = await self.breaker.call(
+                with observe_stage("render"):
+                    rendered = await self.template_breaker.call(
                         self.template_client.render,
                         payload,
                         correlation_id=correlation_id,
                     )
 
-                    recipient = payload.metadata.recipient_email
-                    subject = rendered.get("subject") or (payload.metadata.extra or {}).get("subject", "")
-                    body = rendered.get("body")
+                recipient = payload.metadata.recipient_email
+                subject = rendered.get("subject") or (payload.metadata.extra or {}).get("subject", "")
+                body = rendered.get("body")
 
-                    await self.breaker.call(
+                guard = self.domain_guards.get(recipient)
+                with observe_stage("send"):
+                    await self.smtp_breaker.call(
+                        guard.call,
                         self.sender.send,
                         recipient=recipient,
                         subject=subject,
                         body=body,
-                        metadata=payload.metadata.model_dump(mode="json"),
+                        metadata=payload.metadata_json(),
                     )
             except Exception as exc:
+                self._observe_downstream(downstream_started, exc)
                 log.exception("email.consumer.failed", error=str(exc))
-                await self.status_repo.set_status(
-                    payload.request_id,
-                    NotificationStatus.failed,
-                    error=str(exc),
-                )
-                await self._schedule_retry(message, headers, exc)
-                raise
+                record_outcome("failed")
+                with observe_stage("status_write"):
+                    await self.status_repo.set_status(
+                        payload.request_id,
+                        NotificationStatus.failed,
+                        error=exc,
+                    )
+                if not await self._schedule_retry(message, headers, exc, payload.priority):
+                    # Out of attempts: reject so the queue dead-letters it to email.dead.
+                    record_outcome("dead_lettered")
+                    raise
             else:
-                await self.status_repo.set_status(payload.request_id, NotificationStatus.delivered)
+                self._observe_downstream(downstream_started)
+                with observe_stage("status_write"):
+                    await self.status_repo.set_status(payload.request_id, NotificationStatus.delivered)
                 log.info("email.consumer.delivered")
-                await self._publish_status_event(message, payload.request_id, "delivered", correlation_id)
+                record_outcome("delivered")
+                self._publish_status_event(payload.request_id, "delivered", correlation_id)
+
+    async def _send_batch(self, emails: List[Any], metadata: List[Dict[str, Any]]) -> List[Optional[Exception]]:
+        # send_many reports failures per message and never raises, so the SMTP
+        # breaker would only ever see successes. A batch in which every message
+        # failed at the transport level is raised as one relay failure instead.
+        results = await self.sender.send_many(emails, metadata)
+        if results and all(isinstance(error, TRANSPORT_ERRORS) for error in results):
+            raise results[0]
+        return results
+
+    async def _deliver_digest(self, recipient: str, entries: List[DigestEntry]) -> None:
+        with observe_stage("idempotency"):
+            duplicates = await self.status_repo.ensure_idempotent_many([payload.request_id for _, payload in entries])
+        fresh: List[DigestEntry] = []
+        for (message, payload), is_duplicate in zip(entries, duplicates):
+            if is_duplicate:
+                log.info("email.consumer.duplicate_skipped", request_id=payload.request_id)
+                record_outcome("duplicate")
+                await message.ack()
+            else:
+                fresh.append((message, payload))
+        if not fresh:
+            return
+
+        # A lone notification goes out as itself rather than as a digest of one.
+        payload = fresh[0][1] if len(fresh) == 1 else build_digest_payload(settings.digest_template_code, fresh)
+        correlation_id = (fresh[0][0].headers or {}).get("x-correlation-id")
+        request_ids = [item.request_id for _, item in fresh]
+        downstream_started = time.perf_counter()
+        try:
+            with observe_stage("render"):
+                rendered = await self.template_breaker.call(
+                    self.template_client.render,
+                    payload,
+                    correlation_id=correlation_id,
+                )
+            subject = rendered.get("subject") or (payload.metadata.extra or {}).get("subject", "")
+            guard = self.domain_guards.get(recipient)
+            with observe_stage("send"):
+                await self.smtp_breaker.call(
+                    guard.call,
+                    self.sender.send,
+                    recipient=payload.metadata.recipient_email,
+                    subject=subject,
+                    body=rendered.get("body"),
+                    metadata=payload.metadata_json(),
+                )
+        except Exception as exc:
+            self._observe_downstream(downstream_started, exc)
+            log.error("email.digest.failed", request_ids=request_ids, error=str(exc))
+            with observe_stage("status_write"):
+                await self.status_repo.set_statuses(
+                    [(request_id, NotificationStatus.failed, exc) for request_id in request_ids]
+                )
+            for message, item in fresh:
+                record_outcome("failed")
+                if await self._schedule_retry(message, message.headers or {}, exc, item.priority):
+                    await message.ack()
+                else:
+                    record_outcome("dead_lettered")
+                    await message.reject(requeue=False)
+            return
+
+        self._observe_downstream(downstream_started)
+        with observe_stage("status_write"):
+            await self.status_repo.set_statuses(
+                [(request_id, NotificationStatus.delivered, None) for request_id in request_ids]
+            )
+        for message, item in fresh:
+            await message.ack()
+            record_outcome("delivered")
+            self._publish_status_event(item.request_id, "delivered", (message.headers or {}).get("x-correlation-id"))
+        log.info("email.digest.delivered", request_ids=request_ids, size=len(fresh))
 
     async def _schedule_retry(
         self,
         message: IncomingMessage,
         headers: Dict[str, Any],
         exc: Exception,
-    ) -> None:
-        attempt = int(headers.get("x-retry-attempt", 0)) + 1
+        priority: Optional[int] = None,
+    ) -> bool:
+        attempt = retry_attempt(headers) + 1
+        if not should_retry(attempt):
+            log.warning("email.consumer.retries_exhausted", attempts=attempt - 1)
+            return False
+
+        tier = tier_for_attempt(attempt)
         new_headers = {
             **headers,
             "x-retry-attempt": attempt,
@@ -129,33 +761,20 @@ class EmailQueueConsumer:
             body=message.body,
             headers=new_headers,
             content_type="application/json",
+            delivery_mode=message.delivery_mode,
+            priority=amqp_priority(priority) if priority is not None else message.priority,
         )
 
-        await retry_exchange.publish(
-            retry_message,
-            routing_key=settings.rabbitmq_email_queue,
-        )
+        with observe_stage("retry_publish"):
+            await retry_exchange.publish(retry_message, routing_key=tier.routing_key)
+        log.info("email.consumer.retry_scheduled", attempt=attempt, delay_ms=tier.delay_ms)
+        return True
 
-    async def _publish_status_event(
+    def _publish_status_event(
         self,
-        message: IncomingMessage,
         request_id: str,
         status_value: str,
         correlation_id: Optional[str],
     ) -> None:
-        status_exchange_name = getattr(settings, "status_exchange", None)
-        if not status_exchange_name:
-            return
-
-        channel = message.channel
-        status_exchange = await channel.declare_exchange(status_exchange_name, ExchangeType.DIRECT, durable=True)
-        payload = json.dumps({"request_id": request_id, "status": status_value}).encode()
-
-        await status_exchange.publish(
-            Message(
-                body=payload,
-                headers={"x-correlation-id": correlation_id or request_id},
-                content_type="application/json",
-            ),
-            routing_key="email.status",
-        )
\ No newline at end of file
+        # Buffered and flushed in confirmed batches by the publisher's own channel.
+        self.status_publisher.publish(request_id, status_value, correlation_id)
@@ -1,33 +1,72 @@
 from email.message import EmailMessage
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional
 
 import aiosmtplib
 
+from app.infrastructure.smtp_pool import TRANSACTION_ERRORS, SMTPConnectionPool
+from app.services.email_transport import EmailTransport
 from app.settings import get_settings
 
 _settings = get_settings()
 
 
-class EmailSender:
-    def __init__(self) -> None:
+# SMTP backend: one transaction per message over pooled, authenticated sessions.
+class EmailSender(EmailTransport):
+    def __init__(self, pool: Optional[SMTPConnectionPool] = None) -> None:
         self.smtp_host = _settings.smtp_host
         self.smtp_port = _settings.smtp_port
         self.username = _settings.smtp_username
         self.password = _settings.smtp_password
         self.use_tls = _settings.smtp_use_tls
+        self.pool = pool or SMTPConnectionPool()
 
     async def send(self, recipient: str, subject: str, body: str, metadata: Dict[str, Any]) -> None:
-        message = EmailMessage()
-        message["From"] = self.username
-        message["To"] = recipient
-        message["Subject"] = subject
-        message.set_content(body)
-
-        await aiosmtplib.send(
-            message,
-            hostname=self.smtp_host,
-            port=self.smtp_port,
-            username=self.username,
-            password=self.password,
-            start_tls=self.use_tls,
-        )
\ No newline at end of file
+        message = self.build_message(recipient, subject, body)
+
+        try:
+            async with self.pool.acquire() as connection:
+                await connection.client.send_message(message)
+                connection.mark_used()
+        except aiosmtplib.SMTPServerDisconnected:
+            # A pooled session can be dropped by the server between health checks;
+            # the pool has already discarded it, so retry once on a fresh one.
+            async with self.pool.acquire() as connection:
+                await connection.client.send_message(message)
+                connection.mark_used()
+
+    async def send_many(
+        self, messages: List[EmailMessage], metadata: Optional[List[Dict[str, Any]]] = None
+    ) -> List[Optional[Exception]]:
+        # Sends over as few pooled sessions as possible; returns one error slot per
+        # message. SMTP has nowhere to put the metadata, as in send().
+        results: List[Optional[Exception]] = [None] * len(messages)
+        index = 0
+        while index < len(messages):
+            connected = False
+            try:
+                async with self.pool.acquire() as connection:
+                    connected = True
+                    while index < len(messages):
+                        try:
+                            await connection.client.send_message(messages[index])
+                            connection.mark_used()
+                        except TRANSACTION_ERRORS as exc:
+                            results[index] = exc
+                            await connection.client.rset()
+                        index += 1
+                        if connection.is_expired(self.pool.max_messages, self.pool.max_age):
+                            break
+            except aiosmtplib.SMTPException as exc:
+                if not connected:
+                    # No session could be opened; trying again per message would cost a
+                    # full connect timeout each, so the rest of the batch fails with it.
+                    results[index:] = [exc] * (len(messages) - index)
+                    break
+                # The session broke mid-batch: fail the message in hand and continue on a new one.
+                if index < len(messages):
+                    results[index] = exc
+                    index += 1
+        return results
+
+    async def close(self) -> None:
+        await self.pool.close()
@@ -0,0 +1,57 @@
+from abc import ABC, abstractmethod
+from email.message import EmailMessage
+from typing import Any, Dict, List, Optional
+
+from app.settings import get_settings
+
+_settings = get_settings()
+
+
+class EmailDeliveryError(Exception):
+    pass
+
+
+# The provider refused this recipient or message; says nothing about the transport's health.
+class EmailRejectedError(EmailDeliveryError):
+    pass
+
+
+# The provider could not be reached or failed the whole request.
+class EmailTransportError(EmailDeliveryError):
+    pass
+
+
+class EmailTransport(ABC):
+    def build_message(self, recipient: str, subject: str, body: str) -> EmailMessage:
+        message = EmailMessage()
+        message["From"] = _settings.email_from or _settings.smtp_username
+        message["To"] = recipient
+        message["Subject"] = subject
+        message.set_content(body)
+        return message
+
+    async def send(self, recipient: str, subject: str, body: str, metadata: Dict[str, Any]) -> None:
+        error = (await self.send_many([self.build_message(recipient, subject, body)], [metadata]))[0]
+        if error is not None:
+            raise error
+
+    @abstractmethod
+    async def send_many(
+        self, messages: List[EmailMessage], metadata: Optional[List[Dict[str, Any]]] = None
+    ) -> List[Optional[Exception]]:
+        # `metadata`, if given, lines up with `messages`. Returns one error slot
+        # per message, None for each one accepted.
+        ...
+
+    async def close(self) -> None:
+        return None
+
+
+def create_transport() -> EmailTransport:
+    if _settings.email_transport == "http":
+        from app.services.http_transport import HTTPBulkTransport
+
+        return HTTPBulkTransport()
+    from app.services.email_sender import EmailSender
+
+    return EmailSender()
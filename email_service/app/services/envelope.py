@@ -0,0 +1,86 @@
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+from aio_pika import IncomingMessage
+from structlog import get_logger
+
+log = get_logger()
+
+
+# Holds the broker delivery of an envelope until every record in it has settled.
+# The delivery is acked once all records are acked, retried or dead-lettered on
+# their own; if a record could not be dead-lettered it is nacked instead, and on
+# redelivery idempotency claims skip the records that already went out.
+class Envelope:
+    def __init__(
+        self,
+        message: IncomingMessage,
+        bodies: List[bytes],
+        dead_letter: Callable[["EnvelopeRecord"], Awaitable[None]],
+    ) -> None:
+        self.message = message
+        self.dead_letter = dead_letter
+        self.pending = len(bodies)
+        self.failed = False
+        self.records = [EnvelopeRecord(self, body) for body in bodies]
+
+    async def settle(self, failed: bool = False) -> None:
+        self.failed = self.failed or failed
+        self.pending -= 1
+        if self.pending:
+            return
+        if self.failed:
+            await self.message.nack(requeue=True)
+        else:
+            await self.message.ack()
+
+
+# One record of an envelope, shaped like the IncomingMessage the pipeline expects.
+# Retries publish its body as a standalone message; headers are the envelope's
+# minus x-request-id, which names the envelope rather than any one record.
+class EnvelopeRecord:
+    def __init__(self, envelope: Envelope, body: bytes) -> None:
+        message = envelope.message
+        self.envelope = envelope
+        self.body = body
+        self.headers: Dict[str, Any] = {
+            key: value for key, value in (message.headers or {}).items() if key != "x-request-id"
+        }
+        self.content_type = "application/json"
+        self.content_encoding: Optional[str] = None
+        self.timestamp = message.timestamp
+        self.delivery_mode = message.delivery_mode
+        # Unknown until parsed, like a producer that did not set an AMQP priority.
+        self.priority: Optional[int] = None
+        self.delivery_tag: Optional[int] = None
+        self.processed = False
+
+    async def ack(self, multiple: bool = False) -> None:
+        if self.processed:
+            return
+        self.processed = True
+        await self.envelope.settle()
+
+    async def reject(self, requeue: bool = False) -> None:
+        if self.processed:
+            return
+        self.processed = True
+        # Requeueing one record would redeliver the whole envelope, so both ways
+        # the record leaves through the dead-letter exchange.
+        try:
+            await self.envelope.dead_letter(self)
+        except Exception as exc:
+            log.error("email.consumer.envelope_dead_letter_failed", error=str(exc))
+            await self.envelope.settle(failed=True)
+            return
+        await self.envelope.settle()
+
+    @asynccontextmanager
+    async def process(self, ignore_processed: bool = False, requeue: bool = False) -> AsyncIterator[None]:
+        try:
+            yield
+        except BaseException:
+            await self.reject(requeue=requeue)
+            raise
+        else:
+            await self.ack()
@@ -0,0 +1,108 @@
+import asyncio
+from collections import deque
+from typing import Awaitable, Callable, Deque, List, Optional, TypeVar
+
+from app.metrics import record_hedge
+
+T = TypeVar("T")
+
+
+# Rolling window of recent call latencies. Percentiles are recomputed from a
+# sorted copy at most every `refresh_every` samples, so lookups stay O(1).
+#
+# Timed-out calls are counted, not sampled: their real latency is unknown, and
+# sampling them at the timeout would ratchet the timeout up by itself. Once more
+# than 1 - q of recent calls timed out, the q-th percentile lies somewhere past
+# the timeout and is reported as unknown.
+class LatencyTracker:
+    def __init__(self, window: int, min_samples: int, refresh_every: int = 20) -> None:
+        self.min_samples = min_samples
+        self.refresh_every = refresh_every
+        self._samples: Deque[float] = deque(maxlen=window)
+        self._sorted: List[float] = []
+        self._since_refresh = 0
+        self._timed_out: Deque[bool] = deque(maxlen=window)
+        self.timeouts = 0
+
+    def observe(self, seconds: float) -> None:
+        self._samples.append(seconds)
+        self._since_refresh += 1
+        self._record(False)
+
+    def observe_timeout(self) -> None:
+        self._record(True)
+
+    def _record(self, timed_out: bool) -> None:
+        if len(self._timed_out) == self._timed_out.maxlen and self._timed_out[0]:
+            self.timeouts -= 1
+        self._timed_out.append(timed_out)
+        self.timeouts += timed_out
+
+    def percentile(self, quantile: float) -> Optional[float]:
+        # None until enough samples exist to trust the estimate.
+        if len(self._samples) < self.min_samples:
+            return None
+        if self.timeouts > (1 - quantile) * len(self._timed_out):
+            return None
+        if self._since_refresh >= self.refresh_every or not self._sorted:
+            self._sorted = sorted(self._samples)
+            self._since_refresh = 0
+        index = min(len(self._sorted) - 1, int(quantile * len(self._sorted)))
+        return self._sorted[index]
+
+
+# Allows hedges for at most `ratio` of calls: every call earns `ratio` tokens and a
+# hedge spends one, so a latency spike cannot double the load on the backend.
+class HedgeBudget:
+    def __init__(self, ratio: float, max_tokens: float = 10.0) -> None:
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self.tokens = 0.0
+
+    def earn(self) -> None:
+        self.tokens = min(self.max_tokens, self.tokens + self.ratio)
+
+    def try_spend(self) -> bool:
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+
+async def hedged(
+    call: Callable[[], Awaitable[T]],
+    delay: Optional[float],
+    budget: HedgeBudget,
+) -> T:
+    # Starts `call`; if it has not finished after `delay` seconds and the budget
+    # allows, starts a second one and returns whichever succeeds first.
+    budget.earn()
+    primary = asyncio.ensure_future(call())
+    tasks = [primary]
+    try:
+        if delay is None:
+            return await primary
+        done, _ = await asyncio.wait({primary}, timeout=delay)
+        if done:
+            return primary.result()
+        if not budget.try_spend():
+            record_hedge("budget_exhausted")
+            return await primary
+
+        record_hedge("sent")
+        backup = asyncio.ensure_future(call())
+        tasks.append(backup)
+        pending = {primary, backup}
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            winner = next((task for task in done if not task.cancelled() and task.exception() is None), None)
+            if winner is not None:
+                if winner is backup:
+                    record_hedge("won")
+                return winner.result()
+        # Both failed: surface the primary's error.
+        return primary.result()
+    finally:
+        # Also runs when the caller is cancelled mid-wait, so no call outlives it.
+        for task in tasks:
+            task.cancel()
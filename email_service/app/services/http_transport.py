@@ -0,0 +1,148 @@
+import asyncio
+from email.message import EmailMessage
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import aiohttp
+import orjson
+from structlog import get_logger
+
+from app.services.batching import MicroBatcher
+from app.services.email_transport import EmailRejectedError, EmailTransport, EmailTransportError
+from app.settings import get_settings
+
+log = get_logger()
+_settings = get_settings()
+
+PendingSend = Tuple[Dict[str, Any], "asyncio.Future[None]"]
+
+
+# Sends through a provider's bulk-send HTTP API: many messages per request over
+# a keep-alive connection pool. Concurrent send() calls are coalesced into one
+# request by a MicroBatcher, so per-message consumers benefit as well.
+#
+# Request:  POST <url> {"messages": [{"from", "to", "subject", "text", "metadata"}, ...]}
+# Response: {"results": [{"status": "accepted" | "rejected", "error": "..."}, ...]}, in order.
+class HTTPBulkTransport(EmailTransport):
+    def __init__(
+        self,
+        url: Optional[str] = None,
+        token: Optional[str] = None,
+        session: Optional[aiohttp.ClientSession] = None,
+        batch_size: Optional[int] = None,
+        linger_ms: Optional[int] = None,
+    ) -> None:
+        self.url = url or _settings.email_http_api_url
+        self.token = token if token is not None else _settings.email_http_api_token
+        self.batch_size = batch_size or _settings.email_http_batch_size
+        self.session = session
+        self._owns_session = session is None
+        self.batcher: MicroBatcher[PendingSend] = MicroBatcher(
+            self._send_pending,
+            max_size=self.batch_size,
+            max_wait=(linger_ms if linger_ms is not None else _settings.email_http_linger_ms) / 1000,
+        )
+        # Batches are posted concurrently up to the pool size; the batcher waits
+        # for a free slot, which pushes back on send() callers.
+        self._slots = asyncio.Semaphore(_settings.email_http_pool_limit)
+        self._posts: Set[asyncio.Task[None]] = set()
+        self.requests = 0
+
+    def _session(self) -> aiohttp.ClientSession:
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=_settings.email_http_pool_limit,
+                keepalive_timeout=_settings.template_http_keepalive_timeout,
+            )
+            self.session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=_settings.email_http_timeout),
+            )
+        return self.session
+
+    def _item(self, message: EmailMessage, metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        return {
+            "from": message["From"],
+            "to": message["To"],
+            "subject": message["Subject"],
+            "text": message.get_content(),
+            "metadata": metadata or {},
+        }
+
+    async def send(self, recipient: str, subject: str, body: str, metadata: Dict[str, Any]) -> None:
+        self.batcher.start()
+        future: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        await self.batcher.add((self._item(self.build_message(recipient, subject, body), metadata), future))
+        await future
+
+    async def send_many(
+        self, messages: List[EmailMessage], metadata: Optional[List[Dict[str, Any]]] = None
+    ) -> List[Optional[Exception]]:
+        metadata = metadata or [{}] * len(messages)
+        items = [self._item(message, item_metadata) for message, item_metadata in zip(messages, metadata)]
+        chunks = [items[start : start + self.batch_size] for start in range(0, len(items), self.batch_size)]
+        results: List[Optional[Exception]] = []
+        for chunk_results in await asyncio.gather(*(self._post(chunk) for chunk in chunks)):
+            results.extend(chunk_results)
+        return results
+
+    async def _send_pending(self, pending: List[PendingSend]) -> None:
+        await self._slots.acquire()
+        task = asyncio.create_task(self._post_pending(pending))
+        self._posts.add(task)
+        task.add_done_callback(self._posts.discard)
+
+    async def _post_pending(self, pending: List[PendingSend]) -> None:
+        results: List[Optional[Exception]] = []
+        try:
+            results = await self._post([item for item, _ in pending])
+        finally:
+            self._slots.release()
+            # Every send() caller gets an answer, even if the post raised or was cancelled.
+            for index, (_, future) in enumerate(pending):
+                if future.done():
+                    continue
+                error = results[index] if index < len(results) else EmailTransportError("Bulk send did not complete")
+                if error is None:
+                    future.set_result(None)
+                else:
+                    future.set_exception(error)
+
+    async def _post(self, items: List[Dict[str, Any]]) -> List[Optional[Exception]]:
+        self.requests += 1
+        try:
+            async with self._session().post(
+                self.url,
+                data=orjson.dumps({"messages": items}),
+                headers={"Authorization": f"Bearer {self.token}", "Content-Type": "application/json"},
+            ) as response:
+                if response.status >= 500 or response.status == 429:
+                    error: Exception = EmailTransportError(f"Bulk send failed with HTTP {response.status}")
+                    return [error] * len(items)
+                if response.status >= 400:
+                    error = EmailRejectedError(f"Bulk send rejected with HTTP {response.status}")
+                    return [error] * len(items)
+                document = orjson.loads(await response.read())
+        except (aiohttp.ClientError, asyncio.TimeoutError, orjson.JSONDecodeError) as exc:
+            error = EmailTransportError(f"Bulk send failed: {exc}")
+            return [error] * len(items)
+
+        results = document.get("results") if isinstance(document, dict) else None
+        if (
+            not isinstance(results, list)
+            or len(results) != len(items)
+            or not all(isinstance(result, dict) for result in results)
+        ):
+            log.error("email.http_transport.bad_response", expected=len(items))
+            error = EmailTransportError("Bulk send returned a malformed response")
+            return [error] * len(items)
+        return [
+            None if result.get("status") == "accepted" else EmailRejectedError(result.get("error") or "rejected")
+            for result in results
+        ]
+
+    async def close(self) -> None:
+        await self.batcher.stop()
+        if self._posts:
+            await asyncio.gather(*self._posts, return_exceptions=True)
+        if self._owns_session and self.session is not None and not self.session.closed:
+            await self.session.close()
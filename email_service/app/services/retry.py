@@ -1,50 +1,41 @@
-import asyncio
 import math
-import random
-from contextlib import asynccontextmanager
-from typing import AsyncIterator
-
-from redis.asyncio import Redis
+from typing import Any, Dict, List
 
 from app.settings import get_settings
 
 _settings = get_settings()
 
 
-class RetryContext:
-    def __init__(self, redis: Redis, request_id: str) -> None:
-        self.redis = redis
-        self.request_id = request_id
-        self.key = f"retry_attempt:{request_id}"
-
-    async def get_attempt(self) -> int:
-        attempt = await self.redis.incr(self.key)
-        await self.redis.expire(self.key, _settings.redis_request_ttl)
-        return int(attempt)
-
-    async def clear(self) -> None:
-        await self.redis.delete(self.key)
-
-    def calculate_backoff(self, attempt: int) -> float:
-        delay = min(
-            _settings.retry_base_delay * math.pow(2, attempt - 1),
-            _settings.retry_max_delay,
-        )
-        jitter = random.uniform(0, _settings.retry_base_delay)
-        return delay + jitter
-
-
-@asynccontextmanager
-async def retry_operation(context: RetryContext) -> AsyncIterator[int]:
-    attempt = await context.get_attempt()
-    try:
-        yield attempt
-    except Exception:
-        if attempt >= _settings.retry_max_attempts:
-            raise
-        backoff = context.calculate_backoff(attempt)
-        await asyncio.sleep(backoff)
-        raise
-    finally:
-        if attempt == 1:
-            await context.clear()
\ No newline at end of file
+class RetryTier:
+    def __init__(self, delay_ms: int) -> None:
+        self.delay_ms = delay_ms
+        self.queue_name = f"{_settings.rabbitmq_email_queue}.retry.{delay_ms}ms"
+
+    @property
+    def routing_key(self) -> str:
+        return self.queue_name
+
+
+def calculate_backoff(attempt: int) -> float:
+    return min(
+        _settings.retry_base_delay * math.pow(2, attempt - 1),
+        _settings.retry_max_delay,
+    )
+
+
+def retry_attempt(headers: Dict[str, Any]) -> int:
+    return int(headers.get("x-retry-attempt", 0))
+
+
+def tier_for_attempt(attempt: int) -> RetryTier:
+    return RetryTier(int(calculate_backoff(attempt) * 1000))
+
+
+def retry_tiers() -> List[RetryTier]:
+    # Attempts whose backoff hits retry_max_delay share the last tier.
+    delays = sorted({tier_for_attempt(attempt).delay_ms for attempt in range(1, _settings.retry_max_attempts + 1)})
+    return [RetryTier(delay_ms) for delay_ms in delays]
+
+
+def should_retry(attempt: int) -> bool:
+    return attempt <= _settings.retry_max_attempts
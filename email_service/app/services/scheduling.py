@@ -0,0 +1,62 @@
+import asyncio
+import heapq
+import itertools
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, List, Tuple
+
+
+# A concurrency limiter that hands freed slots to the highest-priority waiter
+# (FIFO among equal priorities) instead of the longest-waiting one.
+class PriorityLimiter:
+    def __init__(self, limit: int) -> None:
+        self.limit = limit
+        self.active = 0
+        self._waiters: List[Tuple[int, int, asyncio.Future[None]]] = []
+        self._sequence = itertools.count()
+
+    @property
+    def waiting(self) -> int:
+        return sum(1 for _, _, future in self._waiters if not future.done())
+
+    async def acquire(self, priority: int) -> None:
+        while self._waiters and self._waiters[0][2].done():
+            heapq.heappop(self._waiters)
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            return
+        future: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (-priority, next(self._sequence), future))
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # The slot was handed over just before cancellation; pass it on.
+                self.release()
+            raise
+
+    def release(self) -> None:
+        # After the limit was lowered, freed slots are retired instead of handed on.
+        if self.active <= self.limit:
+            while self._waiters:
+                _, _, future = heapq.heappop(self._waiters)
+                if not future.done():
+                    # The slot moves straight to the waiter, so `active` is unchanged.
+                    future.set_result(None)
+                    return
+        self.active -= 1
+
+    def set_limit(self, limit: int) -> None:
+        self.limit = limit
+        while self.active < self.limit and self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                self.active += 1
+                future.set_result(None)
+
+    @asynccontextmanager
+    async def slot(self, priority: int) -> AsyncIterator[None]:
+        await self.acquire(priority)
+        try:
+            yield
+        finally:
+            self.release()
@@ -0,0 +1,115 @@
+import asyncio
+import json
+from typing import Any, Dict, List, Optional
+
+from aio_pika import DeliveryMode, ExchangeType, Message
+from aio_pika.abc import AbstractChannel, AbstractExchange
+from structlog import get_logger
+
+from app.infrastructure.rabbitmq import get_connection
+from app.services.batching import MicroBatcher
+from app.settings import get_settings
+
+log = get_logger()
+_settings = get_settings()
+
+
+class StatusEvent:
+    def __init__(self, request_id: str, status: str, correlation_id: Optional[str] = None) -> None:
+        self.request_id = request_id
+        self.status = status
+        self.correlation_id = correlation_id
+        self.attempts = 0
+
+    def to_message(self) -> Message:
+        return Message(
+            body=json.dumps({"request_id": self.request_id, "status": self.status}).encode(),
+            headers={"x-correlation-id": self.correlation_id or self.request_id},
+            content_type="application/json",
+            delivery_mode=DeliveryMode.PERSISTENT,
+        )
+
+
+class StatusEventPublisher:
+    def __init__(
+        self,
+        exchange_name: Optional[str] = None,
+        batch_size: Optional[int] = None,
+        flush_interval_ms: Optional[int] = None,
+        max_buffer: Optional[int] = None,
+    ) -> None:
+        self.exchange_name = exchange_name or _settings.status_exchange
+        self.batcher: MicroBatcher[StatusEvent] = MicroBatcher(
+            self._publish_batch,
+            max_size=batch_size or _settings.status_publisher_batch_size,
+            max_wait=(flush_interval_ms or _settings.status_publisher_flush_ms) / 1000,
+            max_pending=max_buffer or _settings.status_publisher_max_buffer,
+        )
+        self._channel: Optional[AbstractChannel] = None
+        self._exchange: Optional[AbstractExchange] = None
+        self.published = 0
+        self.failed = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.exchange_name)
+
+    async def start(self) -> None:
+        if not self.enabled:
+            return
+        await self._get_exchange()
+        self.batcher.start()
+
+    async def stop(self) -> None:
+        await self.batcher.stop()
+
+    def publish(self, request_id: str, status: str, correlation_id: Optional[str] = None) -> None:
+        if not self.enabled:
+            return
+        if not self.batcher.offer(StatusEvent(request_id, status, correlation_id)):
+            log.warning("status_publisher.buffer_full", request_id=request_id, dropped=self.batcher.dropped)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending": self.batcher.pending,
+            "published": self.published,
+            "failed": self.failed,
+            "dropped": self.batcher.dropped,
+        }
+
+    async def _get_exchange(self) -> AbstractExchange:
+        # The publisher owns a confirm-mode channel, independent of the consumer
+        # channels, and declares the exchange once per channel.
+        if self._channel is None or self._channel.is_closed:
+            connection = await get_connection()
+            self._channel = await connection.channel(publisher_confirms=True)
+            self._exchange = None
+        if self._exchange is None:
+            self._exchange = await self._channel.declare_exchange(
+                self.exchange_name, ExchangeType.DIRECT, durable=True
+            )
+        return self._exchange
+
+    async def _publish_batch(self, events: List[StatusEvent]) -> None:
+        try:
+            exchange = await self._get_exchange()
+            # Publishes are pipelined and their confirms awaited together.
+            results = await asyncio.gather(
+                *(exchange.publish(event.to_message(), routing_key="email.status") for event in events),
+                return_exceptions=True,
+            )
+        except Exception as exc:
+            results = [exc] * len(events)
+
+        unconfirmed = [event for event, result in zip(events, results) if isinstance(result, BaseException)]
+        self.published += len(events) - len(unconfirmed)
+        if not unconfirmed:
+            return
+
+        for event in unconfirmed:
+            event.attempts += 1
+            if event.attempts >= _settings.status_publisher_max_attempts or not self.batcher.offer(event):
+                self.failed += 1
+                log.error("status_publisher.event_lost", request_id=event.request_id, status=event.status)
+        log.warning("status_publisher.publish_failed", count=len(unconfirmed))
+        await asyncio.sleep(_settings.status_publisher_flush_ms / 1000)
@@ -1,8 +1,11 @@
 #!/usr/bin/python3
 """Settings module for email service"""
 
+import math
+from typing import Dict, List, Literal
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
-from pydantic import Field, HttpUrl
+from pydantic import Field, HttpUrl, model_validator
 
 
 class Settings(BaseSettings):
@@ -11,6 +14,12 @@ class Settings(BaseSettings):
     service_host: str = "0.0.0.0"
     service_port: int = 8001
     log_level: str = Field("INFO", env="LOG_LEVEL")
+    log_queue_size: int = Field(10000, env="LOG_QUEUE_SIZE")
+    log_sample_rates: Dict[str, float] = Field(
+        default_factory=lambda: {"email.consumer.received": 0.1}, env="LOG_SAMPLE_RATES"
+    )
+    log_exception_dedup_window: float = Field(60.0, env="LOG_EXCEPTION_DEDUP_WINDOW")
+    event_loop_lag_interval: float = Field(0.5, env="EVENT_LOOP_LAG_INTERVAL")
     prometheus_enabled: bool = Field(True, env="PROMETHEUS_ENABLED")
 
     notifications_exchange: str = Field("notifications.direct", env="NOTIFICATIONS_EXCHANGE")
@@ -18,14 +27,96 @@ class Settings(BaseSettings):
     rabbitmq_email_queue: str = Field("email.queue", env="RABBITMQ_EMAIL_QUEUE")
     rabbitmq_retry_exchange: str = Field("notifications.retry", env="RABBITMQ_RETRY_EXCHANGE")
     rabbitmq_dead_letter_exchange: str = Field("notifications.dlx", env="RABBITMQ_DLX")
+    rabbitmq_dead_letter_queue: str = Field("email.dead", env="RABBITMQ_DEAD_LETTER_QUEUE")
+    dlq_replay_batch_size: int = Field(500, env="DLQ_REPLAY_BATCH_SIZE")
+    dlq_replay_rate: float = Field(500.0, env="DLQ_REPLAY_RATE")
+    dlq_replay_idle_timeout: float = Field(5.0, env="DLQ_REPLAY_IDLE_TIMEOUT")
+    rabbitmq_max_priority: int = Field(10, env="RABBITMQ_MAX_PRIORITY")
+    status_exchange: str = Field("", env="STATUS_EXCHANGE")
+    status_publisher_batch_size: int = Field(100, env="STATUS_PUBLISHER_BATCH_SIZE")
+    status_publisher_flush_ms: int = Field(50, env="STATUS_PUBLISHER_FLUSH_MS")
+    status_publisher_max_buffer: int = Field(10000, env="STATUS_PUBLISHER_MAX_BUFFER")
+    status_publisher_max_attempts: int = Field(5, env="STATUS_PUBLISHER_MAX_ATTEMPTS")
+    payload_decode_mode: Literal["strict", "fast"] = Field("strict", env="PAYLOAD_DECODE_MODE")
+    email_validation_cache_size: int = Field(65536, env="EMAIL_VALIDATION_CACHE_SIZE")
+    # False runs the API only; consumers then run under `python -m app.worker`.
+    consumer_enabled: bool = Field(True, env="CONSUMER_ENABLED")
+    worker_processes: int = Field(1, env="WORKER_PROCESSES")
+    worker_shutdown_timeout: float = Field(30.0, env="WORKER_SHUTDOWN_TIMEOUT")
+    worker_restart_backoff: float = Field(1.0, env="WORKER_RESTART_BACKOFF")
+    worker_restart_backoff_max: float = Field(60.0, env="WORKER_RESTART_BACKOFF_MAX")
+    worker_metrics_port: int = Field(0, env="WORKER_METRICS_PORT")
+    consumer_channels: int = Field(1, env="CONSUMER_CHANNELS")
+    consumer_prefetch: int = Field(10, env="CONSUMER_PREFETCH")
+    consumer_max_in_flight: int = Field(50, env="CONSUMER_MAX_IN_FLIGHT")
+    # Extra prefetch per channel for the priority limiter to choose from. When
+    # non-zero (and RABBITMQ_MAX_PRIORITY > 0, per-message mode) prefetch becomes
+    # ceil(CONSUMER_MAX_IN_FLIGHT / CONSUMER_CHANNELS) + this, replacing CONSUMER_PREFETCH.
+    consumer_priority_buffer: int = Field(10, env="CONSUMER_PRIORITY_BUFFER")
+    # AIMD in-flight limit driven by render+send latency and errors; starts at
+    # CONSUMER_MAX_IN_FLIGHT and also sets each channel's prefetch.
+    consumer_adaptive_concurrency: bool = Field(False, env="CONSUMER_ADAPTIVE_CONCURRENCY")
+    consumer_adaptive_min_limit: int = Field(4, env="CONSUMER_ADAPTIVE_MIN_LIMIT")
+    consumer_adaptive_max_limit: int = Field(500, env="CONSUMER_ADAPTIVE_MAX_LIMIT")
+    consumer_adaptive_interval: float = Field(1.0, env="CONSUMER_ADAPTIVE_INTERVAL")
+    consumer_adaptive_latency_tolerance: float = Field(2.0, env="CONSUMER_ADAPTIVE_LATENCY_TOLERANCE")
+    consumer_adaptive_error_threshold: float = Field(0.1, env="CONSUMER_ADAPTIVE_ERROR_THRESHOLD")
+    consumer_adaptive_decrease_factor: float = Field(0.7, env="CONSUMER_ADAPTIVE_DECREASE_FACTOR")
+    # Cancel the queue subscription while the template or SMTP breaker is open and
+    # probe with CONSUMER_PROBE_CONCURRENCY deliveries once it may half-open.
+    consumer_pause_on_open_breaker: bool = Field(True, env="CONSUMER_PAUSE_ON_OPEN_BREAKER")
+    consumer_probe_concurrency: int = Field(1, env="CONSUMER_PROBE_CONCURRENCY")
+    consumer_batch_size: int = Field(1, env="CONSUMER_BATCH_SIZE")
+    consumer_batch_max_wait_ms: int = Field(50, env="CONSUMER_BATCH_MAX_WAIT_MS")
+    envelope_max_records: int = Field(1000, env="ENVELOPE_MAX_RECORDS")
+    envelope_max_bytes: int = Field(16 * 1024 * 1024, env="ENVELOPE_MAX_BYTES")
+    digest_enabled: bool = Field(False, env="DIGEST_ENABLED")
+    digest_template_codes: List[str] = Field(default_factory=list, env="DIGEST_TEMPLATE_CODES")
+    digest_template_code: str = Field("email_digest", env="DIGEST_TEMPLATE_CODE")
+    digest_window_ms: int = Field(2000, env="DIGEST_WINDOW_MS")
+    digest_max_items: int = Field(5, env="DIGEST_MAX_ITEMS")
 
     # redis
     redis_url: str = Field(..., env="REDIS_URL")
     redis_request_ttl: int = Field(600, env="REDIS_REQUEST_TTL")
+    status_error_max_bytes: int = Field(60, env="STATUS_ERROR_MAX_BYTES")
+    idempotency_local_cache_size: int = Field(100000, env="IDEMPOTENCY_LOCAL_CACHE_SIZE")
+    status_list_default_limit: int = Field(50, env="STATUS_LIST_DEFAULT_LIMIT")
+    status_list_max_limit: int = Field(200, env="STATUS_LIST_MAX_LIMIT")
+    status_bulk_max_ids: int = Field(1000, env="STATUS_BULK_MAX_IDS")
 
     # template service
     template_service_url: HttpUrl = Field(..., env="TEMPLATE_SERVICE_URL")
     template_service_token: str = Field(..., env="TEMPLATE_SERVICE_TOKEN")
+    template_http_pool_limit: int = Field(100, env="TEMPLATE_HTTP_POOL_LIMIT")
+    template_http_pool_limit_per_host: int = Field(20, env="TEMPLATE_HTTP_POOL_LIMIT_PER_HOST")
+    template_http_keepalive_timeout: float = Field(30.0, env="TEMPLATE_HTTP_KEEPALIVE_TIMEOUT")
+    template_http_dns_cache_ttl: int = Field(300, env="TEMPLATE_HTTP_DNS_CACHE_TTL")
+    template_http_connect_timeout: float = Field(2.0, env="TEMPLATE_HTTP_CONNECT_TIMEOUT")
+    template_http_read_timeout: float = Field(10.0, env="TEMPLATE_HTTP_READ_TIMEOUT")
+    template_http_total_timeout: float = Field(10.0, env="TEMPLATE_HTTP_TOTAL_TIMEOUT")
+    # Per-request render timeout: p99 of recent latencies times the multiplier,
+    # clamped to [min, TEMPLATE_HTTP_READ_TIMEOUT].
+    template_timeout_min: float = Field(0.25, env="TEMPLATE_TIMEOUT_MIN")
+    template_timeout_multiplier: float = Field(3.0, env="TEMPLATE_TIMEOUT_MULTIPLIER")
+    template_latency_window: int = Field(1000, env="TEMPLATE_LATENCY_WINDOW")
+    template_latency_min_samples: int = Field(50, env="TEMPLATE_LATENCY_MIN_SAMPLES")
+    template_hedging_enabled: bool = Field(False, env="TEMPLATE_HEDGING_ENABLED")
+    template_hedge_percentile: float = Field(0.95, env="TEMPLATE_HEDGE_PERCENTILE")
+    template_hedge_budget: float = Field(0.05, env="TEMPLATE_HEDGE_BUDGET")
+    template_render_mode: Literal["remote", "local"] = Field("remote", env="TEMPLATE_RENDER_MODE")
+    template_cache_size: int = Field(256, env="TEMPLATE_CACHE_SIZE")
+    template_cache_ttl: float = Field(300.0, env="TEMPLATE_CACHE_TTL")
+
+    # email transport
+    email_transport: Literal["smtp", "http"] = Field("smtp", env="EMAIL_TRANSPORT")
+    email_from: str = Field("", env="EMAIL_FROM")
+    email_http_api_url: str = Field("", env="EMAIL_HTTP_API_URL")
+    email_http_api_token: str = Field("", env="EMAIL_HTTP_API_TOKEN")
+    email_http_batch_size: int = Field(100, env="EMAIL_HTTP_BATCH_SIZE")
+    email_http_linger_ms: int = Field(20, env="EMAIL_HTTP_LINGER_MS")
+    email_http_pool_limit: int = Field(10, env="EMAIL_HTTP_POOL_LIMIT")
+    email_http_timeout: float = Field(30.0, env="EMAIL_HTTP_TIMEOUT")
 
     # email (smtp)
     smtp_host: str = Field(..., env="SMTP_HOST")
@@ -33,10 +124,20 @@ class Settings(BaseSettings):
     smtp_username: str = Field(..., env="SMTP_USERNAME")
     smtp_password: str = Field(..., env="SMTP_PASSWORD")
     smtp_use_tls: bool = Field(True, env="SMTP_USE_TLS")
+    smtp_timeout: float = Field(30.0, env="SMTP_TIMEOUT")
+    smtp_pool_size: int = Field(5, env="SMTP_POOL_SIZE")
+    smtp_pool_max_messages: int = Field(100, env="SMTP_POOL_MAX_MESSAGES")
+    smtp_pool_max_age: float = Field(300.0, env="SMTP_POOL_MAX_AGE")
+    smtp_pool_idle_check: float = Field(30.0, env="SMTP_POOL_IDLE_CHECK")
 
     # resilience
     circuit_breaker_fail_max: int = Field(5, env="CIRCUIT_BREAKER_FAIL_MAX")
     circuit_breaker_reset_timeout: int = Field(60, env="CIRCUIT_BREAKER_RESET_TIMEOUT")
+    smtp_domain_rate_limits: Dict[str, float] = Field(default_factory=dict, env="SMTP_DOMAIN_RATE_LIMITS")
+    smtp_domain_default_rate: float = Field(0.0, env="SMTP_DOMAIN_DEFAULT_RATE")
+    smtp_domain_rate_burst: int = Field(10, env="SMTP_DOMAIN_RATE_BURST")
+    smtp_domain_idle_timeout: float = Field(600.0, env="SMTP_DOMAIN_IDLE_TIMEOUT")
+    smtp_domain_max_tracked: int = Field(10000, env="SMTP_DOMAIN_MAX_TRACKED")
     retry_base_delay: float = Field(1.0, env="RETRY_BASE_DELAY")
     retry_max_delay: float = Field(60.0, env="RETRY_MAX_DELAY")
     retry_max_attempts: int = Field(5, env="RETRY_MAX_ATTEMPTS")
@@ -60,6 +161,27 @@ class Settings(BaseSettings):
 
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8")
 
+    @model_validator(mode="after")
+    def check_digest_fits_prefetch(self) -> "Settings":
+        # Held digest messages stay unacked; a full group must not use up the channel.
+        # Digests only run unbatched, where the consumer sizes prefetch from the
+        # in-flight limit when it buffers for priorities or adapts its concurrency.
+        if not self.digest_enabled or self.consumer_batch_size > 1:
+            return self
+        prefetch = self.consumer_prefetch
+        buffer = self.consumer_priority_buffer if self.rabbitmq_max_priority > 0 else 0
+        if buffer or self.consumer_adaptive_concurrency:
+            prefetch = max(1, math.ceil(self.consumer_max_in_flight / self.consumer_channels)) + buffer
+        if self.digest_max_items >= prefetch:
+            raise ValueError(f"DIGEST_MAX_ITEMS must be lower than the consumer prefetch ({prefetch})")
+        return self
+
+    @model_validator(mode="after")
+    def check_priority_buffer(self) -> "Settings":
+        if self.consumer_priority_buffer < 0:
+            raise ValueError("CONSUMER_PRIORITY_BUFFER must not be negative")
+        return self
+
     @property
     def rabbitmq_connection_url(self) -> str:
         """Construct RabbitMQ URL from components if RABBITMQ_URL not provided"""
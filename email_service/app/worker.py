@@ -0,0 +1,166 @@
+import argparse
+import asyncio
+import multiprocessing
+import signal
+import sys
+import time
+from multiprocessing.process import BaseProcess
+from typing import Dict, List, Optional
+
+from prometheus_client import start_http_server
+from structlog import get_logger
+
+from app.infrastructure.http import close_http_session, get_http_session
+from app.infrastructure.rabbitmq import close_connection
+from app.infrastructure.redis import get_redis
+from app.infrastructure.status_repository import StatusRepository
+from app.infrastructure.template_client import TemplateClient
+from app.logging import configure_logging, stop_logging
+from app.metrics import monitor_event_loop_lag
+from app.services.email_consumer import EmailQueueConsumer
+from app.services.email_transport import create_transport
+from app.settings import get_settings
+
+log = get_logger()
+settings = get_settings()
+
+# A worker that stayed up this long is considered healthy again, so its next
+# crash restarts it without the accumulated backoff.
+HEALTHY_UPTIME = 60.0
+
+
+async def create_consumer() -> EmailQueueConsumer:
+    redis = await get_redis()
+    status_repo = StatusRepository(
+        redis,
+        ttl_seconds=settings.redis_request_ttl,
+        local_cache_size=settings.idempotency_local_cache_size,
+    )
+    http_session = await get_http_session()
+    template_client = TemplateClient(session=http_session)
+    return EmailQueueConsumer(status_repo=status_repo, template_client=template_client, sender=create_transport())
+
+
+async def close_consumer(consumer: EmailQueueConsumer) -> None:
+    await consumer.stop()
+    await consumer.sender.close()
+    await close_http_session()
+    redis = await get_redis()
+    await redis.close()
+
+
+async def serve(index: int) -> None:
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(signum, stopping.set)
+
+    consumer = await create_consumer()
+    lag_monitor = asyncio.create_task(monitor_event_loop_lag(settings.event_loop_lag_interval))
+    await consumer.start()
+    log.info("email.worker.started", worker=index)
+
+    await stopping.wait()
+    log.info("email.worker.draining", worker=index, in_flight=consumer.in_flight)
+    drained = await consumer.drain(settings.worker_shutdown_timeout)
+    lag_monitor.cancel()
+    await close_consumer(consumer)
+    # Closing the connection requeues anything still prefetched or unacked.
+    await close_connection()
+    log.info("email.worker.stopped", worker=index, drained=drained)
+
+
+def run_worker(index: int) -> None:
+    # Entry point of each child process: its own event loop, Redis, AMQP and HTTP clients.
+    configure_logging(
+        settings.log_level,
+        queue_size=settings.log_queue_size,
+        sample_rates=settings.log_sample_rates,
+        exception_dedup_window=settings.log_exception_dedup_window,
+    )
+    if settings.prometheus_enabled and settings.worker_metrics_port:
+        start_http_server(settings.worker_metrics_port + index)
+    try:
+        asyncio.run(serve(index))
+    finally:
+        stop_logging()
+
+
+class Supervisor:
+    def __init__(self, processes: int) -> None:
+        self.processes = processes
+        self.context = multiprocessing.get_context("spawn")
+        self.workers: Dict[int, BaseProcess] = {}
+        self.started_at: Dict[int, float] = {}
+        self.failures: Dict[int, int] = {}
+        self.restart_at: Dict[int, float] = {}
+        self.stopping = False
+
+    def _spawn(self, index: int) -> None:
+        process = self.context.Process(target=run_worker, args=(index,), name=f"email-worker-{index}")
+        process.start()
+        self.workers[index] = process
+        self.started_at[index] = time.monotonic()
+        log.info("email.worker.spawned", worker=index, pid=process.pid)
+
+    def _request_stop(self, signum: int, frame: object) -> None:
+        self.stopping = True
+
+    def _reap(self) -> None:
+        now = time.monotonic()
+        for index, process in list(self.workers.items()):
+            if process.is_alive():
+                continue
+            del self.workers[index]
+            if now - self.started_at[index] >= HEALTHY_UPTIME:
+                self.failures[index] = 0
+            failures = self.failures.get(index, 0)
+            delay = min(settings.worker_restart_backoff_max, settings.worker_restart_backoff * 2**failures)
+            self.failures[index] = failures + 1
+            self.restart_at[index] = now + delay
+            log.warning("email.worker.exited", worker=index, exitcode=process.exitcode, restart_in=delay)
+
+        for index, due in list(self.restart_at.items()):
+            if due <= now:
+                del self.restart_at[index]
+                self._spawn(index)
+
+    def _shutdown(self) -> None:
+        # Workers drain for up to WORKER_SHUTDOWN_TIMEOUT; anything still running a
+        # few seconds after that is killed.
+        alive: List[BaseProcess] = [process for process in self.workers.values() if process.is_alive()]
+        log.info("email.worker.supervisor_stopping", workers=len(alive))
+        for process in alive:
+            process.terminate()
+        deadline = time.monotonic() + settings.worker_shutdown_timeout + 5
+        for process in alive:
+            process.join(max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                log.warning("email.worker.killed", pid=process.pid)
+                process.kill()
+                process.join()
+
+    def run(self) -> None:
+        signal.signal(signal.SIGTERM, self._request_stop)
+        signal.signal(signal.SIGINT, self._request_stop)
+        for index in range(self.processes):
+            self._spawn(index)
+        while not self.stopping:
+            self._reap()
+            time.sleep(0.5)
+        self._shutdown()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Run email queue consumers in worker processes.")
+    parser.add_argument("--processes", type=int, default=settings.worker_processes)
+    args = parser.parse_args(argv)
+    configure_logging(settings.log_level)
+    try:
+        Supervisor(max(1, args.processes)).run()
+    finally:
+        stop_logging()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
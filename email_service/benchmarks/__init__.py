@@ -0,0 +1,14 @@
+import os
+
+# Benchmarks run without a .env file or any external service; provide the
+# settings the app requires so modules can be imported.
+for _name, _value in {
+    "REDIS_URL": "redis://localhost:6379/0",
+    "TEMPLATE_SERVICE_URL": "http://template.invalid",
+    "TEMPLATE_SERVICE_TOKEN": "benchmark",
+    "SMTP_HOST": "smtp.invalid",
+    "SMTP_USERNAME": "benchmark@example.com",
+    "SMTP_PASSWORD": "benchmark",
+    "USER_SERVICE_API_KEY": "benchmark",
+}.items():
+    os.environ.setdefault(_name, _value)
@@ -0,0 +1,105 @@
+"""SMTP transactions and template renders for a burst, with and without digests.
+
+A burst of notifications goes to a small set of recipients, all with template
+codes that allow coalescing. Every request_id must still end up with its own
+delivered status either way.
+
+Run from the email_service directory:
+
+    python -m benchmarks.digest_burst [--messages 1000] [--recipients 50] [--prefetch 200]
+
+--prefetch stands in for the channel prefetch: once that many messages are
+held, every pending digest is flushed early.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+from typing import Any, Dict
+
+import orjson
+import structlog
+
+from benchmarks.fakes import FakeHTTPSession, FakeIncomingMessage, FakeSMTPClient, InMemoryRedis
+from benchmarks.payloads import TEMPLATES, make_payload
+
+from app.infrastructure.smtp_pool import SMTPConnectionPool
+from app.infrastructure.status_repository import StatusRepository
+from app.infrastructure.template_client import TemplateClient
+from app.services.digest import DigestCoalescer
+from app.services.email_consumer import EmailQueueConsumer
+from app.services.email_sender import EmailSender
+from app.services.status_publisher import StatusEventPublisher
+
+
+async def run_burst(messages: int, recipients: int, digest: bool, window: float, prefetch: int) -> Dict[str, Any]:
+    pool = SMTPConnectionPool(size=4)
+    pool._create_client = FakeSMTPClient  # type: ignore[method-assign]
+    sender = EmailSender(pool)
+    sent = 0
+    send = sender.send
+
+    async def counting_send(*args: Any, **kwargs: Any) -> None:
+        nonlocal sent
+        sent += 1
+        await send(*args, **kwargs)
+
+    sender.send = counting_send  # type: ignore[method-assign]
+    session = FakeHTTPSession()
+    repo = StatusRepository(InMemoryRedis(), ttl_seconds=600)  # type: ignore[arg-type]
+    consumer = EmailQueueConsumer(
+        status_repo=repo,
+        template_client=TemplateClient(session=session, mode="remote"),  # type: ignore[arg-type]
+        sender=sender,
+        status_publisher=StatusEventPublisher(exchange_name=""),
+    )
+    if digest:
+        consumer.digests = DigestCoalescer(
+            consumer._deliver_digest, template_codes=TEMPLATES, window=window, max_items=20, max_held=prefetch
+        )
+
+    bodies = [orjson.dumps(make_payload(index, recipients)) for index in range(messages)]
+    incoming = [FakeIncomingMessage(body, index + 1) for index, body in enumerate(bodies)]
+    for message in incoming:
+        await consumer._process_message(message)  # type: ignore[arg-type]
+    await consumer.stop()
+
+    statuses = await repo.get_statuses([orjson.loads(body)["request_id"] for body in bodies])
+    return {
+        "smtp_transactions": sent,
+        "template_renders": session.requests,
+        "delivered_statuses": sum(1 for status in statuses.values() if status and status["status"] == "delivered"),
+        "acked": sum(1 for message in incoming if message.outcome == "ack"),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=1000)
+    parser.add_argument("--recipients", type=int, default=50)
+    parser.add_argument("--window-ms", type=float, default=50)
+    parser.add_argument("--prefetch", type=int, default=200)
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+    structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.CRITICAL))
+
+    results = {
+        mode: asyncio.run(
+            run_burst(args.messages, args.recipients, mode == "digest", args.window_ms / 1000, args.prefetch)
+        )
+        for mode in ("per_message", "digest")
+    }
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'mode':<14}{'smtp':>8}{'renders':>10}{'delivered':>11}{'acked':>8}")
+    for mode, result in results.items():
+        print(
+            f"{mode:<14}{result['smtp_transactions']:>8}{result['template_renders']:>10}"
+            f"{result['delivered_statuses']:>11}{result['acked']:>8}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""Local stand-ins for an SMTP relay and a bulk-send HTTP API.
+
+Both listen on 127.0.0.1, add a fixed latency per transaction or request and
+count what they accept, so the two transports can be load-tested side by side:
+
+    python -m benchmarks.fake_servers --smtp-port 2525 --http-port 8025
+"""
+
+import argparse
+import asyncio
+from typing import Optional
+
+import orjson
+from aiohttp import web
+
+
+class FakeSMTPServer:
+    def __init__(self, latency: float = 0.0, reject_domain: Optional[str] = None) -> None:
+        self.latency = latency
+        self.reject_domain = reject_domain
+        self.messages = 0
+        self.connections = 0
+        self.server: Optional[asyncio.AbstractServer] = None
+
+    @property
+    def port(self) -> int:
+        assert self.server is not None
+        return self.server.sockets[0].getsockname()[1]
+
+    async def start(self, port: int = 0) -> None:
+        self.server = await asyncio.start_server(self._session, "127.0.0.1", port)
+
+    async def stop(self) -> None:
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+
+    async def _session(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+
+        async def reply(line: str) -> None:
+            writer.write(f"{line}\r\n".encode())
+            await writer.drain()
+
+        await reply("220 fake.smtp ready")
+        try:
+            while True:
+                line = (await reader.readline()).decode(errors="replace").strip()
+                if not line:
+                    break
+                verb = line.split(" ", 1)[0].upper()
+                if verb in ("EHLO", "HELO"):
+                    await reply("250-fake.smtp\r\n250-AUTH PLAIN\r\n250 8BITMIME")
+                elif verb == "AUTH":
+                    await reply("235 2.7.0 Authentication successful")
+                elif verb == "RCPT" and self.reject_domain and self.reject_domain in line:
+                    await reply("550 5.1.1 Mailbox unavailable")
+                elif verb == "DATA":
+                    await reply("354 End data with <CR><LF>.<CR><LF>")
+                    while (await reader.readline()) not in (b".\r\n", b".\n", b""):
+                        pass
+                    if self.latency:
+                        await asyncio.sleep(self.latency)
+                    self.messages += 1
+                    await reply("250 2.0.0 Queued")
+                elif verb == "QUIT":
+                    await reply("221 Bye")
+                    break
+                else:
+                    await reply("250 OK")
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+
+class FakeBulkMailAPI:
+    def __init__(self, latency: float = 0.0, reject_domain: Optional[str] = None) -> None:
+        self.latency = latency
+        self.reject_domain = reject_domain
+        self.requests = 0
+        self.messages = 0
+        self.runner: Optional[web.AppRunner] = None
+        self.port = 0
+
+    async def start(self, port: int = 0) -> None:
+        app = web.Application()
+        app.router.add_post("/v1/messages/bulk", self._bulk)
+        self.runner = web.AppRunner(app, access_log=None)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", port)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]  # type: ignore[union-attr]
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}/v1/messages/bulk"
+
+    async def stop(self) -> None:
+        if self.runner is not None:
+            await self.runner.cleanup()
+
+    async def _bulk(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        messages = orjson.loads(await request.read())["messages"]
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        results = []
+        for message in messages:
+            if self.reject_domain and message["to"].endswith(self.reject_domain):
+                results.append({"status": "rejected", "error": "mailbox unavailable"})
+            else:
+                self.messages += 1
+                results.append({"status": "accepted"})
+        return web.Response(body=orjson.dumps({"results": results}), content_type="application/json")
+
+
+async def serve(smtp_port: int, http_port: int, latency: float) -> None:
+    smtp = FakeSMTPServer(latency)
+    api = FakeBulkMailAPI(latency)
+    await smtp.start(smtp_port)
+    await api.start(http_port)
+    print(f"SMTP on 127.0.0.1:{smtp.port}, bulk API on {api.url}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await smtp.stop()
+        await api.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--smtp-port", type=int, default=2525)
+    parser.add_argument("--http-port", type=int, default=8025)
+    parser.add_argument("--latency-ms", type=float, default=5, help="per SMTP message / per HTTP request")
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.smtp_port, args.http_port, args.latency_ms / 1000))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
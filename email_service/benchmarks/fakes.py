@@ -0,0 +1,313 @@
+import asyncio
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class InMemoryStore:
+    """Synchronous implementation of the Redis commands the service uses."""
+
+    def __init__(self) -> None:
+        self.data: Dict[str, Any] = {}
+        self.expires_at: Dict[str, float] = {}
+
+    def _alive(self, key: str) -> bool:
+        deadline = self.expires_at.get(key)
+        if deadline is not None and deadline <= time.monotonic():
+            self.data.pop(key, None)
+            self.expires_at.pop(key, None)
+        return key in self.data
+
+    def get(self, key: str) -> Optional[str]:
+        return self.data.get(key) if self._alive(key) else None
+
+    def set(self, key: str, value: Any, nx: bool = False, ex: Optional[int] = None) -> Optional[bool]:
+        if nx and self._alive(key):
+            return None
+        self.data[key] = str(value)
+        self.expires_at.pop(key, None)
+        if ex is not None:
+            self.expires_at[key] = time.monotonic() + ex
+        return True
+
+    def setnx(self, key: str, value: Any) -> bool:
+        return bool(self.set(key, value, nx=True))
+
+    def incr(self, key: str) -> int:
+        value = int(self.get(key) or 0) + 1
+        self.data[key] = str(value)
+        return value
+
+    def expire(self, key: str, seconds: int) -> bool:
+        if not self._alive(key):
+            return False
+        self.expires_at[key] = time.monotonic() + seconds
+        return True
+
+    def delete(self, *keys: str) -> int:
+        removed = 0
+        for key in keys:
+            if self._alive(key):
+                removed += 1
+            self.data.pop(key, None)
+            self.expires_at.pop(key, None)
+        return removed
+
+    def hset(self, key: str, mapping: Dict[str, Any]) -> int:
+        current = self.data.get(key) if self._alive(key) else None
+        if current is None:
+            current = self.data[key] = {}
+        added = len(set(mapping) - set(current))
+        current.update({field: str(value) for field, value in mapping.items()})
+        return added
+
+    def hsetnx(self, key: str, field: str, value: Any) -> bool:
+        current = self.data.get(key) if self._alive(key) else None
+        if current is None:
+            current = self.data[key] = {}
+        if field in current:
+            return False
+        current[field] = str(value)
+        return True
+
+    def hdel(self, key: str, *fields: str) -> int:
+        current = self.data.get(key) if self._alive(key) else None
+        if current is None:
+            return 0
+        return sum(1 for field in fields if current.pop(field, None) is not None)
+
+    def hgetall(self, key: str) -> Dict[str, str]:
+        return dict(self.data[key]) if self._alive(key) else {}
+
+    def _zset(self, key: str) -> Dict[str, float]:
+        if not self._alive(key):
+            self.data[key] = {}
+        return self.data[key]
+
+    def zadd(self, key: str, mapping: Dict[str, float]) -> int:
+        members = self._zset(key)
+        added = len(set(mapping) - set(members))
+        members.update({member: float(score) for member, score in mapping.items()})
+        return added
+
+    def zrem(self, key: str, *members: str) -> int:
+        current = self._zset(key)
+        return sum(1 for member in members if current.pop(member, None) is not None)
+
+    def zcard(self, key: str) -> int:
+        return len(self.data[key]) if self._alive(key) else 0
+
+    def zremrangebyscore(self, key: str, min: Any, max: Any) -> int:
+        current = self._zset(key)
+        low, high = float(min), float(max)
+        doomed = [member for member, score in current.items() if low <= score <= high]
+        for member in doomed:
+            del current[member]
+        return len(doomed)
+
+    def zrevrangebyscore(
+        self,
+        key: str,
+        max: Any,
+        min: Any,
+        start: Optional[int] = None,
+        num: Optional[int] = None,
+        withscores: bool = False,
+    ) -> List[Any]:
+        low, high = float(min), float(max)
+        ordered = sorted(
+            ((member, score) for member, score in self._zset(key).items() if low <= score <= high),
+            key=lambda item: (item[1], item[0]),
+            reverse=True,
+        )
+        if start is not None and num is not None:
+            ordered = ordered[start : start + num]
+        return ordered if withscores else [member for member, _ in ordered]
+
+
+class InMemoryRedis:
+    """Async Redis stand-in that counts network round trips and can simulate latency."""
+
+    def __init__(self, latency: float = 0.0) -> None:
+        self.store = InMemoryStore()
+        self.latency = latency
+        self.round_trips = 0
+
+    async def round_trip(self) -> None:
+        self.round_trips += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        else:
+            await asyncio.sleep(0)
+
+    def __getattr__(self, name: str) -> Any:
+        operation = getattr(self.store, name)
+
+        async def command(*args: Any, **kwargs: Any) -> Any:
+            await self.round_trip()
+            return operation(*args, **kwargs)
+
+        return command
+
+    def pipeline(self, transaction: bool = True) -> "InMemoryPipeline":
+        return InMemoryPipeline(self)
+
+
+class InMemoryPipeline:
+    def __init__(self, redis: InMemoryRedis) -> None:
+        self.redis = redis
+        self.commands: List[Tuple[str, Tuple[Any, ...], Dict[str, Any]]] = []
+
+    async def __aenter__(self) -> "InMemoryPipeline":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        self.commands.clear()
+
+    def __getattr__(self, name: str) -> Any:
+        getattr(self.redis.store, name)
+
+        def queue(*args: Any, **kwargs: Any) -> "InMemoryPipeline":
+            self.commands.append((name, args, kwargs))
+            return self
+
+        return queue
+
+    async def execute(self) -> List[Any]:
+        await self.redis.round_trip()
+        commands, self.commands = self.commands, []
+        return [getattr(self.redis.store, name)(*args, **kwargs) for name, args, kwargs in commands]
+
+
+class FakeSMTPClient:
+    """Stands in for aiosmtplib.SMTP; counts connects and messages."""
+
+    connects = 0
+
+    def __init__(self, latency: float = 0.0) -> None:
+        self.latency = latency
+        self.is_connected = False
+        self.sent = 0
+
+    async def connect(self) -> None:
+        FakeSMTPClient.connects += 1
+        self.is_connected = True
+
+    async def send_message(self, message: Any, **kwargs: Any) -> Tuple[Dict[str, Any], str]:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        self.sent += 1
+        return {}, "250 OK"
+
+    async def noop(self) -> None:
+        return None
+
+    async def rset(self) -> None:
+        return None
+
+    async def quit(self) -> None:
+        self.is_connected = False
+
+    def close(self) -> None:
+        self.is_connected = False
+
+
+class FakeResponse:
+    def __init__(self, payload: Any, status: int = 200, headers: Optional[Dict[str, str]] = None) -> None:
+        self.payload = payload
+        self.status = status
+        self.headers = headers or {}
+
+    async def __aenter__(self) -> "FakeResponse":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        return None
+
+    def raise_for_status(self) -> None:
+        if self.status >= 400:
+            raise RuntimeError(f"HTTP {self.status}")
+
+    async def json(self) -> Any:
+        return self.payload
+
+
+class FakeHTTPSession:
+    """Stands in for aiohttp.ClientSession against the template service."""
+
+    def __init__(self, latency: float = 0.0) -> None:
+        self.latency = latency
+        self.requests = 0
+        self.closed = False
+
+    def post(self, url: str, **kwargs: Any) -> FakeResponse:
+        self.requests += 1
+        return FakeResponse({"subject": "Hello", "body": "Rendered body"})
+
+    def get(self, url: str, **kwargs: Any) -> FakeResponse:
+        self.requests += 1
+        return FakeResponse(
+            {"data": {"subject": "Hello {{ name }}", "body": "Visit {{ link }}", "version": 1}},
+            headers={"ETag": '"v1"'},
+        )
+
+
+class FakeExchange:
+    def __init__(self) -> None:
+        self.published = 0
+        self.is_closed = False
+
+    async def publish(self, message: Any, routing_key: str, **kwargs: Any) -> None:
+        self.published += 1
+        await asyncio.sleep(0)
+
+
+class FakeIncomingMessage:
+    """Enough of aio_pika.IncomingMessage for the consumer code paths."""
+
+    def __init__(
+        self,
+        body: bytes,
+        delivery_tag: int = 1,
+        headers: Optional[Dict[str, Any]] = None,
+        content_type: Optional[str] = "application/json",
+        content_encoding: Optional[str] = None,
+    ) -> None:
+        self.body = body
+        self.delivery_tag = delivery_tag
+        self.headers = headers or {}
+        self.content_type = content_type
+        self.content_encoding = content_encoding
+        self.priority: Optional[int] = None
+        self.delivery_mode = None
+        self.timestamp = None
+        self.outcome: Optional[str] = None
+        self.processed = False
+
+    async def ack(self, multiple: bool = False) -> None:
+        self.outcome = "ack"
+        self.processed = True
+
+    async def reject(self, requeue: bool = False) -> None:
+        self.outcome = "reject"
+        self.processed = True
+
+    async def nack(self, multiple: bool = False, requeue: bool = True) -> None:
+        self.outcome = "nack"
+        self.processed = True
+
+    def process(self, requeue: bool = False, ignore_processed: bool = False) -> "_FakeProcessContext":
+        return _FakeProcessContext(self, requeue)
+
+
+class _FakeProcessContext:
+    def __init__(self, message: FakeIncomingMessage, requeue: bool) -> None:
+        self.message = message
+        self.requeue = requeue
+
+    async def __aenter__(self) -> None:
+        return None
+
+    async def __aexit__(self, exc_type: Any, *exc_info: Any) -> bool:
+        if self.message.outcome is None:
+            self.message.outcome = "reject" if exc_type else "ack"
+        return False
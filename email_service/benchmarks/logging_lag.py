@@ -0,0 +1,122 @@
+"""Event-loop lag under log load: synchronous stdout writes vs the queued handler.
+
+Log lines go to a stream whose write() blocks for --write-us microseconds, the
+way a slow pipe or a busy container log driver does. A probe task measures how
+late the loop wakes it while a worker logs per message like the consumer does.
+
+Run from the email_service directory:
+
+    python -m benchmarks.logging_lag [--messages 5000] [--write-us 50]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import statistics
+import time
+from typing import Dict, List
+
+import structlog
+
+import app.logging as app_logging
+from app.logging import configure_logging, stop_logging
+
+
+class SlowStream:
+    def __init__(self, write_seconds: float) -> None:
+        self.write_seconds = write_seconds
+        self.lines = 0
+
+    def write(self, text: str) -> int:
+        time.sleep(self.write_seconds)
+        self.lines += 1
+        return len(text)
+
+    def flush(self) -> None:
+        pass
+
+
+async def probe(lags: List[float], stop: asyncio.Event, interval: float = 0.001) -> None:
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        expected = loop.time() + interval
+        await asyncio.sleep(interval)
+        lags.append(max(0.0, loop.time() - expected))
+
+
+async def workload(messages: int) -> None:
+    log = structlog.get_logger()
+    for index in range(messages):
+        log.info("email.consumer.received", request_id=f"req-{index}")
+        log.info("email.consumer.delivered", request_id=f"req-{index}")
+        if index % 10 == 0:
+            try:
+                raise ConnectionError("smtp relay unavailable")
+            except ConnectionError:
+                log.exception("email.consumer.failed", request_id=f"req-{index}")
+        await asyncio.sleep(0)
+
+
+async def measure(messages: int) -> Dict[str, float]:
+    lags: List[float] = []
+    stop = asyncio.Event()
+    probe_task = asyncio.create_task(probe(lags, stop))
+    started = time.perf_counter()
+    await workload(messages)
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await probe_task
+    lags.sort()
+    return {
+        "messages_per_second": messages / elapsed,
+        "lag_p50_ms": statistics.median(lags) * 1000 if lags else 0.0,
+        "lag_p99_ms": lags[min(len(lags) - 1, int(len(lags) * 0.99))] * 1000 if lags else 0.0,
+        "lag_max_ms": lags[-1] * 1000 if lags else 0.0,
+    }
+
+
+def run_mode(name: str, messages: int, write_seconds: float) -> Dict[str, float]:
+    stream = SlowStream(write_seconds)
+    structlog.reset_defaults()
+    if name == "sync":
+        configure_logging("INFO")
+        logging.getLogger().handlers[0].setStream(stream)  # type: ignore[attr-defined]
+    else:
+        configure_logging(
+            "INFO",
+            queue_size=100000,
+            sample_rates={"email.consumer.received": 0.1} if name == "queued+sampled" else None,
+            exception_dedup_window=60 if name == "queued+sampled" else 0,
+        )
+        app_logging._listener.handlers[0].setStream(stream)  # type: ignore[union-attr]
+    result = asyncio.run(measure(messages))
+    stop_logging()
+    logging.getLogger().handlers.clear()
+    result["lines_written"] = stream.lines
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=5000)
+    parser.add_argument("--write-us", type=float, default=50, help="simulated blocking time per write")
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    results = {
+        mode: run_mode(mode, args.messages, args.write_us / 1e6) for mode in ("sync", "queued", "queued+sampled")
+    }
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'mode':<16}{'msg/s':>10}{'lag p50 ms':>12}{'lag p99 ms':>12}{'lag max ms':>12}{'lines':>8}")
+    for mode, result in results.items():
+        print(
+            f"{mode:<16}{result['messages_per_second']:>10.0f}{result['lag_p50_ms']:>12.3f}"
+            f"{result['lag_p99_ms']:>12.3f}{result['lag_max_ms']:>12.3f}{result['lines_written']:>8}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Decode cost per message: strict pydantic validation vs. the fast decoder.
+
+Both paths include what the pipeline does with a payload afterwards: building
+the template request sections and the sender metadata.
+
+    python -m benchmarks.payload_decode [--messages 20000] [--recipients 500]
+"""
+
+import argparse
+import json
+import time
+from typing import Callable, Dict, List
+
+from benchmarks.payloads import make_bodies
+
+from app.domain.decoding import _validate_recipient, decode_fast
+from app.domain.schemas import NotificationPayload
+
+
+def strict_path(body: bytes) -> None:
+    payload = NotificationPayload.model_validate_json(body)
+    payload.variables.model_dump(mode="json")
+    payload.metadata.model_dump(mode="json")
+    payload.metadata.model_dump(mode="json")
+
+
+def fast_path(body: bytes) -> None:
+    payload = decode_fast(body)
+    payload.variables_json()
+    payload.metadata_json()
+    payload.metadata_json()
+
+
+def measure(path: Callable[[bytes], None], bodies: List[bytes]) -> Dict[str, float]:
+    started = time.perf_counter()
+    for body in bodies:
+        path(body)
+    elapsed = time.perf_counter() - started
+    return {"us_per_message": elapsed * 1_000_000 / len(bodies), "messages_per_second": len(bodies) / elapsed}
+
+
+def run(messages: int, recipients: int) -> Dict[str, Dict[str, float]]:
+    bodies = make_bodies(messages, recipients)
+    for body in bodies[:100]:
+        strict_path(body)
+        fast_path(body)
+    _validate_recipient.cache_clear()
+    results = {"strict": measure(strict_path, bodies), "fast": measure(fast_path, bodies)}
+    results["fast"]["speedup"] = results["strict"]["us_per_message"] / results["fast"]["us_per_message"]
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=20000)
+    parser.add_argument("--recipients", type=int, default=500, help="distinct recipient addresses")
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    results = run(args.messages, args.recipients)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'path':<10}{'us/message':>14}{'messages/s':>14}")
+    for name, result in results.items():
+        print(f"{name:<10}{result['us_per_message']:>14.2f}{result['messages_per_second']:>14.0f}")
+    print(f"speedup: {results['fast']['speedup']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
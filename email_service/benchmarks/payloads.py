@@ -0,0 +1,36 @@
+import random
+import uuid
+from typing import List
+
+import orjson
+
+TEMPLATES = ["welcome_email", "password_reset", "order_shipped", "weekly_digest"]
+DOMAINS = ["gmail.com", "yahoo.com", "outlook.com", "example.org", "company.io"]
+
+
+def make_payload(index: int, recipients: int = 500, seed: int = 0) -> dict:
+    rng = random.Random(seed * 1_000_003 + index)
+    user = rng.randrange(recipients)
+    return {
+        "notification_type": "email",
+        "user_id": str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+        "template_code": rng.choice(TEMPLATES),
+        "variables": {
+            "name": f"User {user}",
+            "link": f"https://app.example.com/verify?token={rng.getrandbits(64):x}",
+            "meta": {"plan": rng.choice(["free", "pro", "team"]), "items": rng.randrange(10)},
+        },
+        "request_id": f"req-{seed}-{index}",
+        "priority": rng.choice([1, 5, 5, 5, 9]),
+        "metadata": {
+            "recipient_email": f"user{user}@{DOMAINS[user % len(DOMAINS)]}",
+            "locale": rng.choice(["en", "en", "fr", "de"]),
+            "correlation_id": f"corr-{index}",
+            "extra": {"subject": "Hello", "campaign": "spring"},
+        },
+    }
+
+
+def make_bodies(count: int, recipients: int = 500, seed: int = 0) -> List[bytes]:
+    # A realistic mix: a bounded recipient population, so repeat recipients occur.
+    return [orjson.dumps(make_payload(index, recipients, seed)) for index in range(count)]
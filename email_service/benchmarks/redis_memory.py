@@ -0,0 +1,122 @@
+"""Redis memory per notification: the original key layout vs the compact hash.
+
+Needs a real Redis, since the point is encoding overhead. Everything in the
+chosen database is deleted, so the script refuses to run against a non-empty
+one unless --flush is given.
+
+Run from the email_service directory:
+
+    python -m benchmarks.redis_memory --redis-url redis://localhost:6379/15 [--notifications 20000]
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from typing import Any, Dict
+
+from redis.asyncio import Redis
+
+from app.domain.schemas import NotificationStatus
+from app.infrastructure.status_repository import StatusRepository
+from app.services.email_transport import EmailTransportError
+
+TTL = 600
+FAILURE_EVERY = 10
+LEGACY_ERROR = (
+    "Bulk send failed: Cannot connect to host api.mail-provider.example:443 ssl:default "
+    "[Connect call failed ('203.0.113.10', 443)]"
+)
+
+
+async def legacy_notification(redis: Redis, request_id: str, failed: bool) -> None:
+    # The keys each notification left behind before the compact layout.
+    async with redis.pipeline(transaction=False) as pipe:
+        pipe.set(f"idempotency:{request_id}", "1", ex=TTL)
+        pipe.incr(f"retry_attempt:{request_id}")
+        pipe.expire(f"retry_attempt:{request_id}", TTL)
+        status = {"status": NotificationStatus.failed.value if failed else NotificationStatus.delivered.value}
+        if failed:
+            status["error"] = LEGACY_ERROR
+        pipe.hset(f"notification_status:{request_id}", mapping=status)
+        pipe.expire(f"notification_status:{request_id}", TTL)
+        await pipe.execute()
+
+
+async def compact_notification(repo: StatusRepository, request_id: str, failed: bool) -> None:
+    await repo.ensure_idempotent(request_id)
+    if failed:
+        await repo.set_status(request_id, NotificationStatus.failed, EmailTransportError(LEGACY_ERROR))
+    else:
+        await repo.set_status(request_id, NotificationStatus.delivered)
+
+
+async def used_memory(redis: Redis) -> int:
+    return int((await redis.info("memory"))["used_memory"])
+
+
+async def measure(redis: Redis, layout: str, notifications: int) -> Dict[str, Any]:
+    await redis.flushdb()
+    repo = StatusRepository(redis, ttl_seconds=TTL)
+    before = await used_memory(redis)
+    started = time.perf_counter()
+    for index in range(notifications):
+        request_id = f"7c9e6679-7425-40de-944b-e07fc1f9{index:04x}"
+        failed = index % FAILURE_EVERY == 0
+        if layout == "legacy":
+            await legacy_notification(redis, request_id, failed)
+        else:
+            await compact_notification(repo, request_id, failed)
+    elapsed = time.perf_counter() - started
+    after = await used_memory(redis)
+
+    keys = [key async for key in redis.scan_iter(count=1000)]
+    record_keys = [key for key in keys if not key.startswith("notification_index")]
+    record_bytes = 0
+    for key in record_keys:
+        record_bytes += await redis.memory_usage(key) or 0
+    encodings = sorted({await redis.object("encoding", key) for key in record_keys[:200]})
+    return {
+        "keys_per_notification": len(record_keys) / notifications,
+        "record_bytes_per_notification": record_bytes / notifications,
+        "used_memory_bytes_per_notification": (after - before) / notifications,
+        "record_encodings": encodings,
+        "writes_per_second": notifications / elapsed,
+    }
+
+
+async def run(url: str, notifications: int, flush: bool) -> Dict[str, Dict[str, Any]]:
+    redis = Redis.from_url(url, decode_responses=True)
+    try:
+        if await redis.dbsize() and not flush:
+            raise SystemExit(f"{url} is not empty; pass --flush to let the benchmark clear it")
+        results = {layout: await measure(redis, layout, notifications) for layout in ("legacy", "compact")}
+        await redis.flushdb()
+        return results
+    finally:
+        await redis.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--redis-url", default="redis://localhost:6379/15")
+    parser.add_argument("--notifications", type=int, default=20000)
+    parser.add_argument("--flush", action="store_true", help="clear the database even if it has data")
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args.redis_url, args.notifications, args.flush))
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'layout':<10}{'keys':>6}{'record B':>10}{'used_memory B':>15}  encodings")
+    for layout, result in results.items():
+        print(
+            f"{layout:<10}{result['keys_per_notification']:>6.1f}{result['record_bytes_per_notification']:>10.0f}"
+            f"{result['used_memory_bytes_per_notification']:>15.0f}  {','.join(result['record_encodings'])}"
+        )
+    print("used_memory for compact includes the time-ordered listing index.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""Redis round trips per message, before and after pipelining the per-stage calls.
+
+The retry attempt now travels in the x-retry-attempt header, so the "after"
+scenarios no longer touch a retry_attempt: counter.
+
+Run from the email_service directory:
+
+    python -m benchmarks.redis_round_trips [--latency-ms 0.5] [--messages 1000]
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from typing import Awaitable, Callable, Dict
+
+from benchmarks.fakes import InMemoryRedis
+
+from app.domain.schemas import NotificationStatus
+from app.infrastructure.status_repository import StatusRepository
+
+TTL = 600
+
+
+async def legacy_success(redis: InMemoryRedis, request_id: str) -> None:
+    # The sequence _process_message issued before pipelining.
+    if await redis.setnx(f"idempotency:{request_id}", "1"):
+        await redis.expire(f"idempotency:{request_id}", TTL)
+    await redis.incr(f"retry_attempt:{request_id}")
+    await redis.expire(f"retry_attempt:{request_id}", TTL)
+    await redis.delete(f"retry_attempt:{request_id}")
+    await redis.hset(f"notification_status:{request_id}", mapping={"status": "delivered"})
+    await redis.expire(f"notification_status:{request_id}", TTL)
+
+
+async def legacy_failure(redis: InMemoryRedis, request_id: str) -> None:
+    if await redis.setnx(f"idempotency:{request_id}", "1"):
+        await redis.expire(f"idempotency:{request_id}", TTL)
+    await redis.incr(f"retry_attempt:{request_id}")
+    await redis.expire(f"retry_attempt:{request_id}", TTL)
+    await redis.hset(f"notification_status:{request_id}", mapping={"status": "failed", "error": "boom"})
+    await redis.expire(f"notification_status:{request_id}", TTL)
+
+
+async def current_success(redis: InMemoryRedis, request_id: str) -> None:
+    repo = StatusRepository(redis, ttl_seconds=TTL)  # type: ignore[arg-type]
+    await repo.ensure_idempotent(request_id)
+    await repo.set_status(request_id, NotificationStatus.delivered)
+
+
+async def current_failure(redis: InMemoryRedis, request_id: str) -> None:
+    repo = StatusRepository(redis, ttl_seconds=TTL)  # type: ignore[arg-type]
+    await repo.ensure_idempotent(request_id)
+    await repo.set_status(request_id, NotificationStatus.failed, error="boom")
+
+
+async def measure(
+    scenario: Callable[[InMemoryRedis, str], Awaitable[None]], messages: int, latency: float
+) -> Dict[str, float]:
+    redis = InMemoryRedis(latency=latency)
+    started = time.perf_counter()
+    for index in range(messages):
+        await scenario(redis, f"req-{index}")
+    elapsed = time.perf_counter() - started
+    return {
+        "round_trips_per_message": redis.round_trips / messages,
+        "ms_per_message": elapsed * 1000 / messages,
+    }
+
+
+async def run(messages: int, latency: float) -> Dict[str, Dict[str, float]]:
+    scenarios = {
+        "success.before": legacy_success,
+        "success.after": current_success,
+        "failure.before": legacy_failure,
+        "failure.after": current_failure,
+    }
+    return {name: await measure(scenario, messages, latency) for name, scenario in scenarios.items()}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=1000)
+    parser.add_argument("--latency-ms", type=float, default=0.2, help="simulated Redis RTT")
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args.messages, args.latency_ms / 1000))
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'scenario':<16}{'round trips':>14}{'ms/message':>14}")
+    for name, result in results.items():
+        print(f"{name:<16}{result['round_trips_per_message']:>14.1f}{result['ms_per_message']:>14.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,280 @@
+"""Micro-benchmarks for each stage of the consumer hot path.
+
+Everything runs in-process against the stand-ins in benchmarks.fakes, so no
+Redis, RabbitMQ, template service or SMTP relay is needed. Results are
+written as JSON so runs from different commits can be compared:
+
+    python -m benchmarks.suite --output before.json
+    python -m benchmarks.suite --output after.json --compare before.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import structlog
+
+from benchmarks.fakes import (
+    FakeExchange,
+    FakeHTTPSession,
+    FakeIncomingMessage,
+    FakeSMTPClient,
+    InMemoryRedis,
+)
+from benchmarks.payloads import make_bodies
+
+from app.domain.decoding import decode_fast, decode_strict
+from app.domain.schemas import NotificationStatus
+from app.infrastructure.smtp_pool import SMTPConnectionPool
+from app.infrastructure.status_repository import StatusRepository
+from app.infrastructure.template_client import TemplateClient
+from app.services.circuit_breaker import AsyncCircuitBreaker
+from app.services.email_consumer import EmailQueueConsumer
+from app.services.email_sender import EmailSender
+from app.services.status_publisher import StatusEventPublisher
+
+# A benchmark receives the iteration count and returns a coroutine factory per
+# iteration index; only the awaited coroutine is timed.
+Operation = Callable[[int], Awaitable[Any]]
+Setup = Callable[[int], Awaitable[Operation]]
+
+BENCHMARKS: Dict[str, Setup] = {}
+
+
+def benchmark(name: str) -> Callable[[Setup], Setup]:
+    def register(setup: Setup) -> Setup:
+        BENCHMARKS[name] = setup
+        return setup
+
+    return register
+
+
+def _sync(func: Callable[[int], Any]) -> Operation:
+    async def operation(index: int) -> Any:
+        return func(index)
+
+    return operation
+
+
+@benchmark("decode.strict")
+async def setup_decode_strict(iterations: int) -> Operation:
+    bodies = make_bodies(iterations)
+    return _sync(lambda index: decode_strict(bodies[index]))
+
+
+@benchmark("decode.fast")
+async def setup_decode_fast(iterations: int) -> Operation:
+    bodies = make_bodies(iterations)
+    return _sync(lambda index: decode_fast(bodies[index]))
+
+
+@benchmark("status_repository.ensure_idempotent")
+async def setup_ensure_idempotent(iterations: int) -> Operation:
+    repo = StatusRepository(InMemoryRedis(), ttl_seconds=600)  # type: ignore[arg-type]
+    return lambda index: repo.ensure_idempotent(f"req-{index}")
+
+
+@benchmark("status_repository.ensure_idempotent_seen")
+async def setup_ensure_idempotent_seen(iterations: int) -> Operation:
+    # A redelivery storm: every id has already been delivered by this process.
+    repo = StatusRepository(InMemoryRedis(latency=0.0002), ttl_seconds=600, local_cache_size=iterations)  # type: ignore[arg-type]
+    for index in range(iterations):
+        await repo.ensure_idempotent(f"req-{index}")
+        await repo.set_status(f"req-{index}", NotificationStatus.delivered)
+    return lambda index: repo.ensure_idempotent(f"req-{index}")
+
+
+@benchmark("status_repository.set_status")
+async def setup_set_status(iterations: int) -> Operation:
+    repo = StatusRepository(InMemoryRedis(), ttl_seconds=600)  # type: ignore[arg-type]
+    return lambda index: repo.set_status(f"req-{index}", NotificationStatus.delivered)
+
+
+@benchmark("status_repository.get_status")
+async def setup_get_status(iterations: int) -> Operation:
+    repo = StatusRepository(InMemoryRedis(), ttl_seconds=600)  # type: ignore[arg-type]
+    for index in range(iterations):
+        await repo.set_status(f"req-{index}", NotificationStatus.delivered)
+    return lambda index: repo.get_status(f"req-{index}")
+
+
+@benchmark("retry.schedule")
+async def setup_retry_schedule(iterations: int) -> Operation:
+    consumer = _consumer()
+    consumer.retry_exchange = FakeExchange()  # type: ignore[assignment]
+    bodies = make_bodies(iterations)
+    error = RuntimeError("template service unavailable")
+
+    async def operation(index: int) -> Any:
+        message = FakeIncomingMessage(bodies[index], headers={"x-retry-attempt": index % 3})
+        return await consumer._schedule_retry(message, message.headers, error, 5)  # type: ignore[arg-type]
+
+    return operation
+
+
+@benchmark("circuit_breaker.direct")
+async def setup_breaker_baseline(iterations: int) -> Operation:
+    async def work() -> int:
+        return 1
+
+    return lambda index: work()
+
+
+@benchmark("circuit_breaker.call")
+async def setup_breaker_call(iterations: int) -> Operation:
+    breaker = AsyncCircuitBreaker(name="benchmark")
+
+    async def work() -> int:
+        return 1
+
+    return lambda index: breaker.call(work)
+
+
+@benchmark("template_client.render_remote")
+async def setup_render_remote(iterations: int) -> Operation:
+    client = TemplateClient(session=FakeHTTPSession(), mode="remote")  # type: ignore[arg-type]
+    payloads = [decode_strict(body) for body in make_bodies(iterations)]
+    return lambda index: client.render(payloads[index])
+
+
+@benchmark("template_client.render_local")
+async def setup_render_local(iterations: int) -> Operation:
+    client = TemplateClient(session=FakeHTTPSession(), mode="local")  # type: ignore[arg-type]
+    payloads = [decode_strict(body) for body in make_bodies(iterations)]
+    return lambda index: client.render(payloads[index])
+
+
+@benchmark("email_sender.send")
+async def setup_sender_send(iterations: int) -> Operation:
+    pool = SMTPConnectionPool(size=4)
+    pool._create_client = FakeSMTPClient  # type: ignore[method-assign]
+    sender = EmailSender(pool)
+    return lambda index: sender.send(f"user{index}@example.com", "Hello", "Body", {})
+
+
+@benchmark("consumer.process_message")
+async def setup_process_message(iterations: int) -> Operation:
+    consumer = _consumer()
+    bodies = make_bodies(iterations)
+    return lambda index: consumer._process_message(FakeIncomingMessage(bodies[index], index + 1))  # type: ignore[arg-type]
+
+
+def _consumer() -> EmailQueueConsumer:
+    pool = SMTPConnectionPool(size=4)
+    pool._create_client = FakeSMTPClient  # type: ignore[method-assign]
+    return EmailQueueConsumer(
+        status_repo=StatusRepository(InMemoryRedis(), ttl_seconds=600),  # type: ignore[arg-type]
+        template_client=TemplateClient(session=FakeHTTPSession(), mode="remote"),  # type: ignore[arg-type]
+        sender=EmailSender(pool),
+        status_publisher=StatusEventPublisher(exchange_name=""),
+    )
+
+
+async def measure(setup: Setup, iterations: int, warmup: int) -> Dict[str, float]:
+    operation = await setup(iterations + warmup)
+    for index in range(warmup):
+        await operation(iterations + index)
+
+    timings: List[float] = []
+    clock = time.perf_counter
+    started = clock()
+    for index in range(iterations):
+        op_started = clock()
+        await operation(index)
+        timings.append(clock() - op_started)
+    total = clock() - started
+
+    timings.sort()
+    return {
+        "iterations": iterations,
+        "ops_per_second": iterations / total,
+        "mean_us": statistics.fmean(timings) * 1e6,
+        "p50_us": timings[len(timings) // 2] * 1e6,
+        "p99_us": timings[min(len(timings) - 1, int(len(timings) * 0.99))] * 1e6,
+    }
+
+
+def _commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run(names: List[str], iterations: int, warmup: int) -> Dict[str, Any]:
+    results = {name: await measure(BENCHMARKS[name], iterations, warmup) for name in names}
+    return {
+        "meta": {
+            "commit": _commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "iterations": iterations,
+        },
+        "results": results,
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    regressions = []
+    # Medians are compared: they are far less sensitive to scheduler noise than means.
+    print(f"\n{'benchmark':<40}{'baseline p50':>14}{'current p50':>14}{'change':>10}")
+    for name, result in current["results"].items():
+        previous = baseline.get("results", {}).get(name)
+        if previous is None:
+            continue
+        change = result["p50_us"] / previous["p50_us"] - 1
+        marker = "  REGRESSION" if change > threshold else ""
+        print(f"{name:<40}{previous['p50_us']:>14.2f}{result['p50_us']:>14.2f}{change:>+10.1%}{marker}")
+        if change > threshold:
+            regressions.append(name)
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=5000)
+    parser.add_argument("--warmup", type=int, default=200)
+    parser.add_argument("--only", nargs="*", help="benchmark names or prefixes to run")
+    parser.add_argument("--output", help="write JSON results to this file")
+    parser.add_argument("--compare", help="baseline JSON file from a previous run")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed p50 slowdown before failing")
+    parser.add_argument("--with-logging", action="store_true", help="keep structlog output enabled")
+    args = parser.parse_args()
+
+    if not args.with_logging:
+        structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.CRITICAL))
+
+    names = [name for name in BENCHMARKS if not args.only or any(name.startswith(prefix) for prefix in args.only)]
+    current = asyncio.run(run(names, args.iterations, args.warmup))
+
+    print(f"{'benchmark':<40}{'mean us':>12}{'p50 us':>12}{'p99 us':>12}{'ops/s':>12}")
+    for name, result in current["results"].items():
+        print(
+            f"{name:<40}{result['mean_us']:>12.2f}{result['p50_us']:>12.2f}"
+            f"{result['p99_us']:>12.2f}{result['ops_per_second']:>12.0f}"
+        )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            json.dump(current, handle, indent=2)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as handle:
+            baseline = json.load(handle)
+        if compare(current, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
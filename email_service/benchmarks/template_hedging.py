@@ -0,0 +1,123 @@
+"""Render latency with a stalling template-service instance, with and without hedging.
+
+The fake backend answers in --latency-ms, except that --stall-rate of requests
+land on a stalled instance and take --stall-ms. Adaptive timeouts apply to both
+runs; hedging is only enabled for the second.
+
+Run from the email_service directory:
+
+    python -m benchmarks.template_hedging [--renders 3000] [--stall-rate 0.02]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import random
+import statistics
+import time
+from typing import Any, Dict, List
+
+import aiohttp
+import structlog
+
+from benchmarks.fakes import FakeResponse
+from benchmarks.payloads import make_bodies
+
+from app.domain.decoding import decode_strict
+from app.infrastructure.template_client import TemplateClient
+
+
+class StallingSession:
+    def __init__(self, latency: float, stall: float, stall_rate: float, seed: int = 0) -> None:
+        self.latency = latency
+        self.stall = stall
+        self.stall_rate = stall_rate
+        self.rng = random.Random(seed)
+        self.requests = 0
+        self.closed = False
+
+    def post(self, url: str, timeout: Any = None, **kwargs: Any) -> "_DelayedResponse":
+        self.requests += 1
+        delay = self.stall if self.rng.random() < self.stall_rate else self.latency
+        limit = timeout.total if isinstance(timeout, aiohttp.ClientTimeout) else None
+        return _DelayedResponse(delay, limit)
+
+
+class _DelayedResponse(FakeResponse):
+    def __init__(self, delay: float, limit: Any) -> None:
+        super().__init__({"subject": "Hello", "body": "Rendered body"})
+        self.delay = delay
+        self.limit = limit
+
+    async def __aenter__(self) -> FakeResponse:
+        if self.limit is not None and self.delay > self.limit:
+            await asyncio.sleep(self.limit)
+            raise asyncio.TimeoutError()
+        await asyncio.sleep(self.delay)
+        return self
+
+
+async def run(hedging: bool, renders: int, concurrency: int, args: argparse.Namespace) -> Dict[str, Any]:
+    session = StallingSession(args.latency_ms / 1000, args.stall_ms / 1000, args.stall_rate)
+    client = TemplateClient(session=session, mode="remote")  # type: ignore[arg-type]
+    client.hedging = hedging
+    payloads = [decode_strict(body) for body in make_bodies(renders)]
+    latencies: List[float] = []
+    errors = 0
+    hedges = client.hedge_budget
+
+    work = iter(payloads)
+
+    async def worker() -> None:
+        nonlocal errors
+        for payload in work:
+            started = time.perf_counter()
+            try:
+                await client.render(payload)
+            except asyncio.TimeoutError:
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    latencies.sort()
+    return {
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99)] * 1000,
+        "max_ms": latencies[-1] * 1000,
+        "timeouts": errors,
+        "backend_requests": session.requests,
+        "extra_load": session.requests / renders - 1,
+        "final_timeout_ms": client.request_timeout() * 1000,
+        "budget_tokens_left": hedges.tokens,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--renders", type=int, default=3000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--latency-ms", type=float, default=5)
+    parser.add_argument("--stall-ms", type=float, default=2000)
+    parser.add_argument("--stall-rate", type=float, default=0.02)
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+    structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.CRITICAL))
+
+    results = {
+        mode: asyncio.run(run(mode == "hedged", args.renders, args.concurrency, args))
+        for mode in ("adaptive_timeout", "hedged")
+    }
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'mode':<18}{'p50 ms':>9}{'p99 ms':>9}{'max ms':>9}{'timeouts':>10}{'extra load':>12}{'timeout ms':>12}")
+    for mode, result in results.items():
+        print(
+            f"{mode:<18}{result['p50_ms']:>9.1f}{result['p99_ms']:>9.1f}{result['max_ms']:>9.1f}"
+            f"{result['timeouts']:>10}{result['extra_load']:>12.1%}{result['final_timeout_ms']:>12.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
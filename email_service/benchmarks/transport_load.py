@@ -0,0 +1,109 @@
+"""Load test of the SMTP and HTTP bulk transports against local fake servers.
+
+Drives `send()` from many concurrent callers, the way per-message consumers do,
+and reports throughput, requests or transactions made, and per-send latency.
+
+Run from the email_service directory:
+
+    python -m benchmarks.transport_load [--messages 2000] [--concurrency 50] [--latency-ms 5]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import statistics
+import time
+from typing import Any, Dict, List
+
+import aiosmtplib
+import structlog
+
+from benchmarks.fake_servers import FakeBulkMailAPI, FakeSMTPServer
+
+from app.infrastructure.smtp_pool import SMTPConnectionPool
+from app.services.email_sender import EmailSender
+from app.services.email_transport import EmailTransport
+from app.services.http_transport import HTTPBulkTransport
+
+
+async def drive(transport: EmailTransport, messages: int, concurrency: int) -> Dict[str, Any]:
+    latencies: List[float] = []
+    errors = 0
+    counter = iter(range(messages))
+
+    async def worker() -> None:
+        nonlocal errors
+        for index in counter:
+            started = time.perf_counter()
+            try:
+                await transport.send(f"user{index}@example.com", "Hello", f"Body {index}", {"index": index})
+            except Exception:
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "messages_per_second": messages / elapsed,
+        "latency_p50_ms": statistics.median(latencies) * 1000,
+        "latency_p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+        "errors": errors,
+    }
+
+
+async def run_smtp(messages: int, concurrency: int, latency: float, pool_size: int) -> Dict[str, Any]:
+    server = FakeSMTPServer(latency)
+    await server.start()
+    pool = SMTPConnectionPool(size=pool_size, max_messages=10_000)
+    pool._create_client = lambda: aiosmtplib.SMTP(  # type: ignore[method-assign]
+        hostname="127.0.0.1", port=server.port, username="bench", password="bench", start_tls=False
+    )
+    transport = EmailSender(pool)
+    result = await drive(transport, messages, concurrency)
+    await transport.close()
+    await server.stop()
+    return {**result, "server_transactions": server.messages, "connections": server.connections}
+
+
+async def run_http(messages: int, concurrency: int, latency: float, pool_size: int) -> Dict[str, Any]:
+    api = FakeBulkMailAPI(latency)
+    await api.start()
+    transport = HTTPBulkTransport(url=api.url, token="bench")
+    transport._slots = asyncio.Semaphore(pool_size)
+    result = await drive(transport, messages, concurrency)
+    await transport.close()
+    await api.stop()
+    return {**result, "server_transactions": api.requests, "connections": None}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency-ms", type=float, default=5, help="per SMTP message / per HTTP request")
+    parser.add_argument("--pool-size", type=int, default=5, help="SMTP sessions / concurrent HTTP requests")
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+    structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.CRITICAL))
+
+    latency = args.latency_ms / 1000
+    results = {
+        "smtp": asyncio.run(run_smtp(args.messages, args.concurrency, latency, args.pool_size)),
+        "http_bulk": asyncio.run(run_http(args.messages, args.concurrency, latency, args.pool_size)),
+    }
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'transport':<12}{'msg/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'server txns':>13}{'errors':>8}")
+    for name, result in results.items():
+        print(
+            f"{name:<12}{result['messages_per_second']:>10.0f}{result['latency_p50_ms']:>10.2f}"
+            f"{result['latency_p99_ms']:>10.2f}{result['server_transactions']:>13}{result['errors']:>8}"
+        )
+
+
+if __name__ == "__main__":
+    main()
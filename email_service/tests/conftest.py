@@ -1,2 +1,29 @@
-#
+import os
 
+# Settings are read at import time; give the required ones harmless values.
+for name, value in {
+    "REDIS_URL": "redis://localhost:6379/15",
+    "TEMPLATE_SERVICE_URL": "http://localhost:9000",
+    "TEMPLATE_SERVICE_TOKEN": "test-token",
+    "SMTP_HOST": "localhost",
+    "SMTP_USERNAME": "noreply@example.com",
+    "SMTP_PASSWORD": "test-password",
+    "USER_SERVICE_API_KEY": "test-key",
+}.items():
+    os.environ.setdefault(name, value)
+
+import pytest  # noqa: E402
+
+from benchmarks.fakes import InMemoryRedis  # noqa: E402
+
+from app.infrastructure.status_repository import StatusRepository  # noqa: E402
+
+
+@pytest.fixture
+def redis() -> InMemoryRedis:
+    return InMemoryRedis()
+
+
+@pytest.fixture
+def status_repo(redis: InMemoryRedis) -> StatusRepository:
+    return StatusRepository(redis, ttl_seconds=600)  # type: ignore[arg-type]
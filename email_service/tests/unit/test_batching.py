@@ -0,0 +1,340 @@
+import asyncio
+import json
+from contextlib import asynccontextmanager
+from datetime import timedelta
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Tuple
+
+import aiosmtplib
+import pytest
+from aio_pika import DeliveryMode
+
+from app.services.batching import MicroBatcher
+from app.services.email_consumer import EmailQueueConsumer
+from app.services.email_sender import EmailSender
+from app.services.email_transport import EmailTransportError
+
+
+class Delivery:
+    def __init__(self, settled: List[Tuple[int, str, bool]], delivery_tag: int, body: bytes) -> None:
+        self.settled = settled
+        self.delivery_tag = delivery_tag
+        self.body = body
+        self.headers: Dict[str, Any] = {}
+        self.delivery_mode = DeliveryMode.PERSISTENT
+        self.priority = None
+        self.timestamp = None
+        self.content_type = "application/json"
+        self.content_encoding = None
+        self.channel = None
+
+    async def ack(self, multiple: bool = False) -> None:
+        self.settled.append((self.delivery_tag, "ack", multiple))
+
+    async def reject(self, requeue: bool = False) -> None:
+        self.settled.append((self.delivery_tag, "reject", requeue))
+
+    async def nack(self, multiple: bool = False, requeue: bool = True) -> None:
+        self.settled.append((self.delivery_tag, "nack", requeue))
+
+
+class StatusStore:
+    def __init__(self, known: Iterable[str] = (), error: Optional[Exception] = None) -> None:
+        self.known = set(known)
+        self.error = error
+        self.statuses: Dict[str, str] = {}
+
+    async def ensure_idempotent_many(self, request_ids: List[str]) -> List[bool]:
+        duplicates = [request_id in self.known for request_id in request_ids]
+        self.known.update(request_ids)
+        return duplicates
+
+    async def set_statuses(self, updates: List[Tuple[str, Any, Optional[str]]]) -> None:
+        if self.error is not None:
+            raise self.error
+        for request_id, status, _ in updates:
+            self.statuses[request_id] = status.value
+
+
+class Templates:
+    async def render(self, payload: Any, correlation_id: Optional[str] = None) -> Dict[str, Any]:
+        return {"subject": "Welcome", "body": f"Hello {payload.variables.name}"}
+
+
+class Sender:
+    def __init__(self, failing: Iterable[str] = (), error: Optional[Exception] = None) -> None:
+        self.failing = set(failing)
+        self.error = error or RuntimeError("mailbox full")
+        self.sent: List[str] = []
+
+    def build_message(self, recipient: str, subject: str, body: str) -> str:
+        return recipient
+
+    async def send_many(self, messages: List[str], metadata: List[Dict[str, Any]]) -> List[Optional[Exception]]:
+        assert [item["recipient_email"] for item in metadata] == messages
+        self.sent.extend(messages)
+        return [self.error if recipient in self.failing else None for recipient in messages]
+
+
+class RecordingExchange:
+    def __init__(self) -> None:
+        self.is_closed = False
+        self.published: List[Any] = []
+
+    async def publish(self, message: Any, routing_key: str, **kwargs: Any) -> None:
+        self.published.append(message)
+
+
+def payload(request_id: str) -> bytes:
+    return json.dumps(
+        {
+            "notification_type": "email",
+            "user_id": "6a1f43d2-4c8a-4b8e-9d55-3f2d1c7e8a90",
+            "template_code": "welcome",
+            "variables": {"name": "Ada", "link": "https://example.com"},
+            "request_id": request_id,
+            "metadata": {"recipient_email": f"{request_id}@example.com"},
+        }
+    ).encode()
+
+
+def make_consumer(status_repo: StatusStore, sender: Sender) -> EmailQueueConsumer:
+    consumer = EmailQueueConsumer(status_repo=status_repo, template_client=Templates(), sender=sender)  # type: ignore[arg-type]
+    consumer.retry_exchange = RecordingExchange()
+    return consumer
+
+
+async def test_batcher_flushes_when_full():
+    batches: List[List[int]] = []
+
+    async def handler(batch: List[int]) -> None:
+        batches.append(batch)
+
+    batcher: MicroBatcher[int] = MicroBatcher(handler, max_size=3, max_wait=10)
+    batcher.start()
+    for item in range(4):
+        await batcher.add(item)
+    await asyncio.sleep(0.01)
+    await batcher.stop()
+
+    assert batches == [[0, 1, 2]]
+
+
+async def test_batcher_flushes_a_partial_batch_after_max_wait():
+    batches: List[List[int]] = []
+
+    async def handler(batch: List[int]) -> None:
+        batches.append(batch)
+
+    batcher: MicroBatcher[int] = MicroBatcher(handler, max_size=10, max_wait=0.01)
+    batcher.start()
+    await batcher.add(1)
+    await batcher.add(2)
+    await asyncio.sleep(0.05)
+    await batcher.stop()
+
+    assert batches == [[1, 2]]
+
+
+async def test_batcher_keeps_running_after_a_failed_batch():
+    batches: List[List[int]] = []
+
+    async def handler(batch: List[int]) -> None:
+        batches.append(batch)
+        if len(batches) == 1:
+            raise RuntimeError("boom")
+
+    batcher: MicroBatcher[int] = MicroBatcher(handler, max_size=1, max_wait=0)
+    batcher.start()
+    await batcher.add(1)
+    await batcher.add(2)
+    await asyncio.sleep(0.01)
+    await batcher.stop()
+
+    assert batches == [[1], [2]]
+
+
+async def test_rejects_are_settled_first_and_the_rest_acked_cumulatively():
+    settled: List[Tuple[int, str, bool]] = []
+    status_repo = StatusStore()
+    sender = Sender(failing=["req-3@example.com"])
+    consumer = make_consumer(status_repo, sender)
+    messages = [
+        Delivery(settled, 1, b"not json"),
+        Delivery(settled, 2, payload("req-2")),
+        Delivery(settled, 3, payload("req-3")),
+        Delivery(settled, 4, payload("req-4")),
+    ]
+
+    await consumer._process_batch(messages)  # type: ignore[arg-type]
+
+    # req-3 was re-published to a retry queue, so the cumulative ack covers it too.
+    assert settled == [(1, "reject", False), (4, "ack", True)]
+    assert status_repo.statuses == {"req-2": "delivered", "req-4": "delivered", "req-3": "failed"}
+    [retry] = consumer.retry_exchange.published
+    assert retry.body == messages[2].body
+    assert retry.headers["x-error"] == "mailbox full"
+
+
+async def test_failure_out_of_retries_is_rejected(mocker):
+    mocker.patch("app.services.retry._settings.retry_max_attempts", 1)
+    settled: List[Tuple[int, str, bool]] = []
+    consumer = make_consumer(StatusStore(), Sender(failing=["req-1@example.com"]))
+    message = Delivery(settled, 1, payload("req-1"))
+    message.headers = {"x-retry-attempt": 1}
+
+    await consumer._process_batch([message])  # type: ignore[list-item]
+
+    assert settled == [(1, "reject", False)]
+    assert consumer.retry_exchange.published == []
+
+
+async def test_duplicates_are_acked_without_sending():
+    settled: List[Tuple[int, str, bool]] = []
+    sender = Sender()
+    consumer = make_consumer(StatusStore(known=["req-1"]), sender)
+    messages = [Delivery(settled, 1, payload("req-1")), Delivery(settled, 2, payload("req-2"))]
+
+    await consumer._process_batch(messages)  # type: ignore[arg-type]
+
+    assert sender.sent == ["req-2@example.com"]
+    assert settled == [(2, "ack", True)]
+
+
+async def test_open_domain_breaker_fails_its_messages_without_sending():
+    settled: List[Tuple[int, str, bool]] = []
+    status_repo = StatusStore()
+    sender = Sender()
+    consumer = make_consumer(status_repo, sender)
+    guard = consumer.domain_guards.get("req-1@example.com")
+    for _ in range(guard.breaker.breaker.fail_max):
+        await guard.breaker.record(RuntimeError("mailbox full"))
+    messages = [Delivery(settled, 1, payload("req-1")), Delivery(settled, 2, payload("req-2"))]
+    messages[1].body = messages[1].body.replace(b"req-2@example.com", b"req-2@example.org")
+
+    await consumer._process_batch(messages)  # type: ignore[arg-type]
+
+    assert sender.sent == ["req-2@example.org"]
+    assert status_repo.statuses == {"req-1": "failed", "req-2": "delivered"}
+    [retry] = consumer.retry_exchange.published
+    assert "smtp:example.com" in retry.headers["x-error"]
+    assert settled == [(2, "ack", True)]
+
+
+async def test_one_message_probes_a_domain_past_its_reset_timeout():
+    settled: List[Tuple[int, str, bool]] = []
+    status_repo = StatusStore()
+    sender = Sender()
+    consumer = make_consumer(status_repo, sender)
+    guard = consumer.domain_guards.get("req-1@example.com")
+    for _ in range(guard.breaker.breaker.fail_max):
+        await guard.breaker.record(RuntimeError("mailbox full"))
+    guard.breaker.breaker.timeout_duration = timedelta(0)
+    messages = [Delivery(settled, 1, payload("req-1")), Delivery(settled, 2, payload("req-2"))]
+
+    await consumer._process_batch(messages)  # type: ignore[arg-type]
+
+    assert sender.sent == ["req-1@example.com"]
+    assert status_repo.statuses == {"req-1": "delivered", "req-2": "failed"}
+    assert guard.breaker.is_closed
+
+
+async def test_relay_failure_of_the_whole_batch_counts_against_the_smtp_breaker():
+    settled: List[Tuple[int, str, bool]] = []
+    recipients = ["req-1@example.com", "req-2@example.org"]
+    consumer = make_consumer(StatusStore(), Sender(failing=recipients, error=EmailTransportError("relay down")))
+    messages = [Delivery(settled, 1, payload("req-1")), Delivery(settled, 2, payload("req-2"))]
+    messages[1].body = messages[1].body.replace(b"req-2@example.com", b"req-2@example.org")
+
+    await consumer._process_batch(messages)  # type: ignore[arg-type]
+
+    assert consumer.smtp_breaker.breaker.fail_counter == 1
+    assert all(consumer.domain_guards.get(recipient).breaker.breaker.fail_counter == 0 for recipient in recipients)
+    assert len(consumer.retry_exchange.published) == 2
+    assert settled == [(2, "ack", True)]
+
+
+async def test_batch_that_raises_rejects_its_unsettled_deliveries():
+    settled: List[Tuple[int, str, bool]] = []
+    consumer = make_consumer(StatusStore(error=ConnectionError("redis down")), Sender())
+    messages = [Delivery(settled, 1, payload("req-1")), Delivery(settled, 2, payload("req-2"))]
+
+    with pytest.raises(ConnectionError):
+        await consumer._process_batch(messages)  # type: ignore[arg-type]
+
+    assert settled == [(1, "reject", False), (2, "reject", False)]
+
+
+async def test_batch_that_raises_acks_what_was_already_decided():
+    settled: List[Tuple[int, str, bool]] = []
+    status_repo = StatusStore(known=["req-1"], error=ConnectionError("redis down"))
+    consumer = make_consumer(status_repo, Sender())
+    messages = [Delivery(settled, 1, payload("req-1")), Delivery(settled, 2, payload("req-2"))]
+
+    with pytest.raises(ConnectionError):
+        await consumer._process_batch(messages)  # type: ignore[arg-type]
+
+    # The duplicate needs no send, so it is acked on its own rather than dead-lettered.
+    assert settled == [(1, "ack", False), (2, "reject", False)]
+
+    # A later batch's cumulative ack then only covers deliveries that are already settled.
+    status_repo.error = None
+    later = Delivery(settled, 3, payload("req-3"))
+    await consumer._process_batch([later])  # type: ignore[list-item]
+    assert settled[-1] == (3, "ack", True)
+    assert status_repo.statuses == {"req-3": "delivered"}
+
+
+class Session:
+    def __init__(self, sent: List[str], drop_on: Optional[str]) -> None:
+        self.client = self
+        self.sent = sent
+        self.drop_on = drop_on
+
+    async def send_message(self, message: str) -> None:
+        if message == self.drop_on:
+            raise aiosmtplib.SMTPServerDisconnected("connection lost")
+        self.sent.append(message)
+
+    def mark_used(self) -> None:
+        pass
+
+    def is_expired(self, max_messages: int, max_age: float) -> bool:
+        return False
+
+
+class Pool:
+    max_messages = 100
+    max_age = 300.0
+
+    def __init__(self, connect_error: Optional[Exception] = None, drop_on: Optional[str] = None) -> None:
+        self.connect_error = connect_error
+        self.drop_on = drop_on
+        self.checkouts = 0
+        self.sent: List[str] = []
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[Session]:
+        self.checkouts += 1
+        if self.connect_error is not None:
+            raise self.connect_error
+        yield Session(self.sent, self.drop_on)
+
+
+async def test_send_many_fails_the_rest_of_the_batch_when_no_session_opens():
+    error = aiosmtplib.SMTPConnectTimeoutError("timed out connecting")
+    pool = Pool(connect_error=error)
+
+    results = await EmailSender(pool).send_many(["a", "b", "c"])  # type: ignore[arg-type, list-item]
+
+    assert results == [error, error, error]
+    assert pool.checkouts == 1
+
+
+async def test_send_many_moves_to_a_new_session_when_one_drops():
+    pool = Pool(drop_on="b")
+
+    results = await EmailSender(pool).send_many(["a", "b", "c"])  # type: ignore[arg-type, list-item]
+
+    assert [type(error) for error in results] == [type(None), aiosmtplib.SMTPServerDisconnected, type(None)]
+    assert pool.sent == ["a", "c"]
+    assert pool.checkouts == 2
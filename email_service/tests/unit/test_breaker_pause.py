@@ -0,0 +1,118 @@
+import asyncio
+from datetime import timedelta
+from typing import List
+
+import pytest
+
+from app.services.breaker_pause import PAUSED, PROBING, RUNNING, BreakerPause
+from app.services.circuit_breaker import AsyncCircuitBreaker
+
+RESET_TIMEOUT = 0.05
+
+
+class Transitions:
+    def __init__(self) -> None:
+        self.events: List[str] = []
+        self.controller = BreakerPause(self.pause, self.probe, self.resume)
+
+    async def pause(self) -> None:
+        self.events.append("pause")
+
+    async def probe(self) -> None:
+        self.events.append("probe")
+
+    async def resume(self) -> None:
+        self.events.append("resume")
+
+
+def make_breaker(name: str) -> AsyncCircuitBreaker:
+    breaker = AsyncCircuitBreaker(fail_max=2, name=name, report_state=False)
+    breaker.breaker.timeout_duration = timedelta(seconds=RESET_TIMEOUT)
+    return breaker
+
+
+async def trip(breaker: AsyncCircuitBreaker) -> None:
+    for _ in range(2):
+        await breaker.record(RuntimeError("down"))
+    await settle()
+
+
+async def settle() -> None:
+    # Transitions run as tasks spawned from the breaker's listener.
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+@pytest.fixture
+async def transitions():
+    transitions = Transitions()
+    yield transitions
+    await transitions.controller.stop()
+
+
+async def test_open_breaker_pauses_then_probes_then_resumes(transitions):
+    pause = transitions.controller
+    breaker = make_breaker("smtp")
+    pause.watch(breaker)
+
+    await trip(breaker)
+    assert pause.paused
+    assert transitions.events == ["pause"]
+
+    await asyncio.sleep(RESET_TIMEOUT * 2)
+    assert pause.state == PROBING
+    assert transitions.events == ["pause", "probe"]
+
+    # The first call after the reset timeout half-opens the breaker; success closes it.
+    await breaker.record(None)
+    await settle()
+    assert pause.state == RUNNING
+    assert transitions.events == ["pause", "probe", "resume"]
+
+
+async def test_failed_probe_pauses_again(transitions):
+    pause = transitions.controller
+    breaker = make_breaker("smtp")
+    pause.watch(breaker)
+    await trip(breaker)
+    await asyncio.sleep(RESET_TIMEOUT * 2)
+
+    await breaker.record(RuntimeError("still down"))
+    await settle()
+
+    assert pause.state == PAUSED
+    assert transitions.events == ["pause", "probe", "pause"]
+
+
+async def test_resumes_only_once_every_breaker_is_closed(transitions):
+    pause = transitions.controller
+    template = make_breaker("template")
+    smtp = make_breaker("smtp")
+    pause.watch(template)
+    pause.watch(smtp)
+    await trip(template)
+    await trip(smtp)
+    assert transitions.events == ["pause"]
+    await asyncio.sleep(RESET_TIMEOUT * 2)
+
+    await template.record(None)
+    await settle()
+    assert pause.state == PROBING
+
+    await smtp.record(None)
+    await settle()
+    assert pause.state == RUNNING
+    assert transitions.events == ["pause", "probe", "resume"]
+
+
+async def test_stop_cancels_the_pending_probe(transitions):
+    pause = transitions.controller
+    breaker = make_breaker("smtp")
+    pause.watch(breaker)
+    await trip(breaker)
+
+    await pause.stop()
+    await asyncio.sleep(RESET_TIMEOUT * 2)
+
+    assert pause.state == RUNNING
+    assert transitions.events == ["pause"]
@@ -1,2 +1,138 @@
-#
+import asyncio
+from datetime import timedelta
 
+import pytest
+from aiobreaker import CircuitBreakerError
+
+from app.services.circuit_breaker import AsyncCircuitBreaker, DomainGuardRegistry
+from app.services.rate_limiter import TokenBucket
+
+
+class RelayDown(Exception):
+    pass
+
+
+async def fail() -> None:
+    raise RuntimeError("mailbox full")
+
+
+def make_registry(**kwargs) -> DomainGuardRegistry:
+    options = {"rate_limits": {}, "default_rate": 0, "burst": 5, "idle_timeout": 60, "max_domains": 10}
+    options.update(kwargs)
+    return DomainGuardRegistry(**options)
+
+
+def test_bucket_allows_a_burst_then_refills_at_the_rate(mocker):
+    clock = mocker.patch("app.services.rate_limiter.time.monotonic", return_value=100.0)
+    bucket = TokenBucket(rate=2, capacity=3)
+
+    assert [bucket.try_acquire() for _ in range(4)] == [True, True, True, False]
+
+    clock.return_value = 100.5
+    assert bucket.try_acquire()
+    assert not bucket.try_acquire()
+
+    clock.return_value = 110.0
+    assert bucket.tokens == 0
+    bucket.try_acquire()
+    assert bucket.tokens == 2
+
+
+async def test_bucket_acquire_waits_for_the_next_token():
+    bucket = TokenBucket(rate=50, capacity=1)
+    loop = asyncio.get_running_loop()
+    await bucket.acquire()
+
+    started = loop.time()
+    await bucket.acquire()
+
+    assert loop.time() - started >= 0.015
+
+
+async def test_breaker_opens_after_fail_max():
+    breaker = AsyncCircuitBreaker(fail_max=2, reset_timeout=60, name="smtp:example.com")
+
+    for _ in range(2):
+        await breaker.record(RuntimeError("mailbox full"))
+
+    assert breaker.is_open
+    with pytest.raises(CircuitBreakerError):
+        await breaker.call(fail)
+    assert "smtp:example.com" in str(breaker.open_error())
+
+
+async def test_open_breaker_stops_rejecting_after_the_reset_timeout():
+    breaker = AsyncCircuitBreaker(fail_max=1, reset_timeout=60)
+    await breaker.record(RuntimeError("mailbox full"))
+    assert breaker.rejects_calls
+
+    breaker.breaker.timeout_duration = timedelta(0)
+
+    # Still open until a call goes through, but no longer rejecting.
+    assert breaker.is_open
+    assert not breaker.rejects_calls
+    await breaker.record(None)
+    assert breaker.is_closed
+
+
+async def test_excluded_errors_do_not_trip_the_breaker():
+    breaker = AsyncCircuitBreaker(fail_max=1, reset_timeout=60, exclude=[RelayDown])
+
+    await breaker.record(RelayDown())
+
+    assert breaker.is_closed
+
+
+def test_one_guard_per_domain():
+    registry = make_registry()
+
+    guard = registry.get("ada@Example.com")
+
+    assert registry.get("grace@example.COM") is guard
+    assert registry.get("ada@example.org") is not guard
+    assert len(registry) == 2
+
+
+def test_domain_rate_overrides_the_default():
+    registry = make_registry(rate_limits={"Example.com": 5.0}, default_rate=1.0)
+
+    assert registry.get("ada@example.com").limiter.rate == 5.0
+    assert registry.get("ada@example.org").limiter.rate == 1.0
+    assert make_registry().get("ada@example.com").limiter is None
+
+
+async def test_domain_breakers_are_independent():
+    registry = make_registry()
+    example = registry.get("ada@example.com")
+    for _ in range(5):
+        await example.breaker.record(RuntimeError("mailbox full"))
+
+    assert example.breaker.is_open
+    assert registry.get("ada@example.org").breaker.is_closed
+
+
+async def test_idle_domains_are_swept(mocker):
+    clock = mocker.patch("app.services.circuit_breaker.time.monotonic", return_value=100.0)
+    registry = make_registry(idle_timeout=60)
+    stale = registry.get("ada@example.com")
+
+    clock.return_value = 150.0
+    await registry.get("ada@example.org").acquire()
+    clock.return_value = 170.0
+    registry.get("ada@example.net")
+
+    assert set(registry._guards) == {"example.org", "example.net"}
+    assert registry.get("ada@example.com") is not stale
+
+
+def test_least_recently_used_domain_is_evicted_at_the_limit(mocker):
+    clock = mocker.patch("app.services.circuit_breaker.time.monotonic", return_value=100.0)
+    registry = make_registry(max_domains=2)
+    registry.get("ada@example.com")
+    clock.return_value = 101.0
+    registry.get("ada@example.org")
+
+    clock.return_value = 102.0
+    registry.get("ada@example.net")
+
+    assert set(registry._guards) == {"example.org", "example.net"}
@@ -0,0 +1,82 @@
+from typing import List
+
+from app.services.concurrency import AdaptiveConcurrency
+from app.services.scheduling import PriorityLimiter
+
+
+def make_controller(limit: int = 16, **kwargs) -> AdaptiveConcurrency:
+    return AdaptiveConcurrency(PriorityLimiter(limit), min_limit=4, max_limit=64, min_samples=10, **kwargs)
+
+
+def feed(controller: AdaptiveConcurrency, latency: float, count: int = 20, errors: int = 0) -> None:
+    for index in range(count):
+        controller.record(latency, error=index < errors)
+
+
+def test_holds_without_enough_samples():
+    controller = make_controller()
+    feed(controller, 0.01, count=5)
+
+    assert controller.decide() == 16
+    assert controller.last_decision == "hold"
+
+
+def test_increases_by_sqrt_when_the_limit_is_in_use():
+    controller = make_controller()
+    controller.limiter.active = 16
+    feed(controller, 0.01)
+
+    assert controller.decide() == 20
+    assert controller.last_decision == "increase"
+
+
+def test_holds_when_the_limit_is_not_in_use():
+    controller = make_controller()
+    controller.limiter.active = 3
+    feed(controller, 0.01)
+
+    assert controller.decide() == 16
+    assert controller.last_decision == "hold"
+
+
+def test_decreases_on_latency_above_tolerance():
+    controller = make_controller(latency_tolerance=2.0, decrease_factor=0.5)
+    feed(controller, 0.01)
+    controller.decide()
+
+    feed(controller, 0.05)
+
+    assert controller.decide() == 8
+    assert controller.last_decision == "decrease"
+
+
+def test_decreases_on_errors_and_stops_at_min_limit():
+    controller = make_controller(limit=5, error_threshold=0.1, decrease_factor=0.5)
+    feed(controller, 0.01, errors=5)
+
+    assert controller.decide() == 4
+    assert controller.last_decision == "decrease"
+
+
+def test_increase_is_capped_at_max_limit():
+    controller = make_controller(limit=62)
+    controller.limiter.active = 62
+    feed(controller, 0.01)
+
+    assert controller.decide() == 64
+
+
+async def test_tick_applies_the_new_limit():
+    changes: List[int] = []
+
+    async def on_change(limit: int) -> None:
+        changes.append(limit)
+
+    controller = make_controller(on_change=on_change)
+    controller.limiter.active = 16
+    feed(controller, 0.01)
+
+    await controller.tick()
+
+    assert controller.limiter.limit == 20
+    assert changes == [20]
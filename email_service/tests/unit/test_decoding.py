@@ -0,0 +1,81 @@
+import orjson
+import pytest
+
+from benchmarks.payloads import make_payload
+
+from app.domain.decoding import PayloadDecodeError, decode_fast, decode_payload, decode_strict
+
+
+def body(**changes) -> bytes:
+    payload = make_payload(0)
+    for path, value in changes.items():
+        section, _, field = path.rpartition("__")
+        target = payload[section] if section else payload
+        if value is None:
+            target.pop(field)
+        else:
+            target[field] = value
+    return orjson.dumps(payload)
+
+
+@pytest.mark.parametrize("index", range(20))
+def test_fast_and_strict_agree(index):
+    raw = orjson.dumps(make_payload(index))
+
+    fast = decode_fast(raw)
+    strict = decode_strict(raw)
+
+    assert fast.model_dump(exclude={"variables"}) == strict.model_dump(exclude={"variables"})
+    assert fast.variables.name == strict.variables.name
+    assert fast.variables_json() == make_payload(index)["variables"]
+    assert fast.metadata_json() == strict.metadata_json()
+
+
+def test_optional_fields_get_their_defaults():
+    payload = decode_fast(body(priority=None, metadata__locale=None, metadata__extra=None, variables__meta=None))
+
+    assert payload.priority == 5
+    assert payload.metadata.locale == "en"
+    assert payload.metadata.extra is None
+    assert payload.variables_json()["meta"] is None
+
+
+def test_strict_payloads_dump_their_sections():
+    payload = decode_strict(body())
+
+    assert payload.variables_json() == payload.variables.model_dump(mode="json")
+    assert payload.metadata_json() == payload.metadata.model_dump(mode="json")
+
+
+@pytest.mark.parametrize(
+    "raw, message",
+    [
+        (b"{", "invalid JSON"),
+        (b"[]", "must be a JSON object"),
+        (body(variables=None), "variables and metadata must be objects"),
+        (body(variables__link="ftp://example.com"), "http\\(s\\) URL"),
+        (body(variables__name=7), "variables.name must be a string"),
+        (body(metadata__recipient_email="not-an-email"), "metadata.recipient_email"),
+        (body(metadata__recipient_email=None), "metadata.recipient_email must be a string"),
+        (body(user_id="not-a-uuid"), "badly formed"),
+        (body(notification_type="fax"), "'fax' is not a valid NotificationType"),
+        (body(request_id=42), "request_id must be a string"),
+    ],
+)
+def test_fast_rejects_invalid_payloads(raw, message):
+    with pytest.raises(PayloadDecodeError, match=message):
+        decode_fast(raw)
+
+
+def test_strict_errors_are_decode_errors():
+    with pytest.raises(PayloadDecodeError):
+        decode_strict(body(variables__link="not a url"))
+
+
+@pytest.mark.parametrize("mode, fast", [("fast", True), ("strict", False)])
+def test_decode_payload_follows_the_mode(mocker, mode, fast):
+    mocker.patch("app.domain.decoding._settings.payload_decode_mode", mode)
+
+    payload = decode_payload(body())
+
+    assert (payload._raw_variables is not None) is fast
@@ -0,0 +1,224 @@
+import asyncio
+from typing import Any, Dict, List, Optional
+
+import orjson
+import pytest
+from pydantic import ValidationError
+
+from benchmarks.fakes import FakeIncomingMessage
+from benchmarks.payloads import make_payload
+
+from app.domain.decoding import decode_strict
+from app.domain.schemas import NotificationPayload
+from app.services.digest import DigestCoalescer, DigestEntry, build_digest_payload
+from app.services.email_consumer import EmailQueueConsumer
+from app.services.status_publisher import StatusEventPublisher
+from app.settings import Settings
+
+
+def entry(index: int, recipient: str = "ada@example.com", template_code: str = "order_shipped") -> DigestEntry:
+    data = make_payload(index)
+    data["template_code"] = template_code
+    data["metadata"]["recipient_email"] = recipient
+    body = orjson.dumps(data)
+    return FakeIncomingMessage(body, delivery_tag=index + 1), decode_strict(body)  # type: ignore[return-value]
+
+
+class Flushes:
+    def __init__(self) -> None:
+        self.groups: List[List[str]] = []
+
+    async def __call__(self, recipient: str, entries: List[DigestEntry]) -> None:
+        self.groups.append([payload.request_id for _, payload in entries])
+
+
+def make_coalescer(flush: Flushes, window: float = 10, max_items: int = 3, max_held: int = 100) -> DigestCoalescer:
+    return DigestCoalescer(
+        flush, template_codes=["order_shipped"], window=window, max_items=max_items, max_held=max_held
+    )
+
+
+async def test_groups_by_recipient_until_the_window_closes():
+    flush = Flushes()
+    digests = make_coalescer(flush, window=0.01)
+    for item in [entry(0), entry(1, "ADA@example.com"), entry(2, "grace@example.com")]:
+        digests.add(*item)
+    assert digests.held == 3
+
+    await asyncio.sleep(0.05)
+
+    assert sorted(flush.groups) == [["req-0-0", "req-0-1"], ["req-0-2"]]
+    assert digests.held == 0
+
+
+async def test_full_group_is_released_at_once():
+    flush = Flushes()
+    digests = make_coalescer(flush, max_items=2)
+    for index in range(3):
+        digests.add(*entry(index))
+    await asyncio.sleep(0)
+
+    assert flush.groups == [["req-0-0", "req-0-1"]]
+    assert digests.held == 1
+    await digests.stop()
+    assert flush.groups[-1] == ["req-0-2"]
+
+
+async def test_every_group_is_released_once_prefetch_would_fill():
+    flush = Flushes()
+    digests = make_coalescer(flush, max_items=5, max_held=3)
+    digests.add(*entry(0))
+    digests.add(*entry(1, "grace@example.com"))
+    assert digests.held == 2
+
+    digests.add(*entry(2))
+    await asyncio.sleep(0)
+
+    assert sorted(flush.groups) == [["req-0-0", "req-0-2"], ["req-0-1"]]
+    assert digests.held == 0
+
+
+def test_digest_groups_must_fit_in_prefetch():
+    unbuffered = {"consumer_prefetch": 10, "consumer_priority_buffer": 0}
+    with pytest.raises(ValidationError, match="DIGEST_MAX_ITEMS"):
+        Settings(digest_enabled=True, digest_max_items=10, **unbuffered)
+    assert Settings(digest_enabled=False, digest_max_items=10, **unbuffered).digest_max_items == 10
+
+
+def test_digest_groups_are_checked_against_the_buffered_prefetch():
+    # ceil(20 / 2) + 5: CONSUMER_PREFETCH is not what the channels get.
+    buffered = {"consumer_prefetch": 100, "consumer_max_in_flight": 20, "consumer_channels": 2}
+    with pytest.raises(ValidationError, match=r"consumer prefetch \(15\)"):
+        Settings(digest_enabled=True, digest_max_items=15, consumer_priority_buffer=5, **buffered)
+    assert Settings(digest_enabled=True, digest_max_items=14, consumer_priority_buffer=5, **buffered)
+    assert Settings(digest_enabled=True, digest_max_items=15, rabbitmq_max_priority=0, **buffered)
+
+
+def test_only_configured_templates_are_coalesced():
+    digests = make_coalescer(Flushes())
+
+    assert digests.accepts(entry(0)[1])
+    assert not digests.accepts(entry(0, template_code="password_reset")[1])
+
+
+async def test_failed_flush_is_logged_and_the_coalescer_keeps_working():
+    calls: List[int] = []
+
+    async def flush(recipient: str, entries: List[DigestEntry]) -> None:
+        calls.append(len(entries))
+        raise RuntimeError("boom")
+
+    digests = DigestCoalescer(flush, template_codes=["order_shipped"], window=10, max_items=1, max_held=10)
+    digests.add(*entry(0))
+    digests.add(*entry(1))
+    await digests.stop()
+
+    assert calls == [1, 1]
+
+
+async def test_failed_flush_rejects_the_entries_it_left_unsettled():
+    async def flush(recipient: str, entries: List[DigestEntry]) -> None:
+        await entries[0][0].ack()
+        raise ConnectionError("redis down")
+
+    digests = DigestCoalescer(flush, template_codes=["order_shipped"], window=10, max_items=3, max_held=10)
+    entries = [entry(0), entry(1), entry(2)]
+    for item in entries:
+        digests.add(*item)
+    await digests.stop()
+
+    assert [message.outcome for message, _ in entries] == ["ack", "reject", "reject"]
+
+
+def test_digest_payload_lists_every_item():
+    entries = [entry(0), entry(1), entry(2)]
+
+    digest = build_digest_payload("email_digest", entries)
+
+    assert digest.template_code == "email_digest"
+    assert digest.request_id == "digest:req-0-0"
+    assert digest.priority == max(payload.priority for _, payload in entries)
+    assert digest.metadata.recipient_email == "ada@example.com"
+    variables = digest.variables_json()
+    assert variables["count"] == 3
+    assert [item["request_id"] for item in variables["items"]] == ["req-0-0", "req-0-1", "req-0-2"]
+    assert variables["items"][0]["variables"] == make_payload(0)["variables"]
+
+
+class Templates:
+    def __init__(self) -> None:
+        self.rendered: List[str] = []
+
+    async def render(self, payload: NotificationPayload, correlation_id: Optional[str] = None) -> Dict[str, Any]:
+        self.rendered.append(payload.template_code)
+        return {"subject": payload.template_code, "body": "..."}
+
+
+class Sender:
+    def __init__(self, error: Optional[Exception] = None) -> None:
+        self.error = error
+        self.sent: List[str] = []
+
+    async def send(self, recipient: str, subject: str, body: str, metadata: Dict[str, Any]) -> None:
+        if self.error is not None:
+            raise self.error
+        self.sent.append(subject)
+
+
+class RecordingExchange:
+    def __init__(self) -> None:
+        self.is_closed = False
+        self.published: List[Any] = []
+
+    async def publish(self, message: Any, routing_key: str, **kwargs: Any) -> None:
+        self.published.append(message)
+
+
+@pytest.fixture
+def templates() -> Templates:
+    return Templates()
+
+
+def make_consumer(status_repo, templates: Templates, sender: Sender) -> EmailQueueConsumer:
+    consumer = EmailQueueConsumer(
+        status_repo=status_repo,
+        template_client=templates,  # type: ignore[arg-type]
+        sender=sender,  # type: ignore[arg-type]
+        status_publisher=StatusEventPublisher(exchange_name=""),
+    )
+    consumer.retry_exchange = RecordingExchange()
+    return consumer
+
+
+async def test_fresh_entries_go_out_as_one_digest(status_repo, templates):
+    sender = Sender()
+    consumer = make_consumer(status_repo, templates, sender)
+    entries = [entry(0), entry(1), entry(2)]
+    await status_repo.ensure_idempotent("req-0-1")
+
+    await consumer._deliver_digest("ada@example.com", entries)
+
+    assert templates.rendered == ["email_digest"]
+    assert sender.sent == ["email_digest"]
+    assert [message.outcome for message, _ in entries] == ["ack", "ack", "ack"]
+    assert (await status_repo.get_status("req-0-0"))["status"] == "delivered"
+    assert (await status_repo.get_status("req-0-2"))["status"] == "delivered"
+
+
+async def test_a_lone_entry_is_sent_as_itself(status_repo, templates):
+    consumer = make_consumer(status_repo, templates, Sender())
+
+    await consumer._deliver_digest("ada@example.com", [entry(0)])
+
+    assert templates.rendered == ["order_shipped"]
+
+
+async def test_failed_digest_retries_every_entry(status_repo, templates):
+    consumer = make_consumer(status_repo, templates, Sender(RuntimeError("mailbox full")))
+    entries = [entry(0), entry(1)]
+
+    await consumer._deliver_digest("ada@example.com", entries)
+
+    assert [message.outcome for message, _ in entries] == ["ack", "ack"]
+    assert [message.body for message in consumer.retry_exchange.published] == [message.body for message, _ in entries]
+    assert (await status_repo.get_status("req-0-1"))["status"] == "failed"
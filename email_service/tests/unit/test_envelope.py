@@ -0,0 +1,149 @@
+import gzip
+from typing import List, Optional
+
+import pytest
+
+from app.domain.decoding import PayloadDecodeError
+from app.domain.envelope import (
+    ENVELOPE_CONTENT_TYPE,
+    decompress,
+    is_packed,
+    pack_records,
+    unpack_records,
+    zstandard,
+)
+from app.services.envelope import Envelope, EnvelopeRecord
+
+RECORDS = [b'{"request_id": "req-1"}', b'{"request_id": "req-2"}', b'{"request_id": "req-3"}']
+ENCODINGS = ["identity", "gzip"] + (["zstd"] if zstandard is not None else [])
+
+
+@pytest.mark.parametrize(
+    "content_type, content_encoding, packed",
+    [
+        ("application/json", None, False),
+        ("application/json", "identity", False),
+        (ENVELOPE_CONTENT_TYPE, None, True),
+        ("application/json", "gzip", True),
+        (None, "zstd", True),
+    ],
+)
+def test_is_packed(content_type, content_encoding, packed):
+    assert is_packed(content_type, content_encoding) is packed
+
+
+@pytest.mark.parametrize("encoding", ENCODINGS)
+def test_envelope_round_trip(encoding):
+    body = pack_records(RECORDS, encoding)
+
+    assert unpack_records(body, ENVELOPE_CONTENT_TYPE, encoding) == RECORDS
+
+
+def test_blank_lines_are_ignored():
+    body = b"\n" + b"\n\n".join(RECORDS) + b"\n"
+
+    assert unpack_records(body, ENVELOPE_CONTENT_TYPE, None) == RECORDS
+
+
+def test_compressed_single_payload_is_one_record():
+    body = gzip.compress(RECORDS[0])
+
+    assert unpack_records(body, "application/json", "gzip") == [RECORDS[0]]
+
+
+def test_empty_envelope_is_rejected():
+    with pytest.raises(PayloadDecodeError, match="no records"):
+        unpack_records(b"\n \n", ENVELOPE_CONTENT_TYPE, None)
+
+
+def test_too_many_records_are_rejected(mocker):
+    mocker.patch("app.domain.envelope._settings.envelope_max_records", 2)
+
+    with pytest.raises(PayloadDecodeError, match="more than 2 records"):
+        unpack_records(pack_records(RECORDS), ENVELOPE_CONTENT_TYPE, None)
+
+
+def test_decompressed_size_is_capped(mocker):
+    mocker.patch("app.domain.envelope._settings.envelope_max_bytes", 1024)
+    body = gzip.compress(b"x" * 4096)
+
+    with pytest.raises(PayloadDecodeError, match="exceeds 1024 bytes"):
+        decompress(body, "gzip")
+
+
+@pytest.mark.parametrize(
+    "body, encoding, message",
+    [
+        (b"not gzip", "gzip", "invalid gzip body"),
+        (b"plain", "br", "unsupported content-encoding"),
+    ],
+)
+def test_undecodable_bodies_are_rejected(body, encoding, message):
+    with pytest.raises(PayloadDecodeError, match=message):
+        decompress(body, encoding)
+
+
+class Delivery:
+    def __init__(self) -> None:
+        self.headers = {"x-request-id": "batch-1", "x-correlation-id": "corr-1"}
+        self.timestamp = None
+        self.delivery_mode = None
+        self.outcome: Optional[str] = None
+
+    async def ack(self) -> None:
+        self.outcome = "ack"
+
+    async def nack(self, requeue: bool = True) -> None:
+        self.outcome = "nack"
+
+
+class DeadLetters:
+    def __init__(self, error: Optional[Exception] = None) -> None:
+        self.error = error
+        self.bodies: List[bytes] = []
+
+    async def __call__(self, record: EnvelopeRecord) -> None:
+        if self.error is not None:
+            raise self.error
+        self.bodies.append(record.body)
+
+
+def open_envelope(dead_letters: DeadLetters) -> Envelope:
+    return Envelope(Delivery(), RECORDS, dead_letters)  # type: ignore[arg-type]
+
+
+def test_records_drop_the_envelope_request_id():
+    record = open_envelope(DeadLetters()).records[0]
+
+    assert record.headers == {"x-correlation-id": "corr-1"}
+    assert record.content_type == "application/json"
+
+
+async def test_envelope_is_acked_once_every_record_settles():
+    dead_letters = DeadLetters()
+    envelope = open_envelope(dead_letters)
+    first, second, third = envelope.records
+
+    await first.ack()
+    await first.ack()
+    await second.reject()
+    assert envelope.message.outcome is None
+
+    async with third.process():
+        pass
+
+    assert envelope.message.outcome == "ack"
+    assert dead_letters.bodies == [RECORDS[1]]
+
+
+async def test_envelope_is_requeued_when_a_record_cannot_be_dead_lettered():
+    envelope = open_envelope(DeadLetters(RuntimeError("channel closed")))
+    first, second, third = envelope.records
+
+    await first.ack()
+    with pytest.raises(ValueError):
+        async with second.process():
+            raise ValueError("bad payload")
+    await third.ack()
+
+    assert envelope.message.outcome == "nack"
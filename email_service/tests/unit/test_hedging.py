@@ -0,0 +1,194 @@
+import asyncio
+from typing import Any, Dict, List
+
+import pytest
+
+from app.infrastructure.template_client import TemplateClient
+from app.services.hedging import HedgeBudget, LatencyTracker, hedged
+
+
+class Backend:
+    # Each call takes the next latency from `latencies`; `fail` makes calls raise instead.
+    def __init__(self, *latencies: float, fail: bool = False) -> None:
+        self.latencies = list(latencies)
+        self.fail = fail
+        self.started = 0
+        self.cancelled = 0
+
+    async def __call__(self) -> int:
+        self.started += 1
+        call = self.started
+        try:
+            await asyncio.sleep(self.latencies[call - 1])
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if self.fail:
+            raise RuntimeError(f"call {call} failed")
+        return call
+
+
+def funded(tokens: float = 5) -> HedgeBudget:
+    budget = HedgeBudget(ratio=0.0)
+    budget.tokens = tokens
+    return budget
+
+
+def test_tracker_needs_min_samples():
+    tracker = LatencyTracker(window=100, min_samples=5)
+    for latency in [0.1, 0.2, 0.3, 0.4]:
+        tracker.observe(latency)
+    assert tracker.percentile(0.5) is None
+
+    tracker.observe(0.5)
+    assert tracker.percentile(0.5) == 0.3
+    assert tracker.percentile(0.99) == 0.5
+
+
+def test_tracker_keeps_only_the_window():
+    tracker = LatencyTracker(window=10, min_samples=1, refresh_every=1)
+    for _ in range(10):
+        tracker.observe(5.0)
+    for _ in range(10):
+        tracker.observe(0.1)
+
+    assert tracker.percentile(0.99) == 0.1
+
+
+def test_timeouts_are_counted_not_sampled():
+    tracker = LatencyTracker(window=100, min_samples=10)
+    for _ in range(99):
+        tracker.observe(0.1)
+    tracker.observe_timeout()
+    assert tracker.percentile(0.99) == 0.1
+
+    tracker.observe_timeout()
+    assert tracker.timeouts == 2
+    assert tracker.percentile(0.99) is None
+    assert tracker.percentile(0.5) == 0.1
+
+
+def test_timeouts_leave_the_window():
+    tracker = LatencyTracker(window=10, min_samples=1)
+    for _ in range(5):
+        tracker.observe_timeout()
+    for _ in range(10):
+        tracker.observe(0.1)
+
+    assert tracker.timeouts == 0
+    assert tracker.percentile(0.99) == 0.1
+
+
+def test_budget_allows_a_ratio_of_calls():
+    budget = HedgeBudget(ratio=0.25, max_tokens=1)
+    spent: List[bool] = []
+    for _ in range(8):
+        budget.earn()
+        spent.append(budget.try_spend())
+
+    assert spent == [False, False, False, True, False, False, False, True]
+
+
+async def test_fast_call_is_not_hedged():
+    backend = Backend(0)
+
+    assert await hedged(backend, 0.05, funded()) == 1
+    assert backend.started == 1
+
+
+async def test_slow_call_is_hedged_and_the_loser_cancelled():
+    backend = Backend(1.0, 0)
+
+    assert await hedged(backend, 0.01, funded()) == 2
+    await asyncio.sleep(0)
+    assert backend.cancelled == 1
+
+
+async def test_exhausted_budget_waits_for_the_first_call():
+    backend = Backend(0.03, 0)
+
+    assert await hedged(backend, 0.01, funded(0)) == 1
+    assert backend.started == 1
+
+
+async def test_both_failing_raises_the_first_error():
+    backend = Backend(0.02, 0.02, fail=True)
+
+    with pytest.raises(RuntimeError, match="call 1 failed"):
+        await hedged(backend, 0.01, funded())
+
+
+async def test_cancelling_the_caller_cancels_every_call():
+    backend = Backend(1.0, 1.0)
+    caller = asyncio.create_task(hedged(backend, 0.01, funded()))
+    await asyncio.sleep(0.03)
+    assert backend.started == 2
+
+    caller.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await caller
+    await asyncio.sleep(0)
+
+    assert backend.cancelled == 2
+
+
+async def test_no_delay_means_no_hedge():
+    backend = Backend(0.02)
+
+    assert await hedged(backend, None, funded()) == 1
+    assert backend.started == 1
+
+
+@pytest.mark.parametrize("latency, timeout", [(None, 10.0), (0.01, 0.25), (0.5, 1.5), (5.0, 10.0)])
+def test_request_timeout_follows_the_p99(mocker, latency, timeout):
+    mocker.patch.multiple(
+        "app.infrastructure.template_client._settings",
+        template_timeout_min=0.25,
+        template_timeout_multiplier=3.0,
+        template_http_read_timeout=10.0,
+    )
+    client = TemplateClient(session=object(), mode="remote")  # type: ignore[arg-type]
+    if latency is not None:
+        for _ in range(client.latency.min_samples):
+            client.latency.observe(latency)
+
+    assert client.request_timeout() == timeout
+
+
+class Response:
+    async def __aenter__(self) -> "Response":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        return None
+
+    def raise_for_status(self) -> None:
+        pass
+
+    async def json(self) -> Dict[str, Any]:
+        return {"subject": "Hi", "body": "Hello"}
+
+
+class Session:
+    def __init__(self) -> None:
+        self.timeouts: List[Any] = []
+
+    def post(self, url: str, **kwargs: Any) -> Response:
+        self.timeouts.append(kwargs["timeout"])
+        return Response()
+
+
+async def test_adaptive_total_keeps_the_socket_timeouts(mocker):
+    mocker.patch.multiple(
+        "app.infrastructure.template_client._settings",
+        template_http_connect_timeout=2.0,
+        template_http_read_timeout=10.0,
+    )
+    session = Session()
+    client = TemplateClient(session=session, mode="remote")  # type: ignore[arg-type]
+    mocker.patch.object(client, "request_timeout", return_value=0.75)
+
+    await client._post_render(b"{}", {})
+
+    [timeout] = session.timeouts
+    assert (timeout.total, timeout.sock_connect, timeout.sock_read) == (0.75, 2.0, 10.0)
@@ -0,0 +1,131 @@
+import asyncio
+from typing import Any, Dict, List, Optional
+
+import aiohttp
+import orjson
+import pytest
+
+from app.services.email_transport import EmailRejectedError, EmailTransportError
+from app.services.http_transport import HTTPBulkTransport
+
+
+class BulkResponse:
+    def __init__(self, status: int, body: bytes) -> None:
+        self.status = status
+        self.body = body
+
+    async def __aenter__(self) -> "BulkResponse":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        return None
+
+    async def read(self) -> bytes:
+        return self.body
+
+
+class BulkAPI:
+    # Accepts every message except those addressed to `rejected`.
+    def __init__(self, status: int = 200, body: Optional[bytes] = None, error: Optional[Exception] = None) -> None:
+        self.status = status
+        self.body = body
+        self.error = error
+        self.rejected = {"bounce@example.com"}
+        self.requests: List[List[Dict[str, Any]]] = []
+        self.closed = False
+
+    def post(self, url: str, data: bytes, headers: Dict[str, str]) -> BulkResponse:
+        if self.error is not None:
+            raise self.error
+        messages = orjson.loads(data)["messages"]
+        self.requests.append(messages)
+        results = [
+            {"status": "rejected", "error": "unknown mailbox"} if item["to"] in self.rejected else {"status": "accepted"}
+            for item in messages
+        ]
+        return BulkResponse(self.status, self.body if self.body is not None else orjson.dumps({"results": results}))
+
+
+def make_transport(api: BulkAPI, batch_size: int = 2, linger_ms: int = 5) -> HTTPBulkTransport:
+    return HTTPBulkTransport(
+        url="http://bulk.test/send",
+        token="token",
+        session=api,  # type: ignore[arg-type]
+        batch_size=batch_size,
+        linger_ms=linger_ms,
+    )
+
+
+def messages(transport: HTTPBulkTransport, *recipients: str) -> List[Any]:
+    return [transport.build_message(recipient, "Hi", "Hello") for recipient in recipients]
+
+
+async def test_send_many_posts_in_chunks_and_maps_results():
+    api = BulkAPI()
+    transport = make_transport(api)
+    recipients = ["a@example.com", "bounce@example.com", "c@example.com"]
+
+    results = await transport.send_many(
+        messages(transport, *recipients), [{"request_id": recipient} for recipient in recipients]
+    )
+
+    assert [len(request) for request in api.requests] == [2, 1]
+    assert [item["metadata"]["request_id"] for request in api.requests for item in request] == recipients
+    assert results[0] is None and results[2] is None
+    assert isinstance(results[1], EmailRejectedError)
+    assert str(results[1]) == "unknown mailbox"
+
+
+@pytest.mark.parametrize(
+    "api, error_type",
+    [
+        (BulkAPI(status=503), EmailTransportError),
+        (BulkAPI(status=429), EmailTransportError),
+        (BulkAPI(status=400), EmailRejectedError),
+        (BulkAPI(body=b"<html>"), EmailTransportError),
+        (BulkAPI(body=b'{"results": []}'), EmailTransportError),
+        (BulkAPI(body=b'{"results": ["accepted", "accepted"]}'), EmailTransportError),
+        (BulkAPI(error=aiohttp.ClientConnectionError("refused")), EmailTransportError),
+    ],
+)
+async def test_request_failures_fail_every_message(api, error_type):
+    transport = make_transport(api)
+
+    results = await transport.send_many(messages(transport, "a@example.com", "b@example.com"))
+
+    assert [type(result) for result in results] == [error_type, error_type]
+
+
+async def test_concurrent_sends_share_one_request():
+    api = BulkAPI()
+    transport = make_transport(api, batch_size=10)
+
+    sends = [
+        transport.send(recipient, "Hi", "Hello", {"request_id": recipient})
+        for recipient in ["a@example.com", "bounce@example.com", "c@example.com"]
+    ]
+    results = await asyncio.gather(*sends, return_exceptions=True)
+    await transport.close()
+
+    assert len(api.requests) == 1
+    assert [item["metadata"] for item in api.requests[0]] == [
+        {"request_id": "a@example.com"},
+        {"request_id": "bounce@example.com"},
+        {"request_id": "c@example.com"},
+    ]
+    assert results[0] is None and results[2] is None
+    assert isinstance(results[1], EmailRejectedError)
+
+
+async def test_senders_get_an_answer_when_the_post_raises(mocker):
+    transport = make_transport(BulkAPI(), batch_size=10)
+    mocker.patch.object(transport, "_post", side_effect=RuntimeError("bug"))
+
+    results = await asyncio.gather(
+        transport.send("a@example.com", "Hi", "Hello", {}),
+        transport.send("b@example.com", "Hi", "Hello", {}),
+        return_exceptions=True,
+    )
+    await transport.close()
+
+    assert [type(result) for result in results] == [EmailTransportError, EmailTransportError]
@@ -1,2 +1,95 @@
-#
+from typing import Any, Dict, List, Tuple
 
+import pytest
+from aio_pika import DeliveryMode
+
+from app.services.email_consumer import EmailQueueConsumer
+from app.services.retry import (
+    calculate_backoff,
+    retry_attempt,
+    retry_tiers,
+    should_retry,
+    tier_for_attempt,
+)
+
+
+class RecordingExchange:
+    def __init__(self) -> None:
+        self.is_closed = False
+        self.published: List[Tuple[Any, str]] = []
+
+    async def publish(self, message: Any, routing_key: str, **kwargs: Any) -> None:
+        self.published.append((message, routing_key))
+
+
+class Delivery:
+    def __init__(self, body: bytes, headers: Dict[str, Any]) -> None:
+        self.body = body
+        self.headers = headers
+        self.delivery_mode = DeliveryMode.PERSISTENT
+        self.priority = None
+
+
+@pytest.fixture
+def retry_settings(mocker):
+    mocker.patch.multiple(
+        "app.services.retry._settings",
+        retry_base_delay=1.0,
+        retry_max_delay=5.0,
+        retry_max_attempts=5,
+        rabbitmq_email_queue="email.queue",
+    )
+
+
+@pytest.mark.parametrize("attempt, delay", [(1, 1.0), (2, 2.0), (3, 4.0), (4, 5.0), (10, 5.0)])
+def test_backoff_doubles_up_to_the_max(retry_settings, attempt, delay):
+    assert calculate_backoff(attempt) == delay
+
+
+def test_attempt_routes_to_its_tier_queue(retry_settings):
+    tier = tier_for_attempt(2)
+
+    assert tier.delay_ms == 2000
+    assert tier.routing_key == tier.queue_name == "email.queue.retry.2000ms"
+
+
+def test_capped_attempts_share_the_last_tier(retry_settings):
+    assert [tier.delay_ms for tier in retry_tiers()] == [1000, 2000, 4000, 5000]
+    assert tier_for_attempt(5).routing_key == "email.queue.retry.5000ms"
+
+
+def test_retry_attempt_header_and_limit(retry_settings):
+    assert retry_attempt({}) == 0
+    assert retry_attempt({"x-retry-attempt": "3"}) == 3
+    assert should_retry(5)
+    assert not should_retry(6)
+
+
+@pytest.fixture
+def consumer():
+    consumer = EmailQueueConsumer(status_repo=None, template_client=None)  # type: ignore[arg-type]
+    consumer.retry_exchange = RecordingExchange()
+    return consumer
+
+
+async def test_schedule_retry_publishes_the_next_tier(retry_settings, consumer):
+    message = Delivery(b'{"request_id": "req-1"}', headers={"x-retry-attempt": 1, "x-correlation-id": "corr-1"})
+
+    scheduled = await consumer._schedule_retry(message, dict(message.headers), RuntimeError("relay down"), 7)
+
+    assert scheduled
+    [(published, routing_key)] = consumer.retry_exchange.published
+    assert routing_key == "email.queue.retry.2000ms"
+    assert published.body == message.body
+    assert published.delivery_mode == DeliveryMode.PERSISTENT
+    assert published.priority == 7
+    assert published.headers["x-retry-attempt"] == 2
+    assert published.headers["x-error"] == "relay down"
+    assert published.headers["x-correlation-id"] == "corr-1"
+
+
+async def test_schedule_retry_stops_after_the_last_attempt(retry_settings, consumer):
+    message = Delivery(b"{}", headers={"x-retry-attempt": 5})
+
+    assert not await consumer._schedule_retry(message, dict(message.headers), RuntimeError("relay down"))
+    assert consumer.retry_exchange.published == []
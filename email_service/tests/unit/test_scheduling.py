@@ -0,0 +1,141 @@
+import asyncio
+from typing import List
+
+import pytest
+
+from app.services.email_consumer import EmailQueueConsumer, amqp_priority, delivery_priority
+from app.services.scheduling import PriorityLimiter
+
+
+class Delivery:
+    def __init__(self, body: bytes, priority=None) -> None:
+        self.body = body
+        self.priority = priority
+
+
+async def test_acquire_within_limit_does_not_wait():
+    limiter = PriorityLimiter(2)
+
+    await limiter.acquire(1)
+    await limiter.acquire(1)
+
+    assert limiter.active == 2
+    assert limiter.waiting == 0
+
+
+async def test_freed_slot_goes_to_highest_priority_then_fifo():
+    limiter = PriorityLimiter(1)
+    await limiter.acquire(0)
+    started: List[str] = []
+
+    async def worker(name: str, priority: int) -> None:
+        async with limiter.slot(priority):
+            started.append(name)
+
+    tasks = [
+        asyncio.create_task(worker("bulk-1", 1)),
+        asyncio.create_task(worker("urgent", 9)),
+        asyncio.create_task(worker("bulk-2", 1)),
+        asyncio.create_task(worker("normal", 5)),
+    ]
+    await asyncio.sleep(0)
+    assert limiter.waiting == 4
+
+    limiter.release()
+    await asyncio.gather(*tasks)
+
+    assert started == ["urgent", "normal", "bulk-1", "bulk-2"]
+    assert limiter.active == 0
+
+
+async def test_cancelled_waiter_is_skipped():
+    limiter = PriorityLimiter(1)
+    await limiter.acquire(0)
+    cancelled = asyncio.create_task(limiter.acquire(9))
+    waiting = asyncio.create_task(limiter.acquire(1))
+    await asyncio.sleep(0)
+
+    cancelled.cancel()
+    await asyncio.sleep(0)
+    limiter.release()
+    await waiting
+
+    assert limiter.active == 1
+    assert limiter.waiting == 0
+
+
+async def test_lowering_the_limit_retires_freed_slots():
+    limiter = PriorityLimiter(2)
+    await limiter.acquire(0)
+    await limiter.acquire(0)
+    waiter = asyncio.create_task(limiter.acquire(0))
+    await asyncio.sleep(0)
+
+    limiter.set_limit(1)
+    limiter.release()
+    await asyncio.sleep(0)
+
+    assert not waiter.done()
+    assert limiter.active == 1
+
+    limiter.release()
+    await waiter
+    assert limiter.active == 1
+
+
+async def test_raising_the_limit_wakes_waiters():
+    limiter = PriorityLimiter(1)
+    await limiter.acquire(0)
+    waiters = [asyncio.create_task(limiter.acquire(0)) for _ in range(2)]
+    await asyncio.sleep(0)
+
+    limiter.set_limit(3)
+    await asyncio.gather(*waiters)
+
+    assert limiter.active == 3
+
+
+@pytest.mark.parametrize("priority, expected", [(-1, 0), (5, 5), (10, 10), (42, 10)])
+def test_amqp_priority_is_clamped_to_the_queue_maximum(mocker, priority, expected):
+    mocker.patch("app.services.email_consumer.settings.rabbitmq_max_priority", 10)
+
+    assert amqp_priority(priority) == expected
+
+
+@pytest.mark.parametrize(
+    "body, header, expected",
+    [
+        (b'{"priority": 8}', None, 8),
+        (b'{"priority": 3}', 9, 9),
+        (b"{}", None, 5),
+        (b"not json", None, 0),
+        (b'{"priority": "high"}', None, 0),
+    ],
+)
+def test_delivery_priority_prefers_the_amqp_property(mocker, body, header, expected):
+    mocker.patch("app.services.email_consumer.settings.rabbitmq_max_priority", 10)
+
+    assert delivery_priority(Delivery(body, header)) == expected  # type: ignore[arg-type]
+
+
+@pytest.mark.parametrize(
+    "max_priority, batch_size, buffer, prefetch",
+    [(10, 1, 10, 35), (10, 1, 0, 10), (0, 1, 10, 10), (10, 5, 10, 10)],
+)
+def test_prefetch_leaves_deliveries_waiting_for_the_limiter(mocker, max_priority, batch_size, buffer, prefetch):
+    mocker.patch.multiple(
+        "app.services.email_consumer.settings",
+        rabbitmq_max_priority=max_priority,
+        consumer_batch_size=batch_size,
+        consumer_priority_buffer=buffer,
+        consumer_prefetch=10,
+        consumer_max_in_flight=50,
+        consumer_channels=2,
+        consumer_adaptive_concurrency=False,
+        digest_enabled=False,
+    )
+
+    consumer = EmailQueueConsumer(status_repo=None, template_client=None)  # type: ignore[arg-type]
+
+    assert consumer.prefetch == prefetch
+    assert consumer._prefetch_for(5, buffered=False) == 3
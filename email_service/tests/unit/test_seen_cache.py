@@ -0,0 +1,59 @@
+from app.infrastructure.seen_cache import SeenRequestCache
+
+
+def test_added_ids_are_hits():
+    cache = SeenRequestCache(max_size=10, ttl_seconds=60)
+    cache.add("req-1")
+
+    assert "req-1" in cache
+    assert "req-2" not in cache
+    assert cache.stats() == {"dedup_cache_size": 1, "dedup_hits": 1, "dedup_misses": 1}
+
+
+def test_evicts_least_recently_used():
+    cache = SeenRequestCache(max_size=2, ttl_seconds=60)
+    cache.add("req-1")
+    cache.add("req-2")
+    assert "req-1" in cache
+
+    cache.add("req-3")
+
+    assert "req-1" in cache
+    assert "req-2" not in cache
+    assert len(cache) == 2
+
+
+def test_entries_expire_with_the_ttl(mocker):
+    clock = mocker.patch("app.infrastructure.seen_cache.time.monotonic", return_value=100.0)
+    cache = SeenRequestCache(max_size=10, ttl_seconds=60)
+    cache.add("req-1")
+
+    clock.return_value = 159.0
+    assert "req-1" in cache
+    clock.return_value = 160.0
+    assert "req-1" not in cache
+    assert len(cache) == 0
+
+
+def test_re_adding_keeps_the_original_timestamp(mocker):
+    clock = mocker.patch("app.infrastructure.seen_cache.time.monotonic", return_value=100.0)
+    cache = SeenRequestCache(max_size=10, ttl_seconds=60)
+    cache.add("req-1")
+
+    clock.return_value = 150.0
+    cache.add("req-1")
+    clock.return_value = 161.0
+
+    assert "req-1" not in cache
+
+
+def test_discard_and_disabled_cache():
+    cache = SeenRequestCache(max_size=10, ttl_seconds=60)
+    cache.add("req-1")
+    cache.discard(["req-1", "unknown"])
+    assert "req-1" not in cache
+
+    disabled = SeenRequestCache(max_size=0, ttl_seconds=60)
+    disabled.add("req-1")
+    assert not disabled.enabled
+    assert len(disabled) == 0
@@ -0,0 +1,41 @@
+import pytest
+
+from app.domain.schemas import NotificationStatus
+from app.infrastructure.status_codec import decode_status, encode_status
+from app.services.email_transport import EmailTransportError
+
+
+@pytest.mark.parametrize("status", list(NotificationStatus))
+def test_status_round_trip(status):
+    assert decode_status(encode_status(status)) == {"status": status.value}
+
+
+def test_exception_round_trips_as_its_message():
+    fields = encode_status(NotificationStatus.failed, EmailTransportError("relay unavailable"))
+
+    assert decode_status(fields) == {"status": "failed", "error": "relay unavailable"}
+
+
+def test_string_error_round_trip():
+    fields = encode_status(NotificationStatus.failed, "template missing")
+
+    assert decode_status(fields) == {"status": "failed", "error": "template missing"}
+
+
+def test_exception_without_message_has_no_error():
+    fields = encode_status(NotificationStatus.failed, EmailTransportError())
+
+    assert decode_status(fields) == {"status": "failed"}
+
+
+def test_long_errors_are_truncated_on_a_character_boundary():
+    fields = encode_status(NotificationStatus.failed, "é" * 100)
+    error = decode_status(fields)["error"]
+
+    assert len(error.encode()) <= 60
+    assert set(error) == {"é"}
+
+
+def test_claim_only_record_has_no_status():
+    assert decode_status({"i": "1"}) is None
+    assert decode_status({}) is None
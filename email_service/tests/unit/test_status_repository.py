@@ -1,2 +1,117 @@
-#
+import pytest
 
+from app.domain.schemas import NotificationStatus
+from app.infrastructure.status_repository import StatusRepository, decode_cursor, encode_cursor
+
+
+async def write(status_repo, mocker, entries):
+    clock = mocker.patch("app.infrastructure.status_repository.time.time")
+    for request_id, seconds, status in entries:
+        clock.return_value = seconds
+        await status_repo.set_status(request_id, status)
+    mocker.stopall()
+
+
+async def collect_pages(status_repo, limit, status=None):
+    pages = []
+    cursor = None
+    while True:
+        items, cursor = await status_repo.list_statuses(limit, cursor=cursor, status=status)
+        pages.append([item["request_id"] for item in items])
+        if cursor is None:
+            return pages
+
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor(1700000000123.0, "req:1")) == (1700000000123, "req:1")
+
+
+@pytest.mark.parametrize("cursor", ["", "abc", "123", "x:req-1"])
+def test_invalid_cursor(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+
+async def test_pages_newest_first(status_repo, mocker):
+    now = 1_700_000_000
+    await write(status_repo, mocker, [(f"req-{index}", now + index, NotificationStatus.delivered) for index in range(5)])
+
+    pages = await collect_pages(status_repo, limit=2)
+
+    assert pages == [["req-4", "req-3"], ["req-2", "req-1"], ["req-0"]]
+
+
+async def test_ties_on_one_millisecond_are_neither_skipped_nor_repeated(status_repo, mocker):
+    now = 1_700_000_000
+    await write(status_repo, mocker, [(f"req-{index}", now, NotificationStatus.delivered) for index in range(5)])
+
+    pages = await collect_pages(status_repo, limit=2)
+
+    listed = [request_id for page in pages for request_id in page]
+    assert sorted(listed) == [f"req-{index}" for index in range(5)]
+    assert len(listed) == len(set(listed))
+
+
+async def test_status_filter_follows_the_latest_status(status_repo, mocker):
+    now = 1_700_000_000
+    await write(
+        status_repo,
+        mocker,
+        [
+            ("req-0", now, NotificationStatus.failed),
+            ("req-1", now + 1, NotificationStatus.failed),
+            ("req-0", now + 2, NotificationStatus.delivered),
+        ],
+    )
+
+    failed, _ = await status_repo.list_statuses(10, status=NotificationStatus.failed)
+    delivered, _ = await status_repo.list_statuses(10, status=NotificationStatus.delivered)
+
+    assert failed == [{"request_id": "req-1", "status": "failed"}]
+    assert delivered == [{"request_id": "req-0", "status": "delivered"}]
+    assert await status_repo.count_statuses() == 2
+
+
+async def test_expired_records_are_dropped_from_the_index(status_repo, redis):
+    await status_repo.set_status("req-0", NotificationStatus.delivered)
+    await status_repo.set_status("req-1", NotificationStatus.delivered)
+    await redis.delete(status_repo._key("req-0"))
+
+    items, cursor = await status_repo.list_statuses(10)
+
+    assert [item["request_id"] for item in items] == ["req-1"]
+    assert cursor is None
+    assert await status_repo.count_statuses() == 1
+
+
+async def test_bulk_lookup_marks_unknown_ids(status_repo):
+    await status_repo.set_status("req-0", NotificationStatus.failed, "relay down")
+
+    statuses = await status_repo.get_statuses(["req-0", "req-1"])
+
+    assert statuses == {"req-0": {"status": "failed", "error": "relay down"}, "req-1": None}
+
+
+async def test_failure_releases_the_claim(status_repo):
+    assert await status_repo.ensure_idempotent("req-1") is False
+    assert await status_repo.ensure_idempotent("req-1") is True
+
+    await status_repo.set_status("req-1", NotificationStatus.failed, "relay down")
+
+    assert await status_repo.ensure_idempotent("req-1") is False
+
+
+async def test_only_delivered_ids_are_cached(redis):
+    first = StatusRepository(redis, ttl_seconds=600, local_cache_size=10)
+    second = StatusRepository(redis, ttl_seconds=600, local_cache_size=10)
+    await first.ensure_idempotent("req-1")
+
+    # Claimed elsewhere: a duplicate, but not remembered, since the claim may be released.
+    assert await second.ensure_idempotent("req-1") is True
+    assert "req-1" not in second.seen
+    await first.set_status("req-1", NotificationStatus.failed, "relay down")
+    assert await second.ensure_idempotent("req-1") is False
+
+    await second.set_status("req-1", NotificationStatus.delivered)
+    assert await second.ensure_idempotent_many(["req-1", "req-2"]) == [True, False]
+    assert "req-1" in second.seen
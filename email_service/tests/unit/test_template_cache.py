@@ -0,0 +1,159 @@
+import asyncio
+from typing import List, Optional, Tuple
+
+import orjson
+import pytest
+
+from benchmarks.payloads import make_payload
+
+from app.domain.decoding import decode_strict
+from app.infrastructure.template_client import TemplateClient
+from app.infrastructure.template_engine import TemplateCache, TemplateSource
+
+
+class Fetcher:
+    def __init__(self, source: Optional[TemplateSource] = None) -> None:
+        self.source = source or TemplateSource("Hi {{ name }}", "Hello {{ name }}", "v1", '"etag-1"')
+        self.calls: List[Tuple[str, str, Optional[str]]] = []
+        self.gate: Optional[asyncio.Event] = None
+        self.error: Optional[Exception] = None
+
+    async def __call__(self, template_code: str, locale: str, etag: Optional[str]) -> Optional[TemplateSource]:
+        self.calls.append((template_code, locale, etag))
+        if self.gate is not None:
+            await self.gate.wait()
+        if self.error is not None:
+            raise self.error
+        return self.source
+
+
+def make_cache(fetcher: Fetcher, max_size: int = 10, ttl: float = 60) -> TemplateCache:
+    return TemplateCache(fetcher, max_size=max_size, ttl_seconds=ttl)
+
+
+async def test_renders_and_serves_hits_from_the_cache():
+    fetcher = Fetcher()
+    cache = make_cache(fetcher)
+
+    first = await cache.get("welcome", "en")
+    second = await cache.get("welcome", "en")
+
+    assert first is second
+    assert first.render({"name": "Ada"}) == {"subject": "Hi Ada", "body": "Hello Ada", "template_version": "v1"}
+    assert len(fetcher.calls) == 1
+
+
+async def test_concurrent_misses_share_one_fetch():
+    fetcher = Fetcher()
+    fetcher.gate = asyncio.Event()
+    cache = make_cache(fetcher)
+
+    waiters = [asyncio.create_task(cache.get("welcome", "en")) for _ in range(3)]
+    await asyncio.sleep(0)
+    fetcher.gate.set()
+    compiled = await asyncio.gather(*waiters)
+
+    assert len(fetcher.calls) == 1
+    assert compiled[0] is compiled[1] is compiled[2]
+
+
+async def test_failed_fetch_reaches_every_waiter_and_is_not_cached():
+    fetcher = Fetcher()
+    fetcher.gate = asyncio.Event()
+    fetcher.error = LookupError("template missing")
+    cache = make_cache(fetcher)
+
+    waiters = [asyncio.create_task(cache.get("welcome", "en")) for _ in range(2)]
+    await asyncio.sleep(0)
+    fetcher.gate.set()
+    results = await asyncio.gather(*waiters, return_exceptions=True)
+
+    assert [type(result) for result in results] == [LookupError, LookupError]
+    fetcher.gate = None
+    fetcher.error = None
+    assert (await cache.get("welcome", "en")).version == "v1"
+    assert len(fetcher.calls) == 2
+
+
+async def test_cancelled_fetch_fails_the_other_waiters_without_cancelling_them():
+    fetcher = Fetcher()
+    fetcher.gate = asyncio.Event()
+    cache = make_cache(fetcher)
+
+    owner = asyncio.create_task(cache.get("welcome", "en"))
+    await asyncio.sleep(0)
+    waiter = asyncio.create_task(cache.get("welcome", "en"))
+    await asyncio.sleep(0)
+    owner.cancel()
+    results = await asyncio.gather(owner, waiter, return_exceptions=True)
+
+    assert isinstance(results[0], asyncio.CancelledError)
+    assert isinstance(results[1], LookupError)
+    assert not cache._inflight
+
+
+async def test_local_render_timeout_falls_back_to_the_template_service(mocker):
+    client = TemplateClient(session=object(), mode="local")  # type: ignore[arg-type]
+    mocker.patch.object(client, "render_local", side_effect=asyncio.TimeoutError())
+    remote = mocker.patch.object(client, "render_remote", return_value={"subject": "Hi", "body": "Hello"})
+    payload = decode_strict(orjson.dumps(make_payload(0)))
+
+    assert await client.render(payload) == {"subject": "Hi", "body": "Hello"}
+    remote.assert_awaited_once()
+
+
+async def test_expired_entry_is_revalidated_with_its_etag(mocker):
+    clock = mocker.patch("app.infrastructure.template_engine.time.monotonic", return_value=100.0)
+    fetcher = Fetcher()
+    cache = make_cache(fetcher, ttl=60)
+    cached = await cache.get("welcome", "en")
+
+    clock.return_value = 200.0
+    fetcher.source = None
+    revalidated = await cache.get("welcome", "en")
+
+    assert revalidated is cached
+    assert fetcher.calls[-1] == ("welcome", "en", '"etag-1"')
+    assert revalidated.checked_at == 200.0
+
+
+async def test_same_version_keeps_the_compiled_template(mocker):
+    clock = mocker.patch("app.infrastructure.template_engine.time.monotonic", return_value=100.0)
+    fetcher = Fetcher()
+    cache = make_cache(fetcher, ttl=60)
+    cached = await cache.get("welcome", "en")
+
+    clock.return_value = 200.0
+    fetcher.source = TemplateSource("changed", "changed", "v1", '"etag-2"')
+    same = await cache.get("welcome", "en")
+    fetcher.source = TemplateSource("Bye {{ name }}", "Bye {{ name }}", "v2", '"etag-3"')
+    clock.return_value = 300.0
+    newer = await cache.get("welcome", "en")
+
+    assert same is cached
+    assert same.etag == '"etag-2"'
+    assert newer is not cached
+    assert newer.render({"name": "Ada"})["subject"] == "Bye Ada"
+
+
+async def test_missing_source_without_a_cached_copy_raises():
+    fetcher = Fetcher()
+    fetcher.source = None
+    cache = make_cache(fetcher)
+
+    with pytest.raises(LookupError):
+        await cache.get("welcome", "en")
+
+
+async def test_least_recently_used_is_evicted_and_invalidate_drops_locales():
+    fetcher = Fetcher()
+    cache = make_cache(fetcher, max_size=2)
+    await cache.get("welcome", "en")
+    await cache.get("welcome", "fr")
+    await cache.get("welcome", "en")
+
+    await cache.get("reset", "en")
+    assert list(cache._entries) == [("welcome", "en"), ("reset", "en")]
+
+    cache.invalidate("welcome")
+    assert list(cache._entries) == [("reset", "en")]